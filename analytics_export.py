@@ -0,0 +1,360 @@
+"""
+Columnar (Parquet) export of submissions, problems, grades and LLM calls.
+
+Each table is written as Hive-style partitions by month and teacher:
+
+    analytics/submissions/month=2024-05/teacher=t01/part-0.parquet
+
+Column names and types are fixed by SCHEMAS, so every partition of a
+table has the same schema and analysts can load a whole directory with
+pandas.read_parquet("analytics/submissions"). Exports are incremental:
+a content hash per partition is kept in _state.json, and only partitions
+whose rows changed are rewritten (atomically, via a temp file and rename).
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+import zipfile
+
+ANALYTICS_DIR = "analytics"
+STATE_FILE = "_state.json"
+PART_FILE = "part-0.parquet"
+
+# 스키마가 바뀌면 올려서 전체 다시 쓰기를 유도
+SCHEMA_VERSION = 1
+
+UNKNOWN_MONTH = "unknown"
+UNASSIGNED_TEACHER = "_unassigned"
+
+# 테이블별 열 이름과 Arrow 타입 (파티션 열 month, teacher는 경로에만 기록)
+SCHEMAS = {
+    "submissions": [
+        ("submission_id", "string"),
+        ("student_id", "string"),
+        ("problem_key", "string"),
+        ("category", "string"),
+        ("level", "string"),
+        ("question", "string"),
+        ("answer", "string"),
+        ("answer_chars", "int32"),
+        ("feedback", "string"),
+        ("submitted_at", "timestamp"),
+        ("graded", "bool"),
+    ],
+    "problems": [
+        ("problem_key", "string"),
+        ("source", "string"),
+        ("category", "string"),
+        ("level", "string"),
+        ("question", "string"),
+        ("context", "string"),
+        ("example", "string"),
+        ("content", "string"),
+        ("created_at", "timestamp"),
+    ],
+    "grades": [
+        ("submission_id", "string"),
+        ("student_id", "string"),
+        ("problem_key", "string"),
+        ("graded_by", "string"),
+        ("score", "int32"),
+        ("teacher_feedback", "string"),
+        ("submitted_at", "timestamp"),
+        ("graded_at", "timestamp"),
+    ],
+    "llm_calls": [
+        ("call_id", "string"),
+        ("purpose", "string"),
+        ("provider", "string"),
+        ("model", "string"),
+        ("student_id", "string"),
+        ("problem_key", "string"),
+        ("latency_ms", "float64"),
+        ("prompt_tokens", "int32"),
+        ("completion_tokens", "int32"),
+        ("called_at", "timestamp"),
+    ],
+}
+
+# 파티션 월을 정하는 시각 열
+_MONTH_COLUMNS = {
+    "submissions": "submitted_at",
+    "problems": "created_at",
+    "grades": "graded_at",
+    "llm_calls": "called_at",
+}
+
+
+class AnalyticsExportError(Exception):
+    """분석용 내보내기를 할 수 없을 때 발생 (예: pyarrow 미설치)"""
+
+
+def _arrow():
+    """pyarrow를 필요할 때만 불러옴"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise AnalyticsExportError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다. (pip install pyarrow)")
+    return pa, pq
+
+
+def arrow_schema(table):
+    """테이블의 고정 Arrow 스키마"""
+    pa, _ = _arrow()
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in SCHEMAS[table]])
+
+
+def parse_timestamp(value):
+    """저장된 시각 문자열(ISO 또는 '%Y-%m-%d %H:%M:%S')을 datetime으로 변환"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _llm_row(call_id, purpose, info, student_id, problem_key):
+    return {
+        "call_id": call_id,
+        "purpose": info.get("purpose") or purpose,
+        "provider": _text(info.get("provider")),
+        "model": _text(info.get("model")),
+        "student_id": student_id,
+        "problem_key": problem_key,
+        "latency_ms": _float(info.get("latency_ms")),
+        "prompt_tokens": _int(info.get("prompt_tokens")),
+        "completion_tokens": _int(info.get("completion_tokens")),
+        "called_at": parse_timestamp(info.get("called_at")),
+    }
+
+
+def iter_rows(users, teacher_problems, student_records):
+    """(테이블, 교사, 행) 순서로 내보낼 모든 행 반환"""
+    for key, problem in teacher_problems.items():
+        teacher = problem.get("created_by")
+        yield "problems", teacher, {
+            "problem_key": key,
+            "source": "ai" if "content" in problem else "teacher",
+            "category": _text(problem.get("category")),
+            "level": _text(problem.get("level") or problem.get("difficulty")),
+            "question": _text(problem.get("question")),
+            "context": _text(problem.get("context")),
+            "example": _text(problem.get("example")),
+            "content": _text(problem.get("content")),
+            "created_at": parse_timestamp(problem.get("created_at")),
+        }
+        if isinstance(problem.get("llm"), dict):
+            yield "llm_calls", teacher, _llm_row(f"problem/{key}", "generation", problem["llm"], None, key)
+
+    for student_id, record in student_records.items():
+        # 학생 답변은 학생을 등록한 교사 기준으로 분할 (채점 대기열과 동일)
+        teacher = users.get(student_id, {}).get("created_by")
+        for index, submission in enumerate(record.get("solved_problems", [])):
+            submission_id = f"{student_id}/{index}"
+            problem = submission.get("problem") or {}
+            problem_key = _text(submission.get("problem_key"))
+            answer = submission.get("answer") or ""
+            graded = "teacher_score" in submission
+            yield "submissions", teacher, {
+                "submission_id": submission_id,
+                "student_id": student_id,
+                "problem_key": problem_key,
+                "category": _text(problem.get("category")),
+                "level": _text(problem.get("level")),
+                "question": _text(problem.get("question") or problem.get("content")),
+                "answer": answer,
+                "answer_chars": len(answer),
+                "feedback": _text(submission.get("feedback")),
+                "submitted_at": parse_timestamp(submission.get("timestamp")),
+                "graded": graded,
+            }
+            if graded:
+                yield "grades", teacher, {
+                    "submission_id": submission_id,
+                    "student_id": student_id,
+                    "problem_key": problem_key,
+                    "graded_by": _text(submission.get("graded_by")),
+                    "score": _int(submission.get("teacher_score")),
+                    "teacher_feedback": _text(submission.get("teacher_feedback")),
+                    "submitted_at": parse_timestamp(submission.get("timestamp")),
+                    "graded_at": parse_timestamp(submission.get("graded_at")),
+                }
+            if isinstance(submission.get("llm"), dict):
+                yield "llm_calls", teacher, _llm_row(
+                    f"submission/{submission_id}", "feedback", submission["llm"], student_id, problem_key
+                )
+
+
+def partition_path(table, month, teacher):
+    """테이블/month=YYYY-MM/teacher=<아이디> 형식의 상대 경로"""
+    return "/".join([
+        table,
+        f"month={month}",
+        f"teacher={urllib.parse.quote(teacher or UNASSIGNED_TEACHER, safe='')}",
+    ])
+
+
+def build_partitions(users, teacher_problems, student_records):
+    """파티션 경로별 (테이블, 행 목록) 사전"""
+    partitions = {}
+    for table, teacher, row in iter_rows(users, teacher_problems, student_records):
+        # 채점 시각이 없는 예전 채점 기록은 제출 시각 기준
+        moment = row[_MONTH_COLUMNS[table]] or row.get("submitted_at")
+        month = moment.strftime("%Y-%m") if moment else UNKNOWN_MONTH
+        path = partition_path(table, month, teacher)
+        partitions.setdefault(path, (table, []))[1].append(row)
+    return partitions
+
+
+def partition_hash(rows):
+    """파티션 행 내용 해시 (변경 감지용)"""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps(row, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _read_state(directory):
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(directory, state):
+    path = os.path.join(directory, STATE_FILE)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def _write_partition(directory, path, table, rows):
+    pa, pq = _arrow()
+    target_dir = os.path.join(directory, *path.split("/"))
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, PART_FILE)
+    temp_path = target + ".tmp"
+    arrow_table = pa.Table.from_pylist(rows, schema=arrow_schema(table))
+    try:
+        pq.write_table(arrow_table, temp_path, compression="zstd")
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return os.path.getsize(target)
+
+
+def _remove_partition(directory, path):
+    target_dir = os.path.join(directory, *path.split("/"))
+    shutil.rmtree(target_dir, ignore_errors=True)
+    # 비게 된 month= 디렉터리도 정리
+    parent = os.path.dirname(target_dir)
+    if os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+
+
+def export(users, teacher_problems, student_records, directory=ANALYTICS_DIR, full=False):
+    """변경된 파티션만 Parquet으로 다시 쓰고 통계 반환
+
+    Args:
+        full (bool): True면 이전 상태를 무시하고 모든 파티션을 다시 씀
+
+    Returns:
+        dict: written, unchanged, removed, rows(테이블별), bytes, elapsed
+    """
+    _arrow()
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    state = _read_state(directory)
+    if full or state.get("schema_version") != SCHEMA_VERSION:
+        previous = {}
+        for table in SCHEMAS:
+            shutil.rmtree(os.path.join(directory, table), ignore_errors=True)
+    else:
+        previous = state.get("partitions", {})
+
+    partitions = build_partitions(users, teacher_problems, student_records)
+    stats = {"written": 0, "unchanged": 0, "removed": 0, "bytes": 0, "rows": {table: 0 for table in SCHEMAS}}
+    hashes = {}
+    for path, (table, rows) in partitions.items():
+        stats["rows"][table] += len(rows)
+        digest = partition_hash(rows)
+        hashes[path] = digest
+        if previous.get(path) == digest:
+            stats["unchanged"] += 1
+            continue
+        stats["bytes"] += _write_partition(directory, path, table, rows)
+        stats["written"] += 1
+
+    for path in previous:
+        if path not in partitions:
+            _remove_partition(directory, path)
+            stats["removed"] += 1
+
+    _write_state(directory, {
+        "schema_version": SCHEMA_VERSION,
+        "exported_at": datetime.datetime.now().isoformat(),
+        "partitions": hashes,
+    })
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
+
+
+def last_export(directory=ANALYTICS_DIR):
+    """마지막 내보내기 정보 (없으면 None)"""
+    state = _read_state(directory)
+    if not state:
+        return None
+    return {"exported_at": state.get("exported_at"), "partitions": len(state.get("partitions", {}))}
+
+
+def write_zip(directory=ANALYTICS_DIR):
+    """내보낸 Parquet 파일 전체를 ZIP으로 묶고 임시 파일 경로 반환"""
+    handle, path = tempfile.mkstemp(prefix="ai_english_analytics_", suffix=".zip")
+    os.close(handle)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zip_file:
+        for table in SCHEMAS:
+            table_dir = os.path.join(directory, table)
+            for root, _, files in os.walk(table_dir):
+                for name in files:
+                    if name.endswith(".parquet"):
+                        full_path = os.path.join(root, name)
+                        zip_file.write(full_path, os.path.relpath(full_path, directory))
+    return path
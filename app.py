@@ -1,44 +1,123 @@
+import time
+
+# 첫 실행 시간 측정 기준 (시스템 정보의 시작 시간 보고용)
+_SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
+
+# Page configuration (다른 st 호출보다 먼저 실행되어야 함)
+st.set_page_config(
+    page_title="학원자동시스템관리",
+    page_icon="🏫",
+    layout="wide"
+)
+
 import os
-import openai
-import pandas as pd
-import numpy as np
-import json
-import hashlib
+import functools
+import threading
 import csv
-import io
 import datetime
-import altair as alt
-import zipfile
-from dotenv import load_dotenv
+import uuid
+import lazy
+import config
+import charts
+import instrumentation
+import metrics
+import memory
 from problems import SAMPLE_PROBLEMS
 from prompts import get_correction_prompt
+from indexes import DataIndex
+from search import SearchIndex, snippet
+from pagination import DEFAULT_PAGE_SIZES, PAGE_SIZE_OPTIONS, paginate, sort_keys, filter_keys
+from grading_queue import GradingQueue, GRADED, UNGRADED
+from recommender import Recommender
+import backup
+import analytics_export
+from backup_chain import BackupChain
+import restore
+import auth
+from auth import hash_password, verify_password
+import bulk_register
+import sessions
+import datastore
 
-# Load environment variables first
-load_dotenv()
+@st.cache_resource
+def get_config():
+    """프로세스 전체에서 공유하는 설정 서비스 (.env는 처음 한 번과 변경 시에만 읽음)"""
+    return config.ConfigService()
 
-# Initialize API configurations
-try:
-    import google.generativeai as genai
-    if os.getenv("GOOGLE_API_KEY"):
-        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-except ImportError:
-    st.error("google-generativeai 패키지가 설치되지 않았습니다. 'pip install google-generativeai'를 실행해주세요.")
-except Exception as e:
-    st.error(f"Gemini API 초기화 중 오류가 발생했습니다: {str(e)}")
+def settings():
+    """현재 설정 스냅샷"""
+    return get_config().snapshot()
 
-# Initialize session state
-if 'openai_api_key' not in st.session_state:
-    st.session_state.openai_api_key = os.getenv("OPENAI_API_KEY", "")
-if 'gemini_api_key' not in st.session_state:
-    st.session_state.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
+def openai_client(call=None):
+    """설정의 타임아웃/재시도 횟수를 적용한 OpenAI 클라이언트
 
-# Page configuration
-st.set_page_config(
-    page_title="학원자동시스템관리",
-    page_icon="🏫",
-    layout="wide"
-)
+    call(metrics.LLMCall)을 주면 HTTP 요청마다 기록해 자동 재시도 수를 셉니다.
+    """
+    current = settings()
+    options = {}
+    if call is not None:
+        options["http_client"] = openai.DefaultHttpxClient(event_hooks={"request": [call.on_request]})
+    return openai.OpenAI(
+        api_key=st.session_state.openai_api_key,
+        base_url=current.openai_base_url or None,
+        timeout=current.llm_timeout,
+        max_retries=current.llm_max_retries,
+        **options
+    )
+
+@st.cache_resource
+def _llm_semaphore(limit):
+    return threading.BoundedSemaphore(max(1, limit))
+
+def llm_slot():
+    """동시에 진행되는 LLM 호출 수를 LLM_MAX_CONCURRENCY로 제한 (모든 세션 공통)"""
+    return _llm_semaphore(settings().llm_concurrency)
+
+@st.cache_resource
+def get_startup_report():
+    """프로세스의 실행 시간 기록 (첫 실행, 최근 전체 실행, 로그인 화면, 프래그먼트)"""
+    return {"fragments": {}}
+
+def timed_fragment(name, run_every=None):
+    """st.fragment로 만들고 마지막 실행 시간을 기록하는 데코레이터
+
+    프래그먼트 안의 위젯을 조작하면 스크립트 전체 대신 그 함수만 다시 실행됩니다.
+    run_every(초)를 주면 그 간격마다 함수만 다시 실행됩니다. 프래그먼트만 다시
+    실행될 때는 구간 측정도 따로 시작해, 이전 전체 실행의 기록에 섞이지 않게 합니다.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            own_run = not instrumentation.in_run()
+            if own_run:
+                instrumentation.begin_run(f"{st.session_state.get('current_view_label') or '-'} [{name}]")
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                get_startup_report()["fragments"][name] = (time.perf_counter() - started) * 1000
+                if own_run:
+                    instrumentation.end_run()
+        return st.fragment(wrapper, run_every=run_every or None)
+    return decorator
+
+def _configure_genai(module):
+    """google.generativeai를 처음 불러올 때 설정의 키로 설정"""
+    if settings().google_api_key:
+        module.configure(api_key=settings().google_api_key)
+
+# 무거운 모듈은 처음 사용할 때 불러옴 (로그인 화면에서는 불러오지 않음)
+openai = lazy.module("openai")
+genai = lazy.module("google.generativeai", on_load=_configure_genai)
+pd = lazy.module("pandas")
+csv_import = lazy.module("csv_import")
+
+_IMPORTS_DONE = time.perf_counter()
+
+# 이번 실행의 구간별 측정 시작 (대시보드에서 메뉴 이름으로 바뀜)
+instrumentation.begin_run("login")
 
 # Function to initialize session states
 def initialize_session_states():
@@ -65,72 +144,425 @@ def initialize_session_states():
         st.session_state.user_role = None
     if 'username' not in st.session_state:
         st.session_state.username = None
-    if 'users' not in st.session_state:
-        st.session_state.users = {}
-    if 'teacher_problems' not in st.session_state:
-        st.session_state.teacher_problems = {}
-    if 'student_records' not in st.session_state:
-        st.session_state.student_records = {}
-    
-    # API 키 초기화 - .env 파일에서 로드
-    load_dotenv()
+    
+    # API 키 초기화 - 설정 스냅샷에서 가져옴 (매 실행마다 .env를 읽지 않음)
     if 'openai_api_key' not in st.session_state:
-        st.session_state.openai_api_key = os.getenv("OPENAI_API_KEY", "")
+        st.session_state.openai_api_key = settings().openai_api_key
     if 'gemini_api_key' not in st.session_state:
-        st.session_state.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
+        st.session_state.gemini_api_key = settings().gemini_api_key
 
 # Initialize session state
 initialize_session_states()
 
+@st.cache_resource
+def get_data_store():
+    """프로세스 전체에서 공유하는 데이터 (세션에는 로그인 정보와 화면 상태만 보관)"""
+    current = settings()
+    store = datastore.DataStore(
+        save_delay=current.save_delay_seconds,
+        save_max_delay=current.save_max_delay_seconds,
+        on_save=lambda seconds, size, requests: metrics.record_save(seconds, size),
+        on_save_error=lambda error: metrics.record_save(0, None)
+    )
+    store.load()
+    # 다른 프로세스가 파일을 바꾸면 다시 읽음
+    store.watch(current.data_watch_seconds)
+    return store
+
+def session_id():
+    """이 브라우저 세션의 식별자 (변경 피드와 메모리 측정에 사용)"""
+    return st.session_state.setdefault("session_instance_id", uuid.uuid4().hex)
+
+def set_current_view(label):
+    """현재 화면 이름 기록 (실행 시간 측정과 실시간 반영 판단에 사용)"""
+    instrumentation.set_label(label)
+    st.session_state.current_view_label = label
+
+def current_view():
+    """로그인한 사용자가 읽을 수 있는 범위의 데이터 접근"""
+    return get_data_store().view(st.session_state.username, st.session_state.user_role)
+
+# 다른 세션의 변경이 보이면 스크립트 전체를 다시 실행하는 화면 (입력 중인 내용이 없는 화면)
+AUTO_REFRESH_VIEWS = {"student/내 학습 기록", "teacher/학생 관리"}
+
+def relevant_changes(topics):
+    """변경 주제 중 현재 사용자 화면에 영향을 주는 것"""
+    if datastore.ALL in topics:
+        return topics
+    username = st.session_state.username
+    if st.session_state.user_role == "student":
+        watched = {datastore.record_topic(username), "problems"}
+    else:
+        watched = {datastore.record_topic(student) for student in get_data_index().students_of(username)}
+        watched |= {"problems", "users"}
+    return topics & watched
+
+def mark_data_seen():
+    """이번 실행이 반영한 데이터 버전 기록 (자신이 만든 변경으로 다시 실행하지 않도록)"""
+    st.session_state.seen_data_version = get_data_store().version
+
+@timed_fragment("live_updates", run_every=settings().live_update_seconds)
+def live_updates():
+    """다른 세션의 변경(새 채점, 답변, 문제)을 확인해 화면에 반영
+
+    LIVE_UPDATE_SECONDS마다 이 함수만 실행되며, 변경 피드에서 버전 이후의
+    주제만 확인하므로 파일을 다시 읽지 않습니다.
+    """
+    store = get_data_store()
+    seen = st.session_state.get("seen_data_version")
+    if seen is None or seen == store.version:
+        return
+    changes = relevant_changes(store.changes_since(seen, exclude_origin=session_id()))
+    if not changes:
+        st.session_state.seen_data_version = store.version
+        return
+    # 바뀐 학생의 미리 준비된 채점 데이터는 버림
+    prefetched = st.session_state.get('grading_prefetch', {})
+    for key in [key for key in prefetched if datastore.ALL in changes or datastore.record_topic(key[0]) in changes]:
+        prefetched.pop(key)
+    if st.session_state.get("current_view_label") in AUTO_REFRESH_VIEWS:
+        st.rerun()
+    if st.session_state.user_role == "student":
+        st.info("새 채점 결과나 문제가 있습니다.")
+    else:
+        st.info("새 답변이나 변경 사항이 있습니다.")
+    if st.button("새로 고침", key="live_update_refresh"):
+        st.rerun()
+
 # User management functions
+@instrumentation.timed("data.save")
 def save_users_data():
-    """사용자 데이터를 JSON 파일로 저장"""
+    """공유 데이터 저장 요청
+
+    변경은 백그라운드에서 SAVE_DELAY_SECONDS 동안 모아 한 번에 기록하므로
+    화면이 파일 기록을 기다리지 않습니다. 기록은 임시 파일에 쓴 뒤 교체하여
+    중간에 실패해도 기존 파일이 유지되고, 실패한 변경은 다시 시도됩니다.
+    """
+    store = get_data_store()
+    metrics.STORAGE_SAVE_REQUESTS.inc()
     try:
-        data = {
-            'teacher_problems': st.session_state.teacher_problems,
-            'student_records': st.session_state.student_records,
-            'users': st.session_state.users if 'users' in st.session_state else {}
-        }
-        with open('users_data.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
+        store.save()
     except Exception as e:
         st.error(f"데이터 저장 중 오류 발생: {str(e)}")
         return False
+    if store.writer.last_error is not None:
+        st.error(f"데이터 저장 중 오류 발생 (다시 시도 중): {store.writer.last_error}")
+        return False
+    return True
 
+@instrumentation.timed("data.load")
 def load_users_data():
-    """JSON 파일에서 사용자 데이터 로드"""
+    """JSON 파일에서 공유 데이터 로드 (파일이 바뀐 경우에만 다시 읽고 인덱스 재구성)"""
     try:
-        if os.path.exists('users_data.json'):
-            with open('users_data.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                st.session_state.teacher_problems = data.get('teacher_problems', {})
-                st.session_state.student_records = data.get('student_records', {})
-                st.session_state.users = data.get('users', {})
+        if get_data_store().load():
+            st.session_state.pop('grading_prefetch', None)
     except Exception as e:
         st.error(f"데이터 로드 중 오류 발생: {str(e)}")
 
+def rebuild_data_index():
+    """공유 데이터의 보조 인덱스 재구성 (검색 색인, 채점 대기열, 추천기는 다음 사용 시 다시 구성)"""
+    get_data_store().drop_derived()
+    st.session_state.pop('grading_prefetch', None)
+    return get_data_index()
+
+@instrumentation.timed("index.data_index")
+def _build_data_index():
+    store = get_data_store()
+    index = DataIndex()
+    index.rebuild(store.users, store.teacher_problems)
+    return index
+
+def get_data_index():
+    """사용자/문제 보조 인덱스 반환 (모든 세션 공통)"""
+    return get_data_store().derived("data_index", _build_data_index)
+
+def get_teacher_students(teacher):
+    """교사가 등록한 학생 목록 (아이디 -> 사용자 정보)"""
+    users = get_data_store().users
+    return {username: users[username] for username in get_data_index().students_of(teacher)}
+
+def get_problems(created_by=None, category=None, level=None, solvable=False):
+    """조건에 맞는 교사 문제 목록 (키 -> 문제, solvable이면 AI 생성 문제 세트 제외)"""
+    problems = get_data_store().teacher_problems
+    keys = get_data_index().problems(created_by=created_by, category=category, level=level, solvable=solvable)
+    return {key: problems[key] for key in keys}
+
+def add_problem(problem_key, problem_data):
+    """교사 문제 추가 및 인덱스 갱신 (저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        store.put_problems({problem_key: problem_data})
+        get_data_index().add_problem(problem_key, problem_data)
+        search_index = store.peek_derived('search_index')
+        if search_index is not None:
+            search_index.add_problem(problem_key, problem_data)
+        recommender = store.peek_derived('recommender')
+        if recommender is not None:
+            recommender.add_candidate(problem_key, problem_data)
+
+def add_users(new_users):
+    """여러 사용자를 한 번에 추가하고 학생 기록 초기화 (저장은 호출한 쪽에서 수행)
+
+    이미 있는 아이디는 추가하지 않고 그 목록을 반환합니다. 중복 확인과 추가를
+    한 쓰기 구간에서 하므로, 비밀번호를 해싱하는 사이 다른 세션이 같은 아이디로
+    가입해도 덮어쓰지 않습니다.
+    """
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        conflicts = [username for username in new_users if username in store.users]
+        users = {username: user_data for username, user_data in new_users.items() if username not in store.users}
+        if not users:
+            return conflicts
+        store.put_users(users)
+        store.put_records({
+            username: datastore.new_record()
+            for username, user_data in users.items() if user_data.get("role") == "student"
+        })
+        index = get_data_index()
+        for username, user_data in users.items():
+            index.add_user(username, user_data)
+    return conflicts
+
+def add_problems(problems):
+    """여러 교사 문제를 한 번에 추가 (저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        store.put_problems(problems)
+        index = get_data_index()
+        for key, problem in problems.items():
+            index.add_problem(key, problem)
+        # 대량 추가 후에는 검색 색인과 추천 목록을 다음 사용 시 다시 구성
+        store.drop_derived('search_index', 'recommender')
+
+def delete_problem(problem_key):
+    """교사 문제 삭제 및 인덱스 갱신 (저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        if problem_key not in store.teacher_problems:
+            return False
+        store.remove_problem(problem_key)
+        get_data_index().remove_problem(problem_key)
+        search_index = store.peek_derived('search_index')
+        if search_index is not None:
+            search_index.remove_problem(problem_key)
+        recommender = store.peek_derived('recommender')
+        if recommender is not None:
+            recommender.remove_candidate(problem_key)
+        return True
+
+def delete_user(username):
+    """사용자와 관련 데이터 삭제 및 인덱스 갱신 (저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        if username not in store.users:
+            return False
+        role = store.users[username].get("role", "")
+        store.remove_user(username)
+        get_data_index().remove_user(username)
+        revoke_user_sessions(username)
+        
+        # 역할에 따른 추가 데이터 삭제
+        if role == "student":
+            store.remove_record(username)
+            search_index = store.peek_derived('search_index')
+            if search_index is not None:
+                search_index.remove_student(username)
+            grading_queue = store.peek_derived('grading_queue')
+            if grading_queue is not None:
+                grading_queue.remove_student(username)
+            recommender = store.peek_derived('recommender')
+            if recommender is not None:
+                recommender.remove_student(username)
+        elif role == "teacher":
+            # 교사가 출제한 문제 삭제
+            for key in get_data_index().problems(created_by=username):
+                delete_problem(key)
+        return True
+
+def update_user(username, **changes):
+    """사용자 정보 변경 (이름, 이메일, 비밀번호 등, 저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        user_data = store.update_user(username, **changes)
+        get_data_index().add_user(username, user_data)
+        return user_data
+
+def record_submission(username, submission):
+    """학생 답변 기록 추가 (저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        index = store.append_submission(username, submission)
+        search_index = store.peek_derived('search_index')
+        if search_index is not None:
+            search_index.add_submission(username, index, submission)
+        grading_queue = store.peek_derived('grading_queue')
+        if grading_queue is not None:
+            teacher = store.users.get(username, {}).get("created_by")
+            grading_queue.add(username, index, submission, teacher)
+        recommender = store.peek_derived('recommender')
+        if recommender is not None:
+            recommender.record_submission(username, submission)
+        return index
+
+def save_grade(student, index, teacher_feedback, teacher_score, graded_by):
+    """교사 채점 결과 기록 (저장은 호출한 쪽에서 수행)"""
+    store = get_data_store()
+    with store.write(origin=session_id()):
+        regraded = "teacher_score" in store.records_of(student)["solved_problems"][index]
+        submission = store.update_submission(
+            student, index,
+            teacher_feedback=teacher_feedback,
+            teacher_score=teacher_score,
+            graded_by=graded_by,
+            graded_at=datetime.datetime.now().isoformat()
+        )
+        search_index = store.peek_derived('search_index')
+        if search_index is not None:
+            search_index.add_submission(student, index, submission)
+        grading_queue = store.peek_derived('grading_queue')
+        if grading_queue is not None:
+            grading_queue.mark(student, index, submission)
+        recommender = store.peek_derived('recommender')
+        if recommender is not None:
+            if regraded:
+                recommender.rebuild_student(student, store.records_of(student))
+            else:
+                recommender.record_grade(student, submission)
+    st.session_state.get('grading_prefetch', {}).pop((student, index), None)
+    return submission
+
+def get_recommender():
+    """추천기 반환 (처음 사용할 때 구성, 모든 세션 공통)"""
+    def build():
+        with instrumentation.timer("index.recommender"):
+            store = get_data_store()
+            recommender = Recommender(SAMPLE_PROBLEMS)
+            recommender.rebuild(store.teacher_problems, store.student_records)
+            return recommender
+    return get_data_store().derived('recommender', build)
+
+def get_grading_queue():
+    """채점 대기열 반환 (처음 사용할 때 구성, 모든 세션 공통)"""
+    def build():
+        with instrumentation.timer("index.grading_queue"):
+            store = get_data_store()
+            queue = GradingQueue()
+            queue.rebuild(store.users, store.student_records)
+            return queue
+    return get_data_store().derived('grading_queue', build)
+
+def format_timestamp(value, fmt="%Y-%m-%d %H:%M"):
+    """ISO 형식 시각을 표시용 문자열로 변환 (실패 시 원래 값)"""
+    try:
+        return datetime.datetime.fromisoformat(value).strftime(fmt)
+    except (TypeError, ValueError):
+        return value or ""
+
+def build_grading_item(key):
+    """채점 화면에 필요한 문제/답변/첨삭 데이터 구성"""
+    student, index = key
+    submission = current_view().submission(student, index)
+    problem = submission.get("problem", {})
+    return {
+        "student_name": get_data_store().users.get(student, {}).get("name", student),
+        "timestamp": format_timestamp(submission.get("timestamp", "")),
+        "question": problem.get("question", ""),
+        "context": problem.get("context", ""),
+        "answer": submission.get("answer", ""),
+        "feedback": submission.get("feedback", ""),
+        "teacher_feedback": submission.get("teacher_feedback", ""),
+        "teacher_score": submission.get("teacher_score", 0)
+    }
+
+def prefetch_grading_item(key):
+    """다음에 채점할 답변 데이터를 미리 준비"""
+    if key is None:
+        return
+    prefetched = st.session_state.setdefault('grading_prefetch', {})
+    if key not in prefetched:
+        # 오래된 항목이 쌓이지 않도록 최근 것만 유지
+        if len(prefetched) >= 4:
+            prefetched.pop(next(iter(prefetched)))
+        prefetched[key] = build_grading_item(key)
+
+def get_grading_item(key):
+    """미리 준비된 채점 데이터가 있으면 사용하고, 없으면 구성"""
+    prefetched = st.session_state.get('grading_prefetch', {})
+    item = prefetched.get(key)
+    if item is None:
+        item = build_grading_item(key)
+    return item
+
+def get_search_index():
+    """문제/답변 검색 색인 반환 (처음 검색할 때 구성, 모든 세션 공통)"""
+    def build():
+        with instrumentation.timer("index.search"):
+            store = get_data_store()
+            index = SearchIndex()
+            index.rebuild(store.teacher_problems, store.student_records)
+            return index
+    return get_data_store().derived('search_index', build)
+
+def render_pager(view, keys):
+    """페이지 크기/번호 선택 UI를 표시하고 현재 페이지 반환"""
+    default_size = DEFAULT_PAGE_SIZES.get(view, 10)
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        page_size = st.selectbox(
+            "페이지 크기:",
+            PAGE_SIZE_OPTIONS,
+            index=PAGE_SIZE_OPTIONS.index(default_size) if default_size in PAGE_SIZE_OPTIONS else 0,
+            key=f"{view}_page_size"
+        )
+    with col2:
+        page_number = st.number_input("페이지:", min_value=1, value=1, step=1, key=f"{view}_page")
+    page = paginate(keys, page_number, page_size)
+    with col3:
+        st.caption(f"{page.label()} (페이지 {page.page}/{page.page_count})")
+    return page
+
+def search_documents(query, kind=None, allow=None, limit=20):
+    """검색 실행 후 (결과 목록, 소요 시간(ms)) 반환"""
+    start = time.perf_counter()
+    results = get_search_index().search(query, kind=kind, allow=allow, limit=limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return results, elapsed_ms
+
+@st.cache_resource
+def configure_password_hashing():
+    """프로세스당 한 번 비밀번호 해싱 비용을 정함
+
+    PASSWORD_HASH_ITERATIONS가 있으면 그 값을, 없으면 이 서버에서 측정해
+    검증 한 번이 PASSWORD_HASH_TARGET_MS(기본 200ms) 정도 걸리는 값을 씁니다.
+    """
+    current = settings()
+    return auth.configure(
+        iterations=current.password_hash_iterations,
+        target_ms=current.password_hash_target_ms
+    )
+
+configure_password_hashing()
+
 # Load user data at app start
 load_users_data()
 
-def hash_password(password):
-    """비밀번호 해싱 함수"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
 def login_user(username, password):
     """사용자 로그인 처리"""
     try:
-        if username in st.session_state.users:
-            hashed_password = hash_password(password)
-            if st.session_state.users[username]["password"] == hashed_password:
-                st.session_state.logged_in = True
-                st.session_state.username = username
-                st.session_state.user_role = st.session_state.users[username]["role"]
+        user_data = get_data_store().user(username)
+        if user_data is not None:
+            stored_password = user_data["password"]
+            if verify_password(password, stored_password):
+                # 예전 SHA-256 해시나 낮은 비용의 해시는 로그인할 때 새 방식으로 교체
+                if auth.needs_rehash(stored_password):
+                    update_user(username, password=hash_password(password))
+                    save_users_data()
+                
+                start_session(username)
                 
                 # API 키 다시 로드
-                load_dotenv()
-                st.session_state.openai_api_key = os.getenv("OPENAI_API_KEY", "")
-                st.session_state.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
+                st.session_state.openai_api_key = settings().openai_api_key
+                st.session_state.gemini_api_key = settings().gemini_api_key
                 
                 return True
             else:
@@ -142,8 +574,98 @@ def login_user(username, password):
         st.error(f"로그인 처리 중 오류가 발생했습니다: {e}")
         return False
 
+@st.cache_resource
+def get_session_store():
+    """프로세스 전체에서 공유하는 로그인 세션 저장소"""
+    current = settings()
+    return sessions.SessionStore(secret=current.session_secret, ttl_hours=current.session_ttl_hours)
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Prometheus 지표 수집 등록 후 METRICS_PORT가 있으면 /metrics 서버 시작 (프로세스당 한 번)
+
+    Returns:
+        dict: {"address": 주소 또는 None, "error": 시작 실패 메시지 또는 None}
+    """
+    def cache_counts():
+        chart_stats = charts.cache_stats()
+        verify_stats = auth.verify_cache_stats()
+        return {
+            ("charts", "hit"): chart_stats["hits"],
+            ("charts", "miss"): chart_stats["misses"],
+            ("password_verify", "hit"): verify_stats["hits"],
+            ("password_verify", "miss"): verify_stats["misses"],
+        }
+    
+    def cache_hit_ratio():
+        ratios = {}
+        for (cache, result), count in cache_counts().items():
+            hits, total = ratios.get((cache,), (0, 0))
+            ratios[(cache,)] = (hits + (count if result == "hit" else 0), total + count)
+        return {key: (hits / total if total else 0.0) for key, (hits, total) in ratios.items()}
+    
+    metrics.register_callback("cache_requests_total", "캐시 조회 수 (result=hit|miss)", "counter",
+                              cache_counts, ("cache", "result"))
+    metrics.register_callback("cache_hit_ratio", "캐시 적중률", "gauge", cache_hit_ratio, ("cache",))
+    metrics.register_callback("active_login_sessions", "만료되지 않은 로그인 세션 수", "gauge",
+                              lambda: {(): get_session_store().active_count()})
+    metrics.register_callback("storage_pending_save_requests", "아직 기록하지 않은 저장 요청 수", "gauge",
+                              lambda: {(): get_data_store().writer.stats()["pending"]})
+    metrics.register_callback("process_resident_memory_bytes", "프로세스 메모리 사용량 (RSS)", "gauge",
+                              lambda: {(): memory.process_rss() or 0})
+    metrics.register_callback("session_state_bytes", "최근 측정한 세션 상태 크기 합계", "gauge",
+                              lambda: {(): get_memory_registry().total()})
+    
+    current = settings()
+    if not current.metrics_port:
+        return {"address": None, "error": None}
+    try:
+        server = metrics.MetricsServer(current.metrics_host, current.metrics_port).start()
+        return {"address": server.address, "error": None}
+    except OSError as e:
+        # 포트 사용 중 등 - 앱은 지표 없이 계속 동작
+        return {"address": None, "error": str(e)}
+
+start_metrics_exporter()
+
+def start_session(username):
+    """로그인 상태 설정 후 세션 토큰을 발급해 URL에 기록"""
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.user_role = get_data_store().users[username]["role"]
+    token = get_session_store().issue(username)
+    st.session_state.session_token = token
+    st.query_params[sessions.QUERY_PARAM] = token
+
+def restore_session():
+    """URL의 세션 토큰으로 로그인 상태 복원 (새로고침, 재접속 시 비밀번호 검증 생략)"""
+    token = st.query_params.get(sessions.QUERY_PARAM)
+    if not token:
+        return False
+    username = get_session_store().resolve(token)
+    if username is None or username not in get_data_store().users:
+        # 만료되었거나 폐기된 토큰
+        del st.query_params[sessions.QUERY_PARAM]
+        return False
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.user_role = get_data_store().users[username]["role"]
+    st.session_state.session_token = token
+    return True
+
+def revoke_user_sessions(username, keep_current=False):
+    """사용자의 로그인 세션 폐기 (비밀번호 변경, 초기화, 사용자 삭제 시)"""
+    keep = st.session_state.get("session_token") if keep_current else None
+    get_session_store().revoke_user(username, keep=keep)
+
 def logout_user():
     """사용자 로그아웃 처리"""
+    token = st.session_state.get("session_token")
+    if token:
+        get_session_store().revoke(token)
+    if sessions.QUERY_PARAM in st.query_params:
+        del st.query_params[sessions.QUERY_PARAM]
+    
     # API 키는 유지하지 않음
     st.session_state.clear()
     
@@ -153,32 +675,25 @@ def logout_user():
     st.session_state.user_role = None
     
     # API 키 재로드
-    load_dotenv()
-    st.session_state.openai_api_key = os.getenv("OPENAI_API_KEY", "")
-    st.session_state.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
+    st.session_state.openai_api_key = settings().openai_api_key
+    st.session_state.gemini_api_key = settings().gemini_api_key
 
 def register_user(username, password, role, name, email, created_by=None):
     """새 사용자 등록"""
-    if username in st.session_state.users:
+    if username in get_data_store().users:
         return False, "이미 존재하는 사용자 이름입니다."
     
     hashed_password = hash_password(password)
-    st.session_state.users[username] = {
+    # 학생인 경우 학생 기록도 함께 초기화 (해싱하는 사이 같은 아이디가 등록되었으면 실패)
+    if add_users({username: {
         "password": hashed_password,
         "role": role,
         "name": name,
         "email": email,
         "created_by": created_by,
         "created_at": datetime.datetime.now().isoformat()
-    }
-    
-    # 학생인 경우 학생 기록 초기화
-    if role == "student":
-        st.session_state.student_records[username] = {
-            "solved_problems": [],
-            "total_problems": 0,
-            "feedback_history": []
-        }
+    }}):
+        return False, "이미 존재하는 사용자 이름입니다."
     
     save_users_data()
     return True, "사용자가 성공적으로 등록되었습니다."
@@ -220,9 +735,40 @@ def login_page():
         - 데이터 백업 및 복원
         """)
 
+@instrumentation.timed("aggregate.category_counts")
+def category_counts(student=None):
+    """카테고리별 개수 (student가 있으면 그 학생이 푼 문제, 없으면 전체 문제)"""
+    categories = {}
+    if student is not None:
+        for problem in current_view().records(student).get("solved_problems", []):
+            category = problem["problem"].get("category", "기타")
+            categories[category] = categories.get(category, 0) + 1
+        return categories
+    
+    # 예제 문제 카테고리
+    for problem in SAMPLE_PROBLEMS.values():
+        category = problem.get("category", "기타")
+        categories[category] = categories.get(category, 0) + 1
+    
+    # 교사 출제 문제 카테고리
+    for category, count in get_data_index().category_counts().items():
+        categories[category] = categories.get(category, 0) + count
+    return categories
+
+def category_chart_panel(title, student=None):
+    """카테고리별 분포 막대 차트 (필요한 집계만 직접 계산, 위젯이 없으므로 프래그먼트가 아님)"""
+    categories = category_counts(student)
+    if not categories:
+        return
+    
+    st.subheader(title)
+    
+    # 집계가 같으면 이전에 만든 스펙을 그대로 사용
+    st.vega_lite_chart(charts.render_spec(charts.category_bar_chart(title, categories)), use_container_width=True)
+
 # Student Dashboard
 def student_dashboard():
-    st.title(f"학생 대시보드 - {st.session_state.users[st.session_state.username]['name']}님")
+    st.title(f"학생 대시보드 - {get_data_store().users[st.session_state.username]['name']}님")
     
     # 사이드바 - 학생 메뉴
     st.sidebar.title("학생 메뉴")
@@ -231,6 +777,9 @@ def student_dashboard():
         "메뉴 선택:",
         ["문제 풀기", "내 학습 기록", "프로필"]
     )
+    set_current_view(f"student/{menu}")
+    with st.sidebar:
+        live_updates()
     
     if menu == "문제 풀기":
         student_solve_problems()
@@ -248,14 +797,44 @@ def student_dashboard():
 def student_solve_problems():
     st.header("문제 풀기")
     
-    # 카테고리 선택
-    categories = list(set(p.get("category", "기타") for p in st.session_state.teacher_problems.values()))
+    mode = st.radio("문제 찾기:", ["추천 문제", "카테고리별", "검색"], horizontal=True, key="solve_mode")
+    
+    if mode == "추천 문제":
+        student_recommended_problems()
+        return
+    
+    # 문제 검색
+    if mode == "검색":
+        query = st.text_input("문제 검색 (영어/한국어):", key="problem_search_query")
+        if not query.strip():
+            return
+        # 풀 수 있는 문제만 (question이 없는 AI 생성 문제 세트 제외)
+        index = get_data_index()
+        results, elapsed_ms = search_documents(
+            query, kind="problem", allow=lambda doc_id: index.is_solvable(doc_id[1])
+        )
+        if not results:
+            st.info("검색 결과가 없습니다.")
+            return
+        st.caption(f"{len(results)}개 문제 ({elapsed_ms:.1f}ms)")
+        problems = get_data_store().teacher_problems
+        problem_key = st.selectbox(
+            "문제 선택:",
+            [doc_id[1] for doc_id, _ in results],
+            format_func=lambda x: f"{x} ({problems[x].get('level', '난이도 미지정')})",
+            key="search_problem_select"
+        )
+        if problem_key:
+            display_and_solve_problem(problem_key, problems[problem_key])
+        return
+    
+    # 카테고리 선택 (question이 없는 AI 생성 문제 세트는 풀 수 없으므로 제외)
+    categories = get_data_index().categories(solvable=True)
     if categories:
         selected_category = st.selectbox("카테고리 선택:", categories)
         
         # 선택된 카테고리의 문제 목록
-        category_problems = {k: v for k, v in st.session_state.teacher_problems.items() 
-                           if v.get("category") == selected_category}
+        category_problems = get_problems(category=selected_category, solvable=True)
         
         if category_problems:
             problem_key = st.selectbox(
@@ -271,16 +850,40 @@ def student_solve_problems():
     else:
         st.info("아직 등록된 문제가 없습니다. 선생님께 문의해주세요.")
 
+def student_recommended_problems():
+    """학습 이력을 바탕으로 추천된 문제 표시"""
+    recommendations = get_recommender().recommend(st.session_state.username, limit=5)
+    
+    if not recommendations:
+        st.info("추천할 문제가 없습니다. 모든 문제를 풀었거나 등록된 문제가 없습니다.")
+        return
+    
+    candidates = get_recommender().candidates
+    labels = {
+        candidate_id: f"[{reason}] {candidates[candidate_id].get('question', '')[:50]} ({candidates[candidate_id].get('level', '난이도 미지정')})"
+        for _, candidate_id, reason in recommendations
+    }
+    candidate_id = st.selectbox(
+        "추천 문제:",
+        list(labels.keys()),
+        format_func=lambda x: labels[x],
+        key="recommended_problem"
+    )
+    
+    if candidate_id:
+        source, problem_key = candidate_id
+        display_and_solve_problem(problem_key, candidates[candidate_id])
+
 def student_learning_history():
     st.header("내 학습 기록")
     
     # 로그인한 학생의 기록 가져오기
     username = st.session_state.username
-    if username not in st.session_state.student_records:
+    if username not in get_data_store().student_records:
         st.info("아직 학습 기록이 없습니다. 문제를 풀어보세요!")
         return
     
-    student_data = st.session_state.student_records[username]
+    student_data = current_view().records()
     
     # 학습 통계 표시
     st.subheader("학습 통계")
@@ -322,34 +925,7 @@ def student_learning_history():
     
     # 카테고리별 문제 분포
     if student_data["solved_problems"]:
-        st.subheader("카테고리별 학습 분포")
-        
-        # 카테고리별 문제 수 계산
-        categories = {}
-        for problem in student_data["solved_problems"]:
-            category = problem["problem"].get("category", "기타")
-            if category in categories:
-                categories[category] += 1
-            else:
-                categories[category] = 1
-        
-        # 데이터프레임 생성
-        df = pd.DataFrame({
-            "카테고리": list(categories.keys()),
-            "문제 수": list(categories.values())
-        })
-        
-        # 차트 생성
-        chart = alt.Chart(df).mark_bar().encode(
-            x="문제 수:Q",
-            y=alt.Y("카테고리:N", sort="-x"),
-            color=alt.Color("카테고리:N", legend=None),
-            tooltip=["카테고리", "문제 수"]
-        ).properties(
-            title="카테고리별 학습 분포"
-        )
-        
-        st.altair_chart(chart, use_container_width=True)
+        category_chart_panel("카테고리별 학습 분포", student=st.session_state.username)
     
     # 최근 학습 기록
     st.subheader("최근 학습 기록")
@@ -382,7 +958,7 @@ def student_profile():
     st.header("내 프로필")
     
     username = st.session_state.username
-    user_data = st.session_state.users[username]
+    user_data = get_data_store().users[username]
     
     col1, col2 = st.columns(2)
     
@@ -412,28 +988,33 @@ def student_profile():
         if st.button("비밀번호 변경"):
             if not current_password or not new_password or not confirm_password:
                 st.error("모든 필드를 입력해주세요.")
-            elif hash_password(current_password) != user_data["password"]:
+            elif not verify_password(current_password, user_data["password"]):
                 st.error("현재 비밀번호가 올바르지 않습니다.")
             elif new_password != confirm_password:
                 st.error("새 비밀번호와 확인이 일치하지 않습니다.")
             elif len(new_password) < 6:
                 st.error("비밀번호는 최소 6자 이상이어야 합니다.")
             else:
-                st.session_state.users[username]["password"] = hash_password(new_password)
+                update_user(username, password=hash_password(new_password))
+                # 다른 기기의 로그인은 종료하고 현재 세션만 유지
+                revoke_user_sessions(username, keep_current=True)
                 save_users_data()
                 st.success("비밀번호가 성공적으로 변경되었습니다.")
 
 # Teacher Dashboard
 def teacher_dashboard():
-    st.title(f"교사 대시보드 - {st.session_state.users[st.session_state.username]['name']}님")
+    st.title(f"교사 대시보드 - {get_data_store().users[st.session_state.username]['name']}님")
     
     # 사이드바 - 교사 메뉴
     st.sidebar.title("교사 메뉴")
     
     menu = st.sidebar.radio(
         "메뉴 선택:",
-        ["문제 관리", "학생 관리", "채점 및 첨삭", "프로필"]
+        ["문제 관리", "학생 관리", "채점 및 첨삭", "검색", "프로필"]
     )
+    set_current_view(f"teacher/{menu}")
+    with st.sidebar:
+        live_updates()
     
     if menu == "문제 관리":
         teacher_problem_management()
@@ -441,6 +1022,8 @@ def teacher_dashboard():
         teacher_student_management()
     elif menu == "채점 및 첨삭":
         teacher_grading()
+    elif menu == "검색":
+        teacher_search()
     elif menu == "프로필":
         teacher_profile()
     
@@ -459,9 +1042,6 @@ def check_api_key():
 def save_generated_problems(problems, school_type, grade, topic, difficulty):
     """생성된 문제를 저장하는 함수"""
     try:
-        if 'teacher_problems' not in st.session_state:
-            st.session_state.teacher_problems = {}
-        
         # 문제 데이터 구조화
         problem_data = {
             "school_type": school_type,
@@ -473,12 +1053,14 @@ def save_generated_problems(problems, school_type, grade, topic, difficulty):
             "created_by": st.session_state.username,
             "status": "approved"
         }
+        if st.session_state.get("last_generation_llm"):
+            problem_data["llm"] = st.session_state.last_generation_llm
         
         # 고유한 키 생성
         problem_key = f"{school_type}_{grade}_{topic}_{difficulty}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
         
         # 문제 저장
-        st.session_state.teacher_problems[problem_key] = problem_data
+        add_problem(problem_key, problem_data)
         
         # 데이터 저장
         if save_users_data():
@@ -645,20 +1227,33 @@ D.
                     
                     # OpenAI GPT 사용
                     if model_choice == "OpenAI GPT" and st.session_state.get('openai_api_key'):
-                        client = openai.OpenAI(api_key=st.session_state.openai_api_key)
-                        response = client.chat.completions.create(
-                            model="gpt-3.5-turbo",
-                            messages=[{"role": "user", "content": base_prompt}],
-                            temperature=0.7,
-                            max_tokens=3000
+                        model_name = settings().openai_model
+                        with instrumentation.timer("llm.generation"), llm_slot(), \
+                                metrics.llm_call("openai", model_name, "generation") as call:
+                            started = time.perf_counter()
+                            response = openai_client(call).chat.completions.create(
+                                model=model_name,
+                                messages=[{"role": "user", "content": base_prompt}],
+                                temperature=0.7,
+                                max_tokens=3000
+                            )
+                        st.session_state.last_generation_llm = llm_call_info(
+                            "openai", model_name, "generation", started, response, call
                         )
                         problems = response.choices[0].message.content
                     
                     # Google Gemini 사용
                     elif model_choice == "Google Gemini" and st.session_state.get('gemini_api_key'):
                         genai.configure(api_key=st.session_state.gemini_api_key)
-                        model = genai.GenerativeModel('gemini-pro')
-                        response = model.generate_content(base_prompt)
+                        model_name = settings().gemini_model
+                        model = genai.GenerativeModel(model_name)
+                        with instrumentation.timer("llm.generation"), llm_slot(), \
+                                metrics.llm_call("gemini", model_name, "generation") as call:
+                            started = time.perf_counter()
+                            response = model.generate_content(base_prompt)
+                        st.session_state.last_generation_llm = llm_call_info(
+                            "gemini", model_name, "generation", started, response, call
+                        )
                         if response and hasattr(response, 'text'):
                             problems = response.text
                         else:
@@ -716,19 +1311,12 @@ def teacher_problem_management():
     with tab1:
         st.subheader("출제한 문제 목록")
         
-        teacher_problems = st.session_state.teacher_problems
+        teacher_problems = get_data_store().teacher_problems
         if not teacher_problems:
             st.info("아직 출제한 문제가 없습니다. 다른 탭에서 문제를 출제해보세요.")
         else:
-            # 카테고리별로 정렬
-            categories = {}
-            for key, problem in teacher_problems.items():
-                # 현재 교사가 출제한 문제만 표시
-                if problem.get("created_by") == st.session_state.username:
-                    category = problem.get("category", "기타")
-                    if category not in categories:
-                        categories[category] = []
-                    categories[category].append(key)
+            # 현재 교사가 출제한 문제의 카테고리
+            categories = get_data_index().categories(created_by=st.session_state.username)
             
             if not categories:
                 st.info("아직 출제한 문제가 없습니다. 다른 탭에서 문제를 출제해보세요.")
@@ -736,23 +1324,39 @@ def teacher_problem_management():
                 # 카테고리 선택
                 selected_category = st.selectbox(
                     "카테고리:",
-                    list(categories.keys()),
+                    categories,
                     key="view_category"
                 )
                 
                 # 선택된 카테고리의 문제 목록
                 if selected_category:
-                    for key in categories[selected_category]:
+                    keys = get_data_index().problems(
+                        created_by=st.session_state.username,
+                        category=selected_category
+                    )
+                    sort_order = st.radio(
+                        "정렬:",
+                        ["최근 등록순", "오래된 순", "이름순"],
+                        horizontal=True,
+                        key="view_problem_sort"
+                    )
+                    if sort_order == "이름순":
+                        keys = sorted(keys)
+                    else:
+                        keys = sort_keys(keys, teacher_problems, "created_at", reverse=sort_order == "최근 등록순")
+                    
+                    # 현재 페이지의 문제만 표시
+                    page = render_pager("teacher_problems", keys)
+                    for key in page.keys:
                         problem = teacher_problems[key]
                         with st.expander(f"{key.split('/')[-1] if '/' in key else key}"):
-                            st.write(f"**문제:** {problem['question']}")
-                            st.write(f"**맥락:** {problem['context']}")
+                            st.write(f"**문제:** {problem.get('question', problem.get('content', ''))}")
+                            st.write(f"**맥락:** {problem.get('context', '')}")
                             if 'example' in problem and problem['example']:
                                 st.write(f"**예시 답안:** {problem['example']}")
                             
                             if st.button(f"삭제: {key}", key=f"delete_{key}"):
-                                if key in st.session_state.teacher_problems:
-                                    del st.session_state.teacher_problems[key]
+                                if delete_problem(key):
                                     save_users_data()
                                     st.success(f"문제 '{key}'가 삭제되었습니다.")
                                     st.rerun()
@@ -808,7 +1412,7 @@ def teacher_problem_management():
                 problem_key = f"{custom_category}/{custom_name}"
                 
                 # 중복 확인
-                if problem_key in st.session_state.teacher_problems:
+                if problem_key in get_data_store().teacher_problems:
                     st.error(f"동일한 카테고리와 이름의 문제가 이미 존재합니다: {problem_key}")
                 else:
                     # 문제 저장
@@ -828,7 +1432,7 @@ def teacher_problem_management():
                     else:
                         problem_data["example"] = custom_example
                     
-                    st.session_state.teacher_problems[problem_key] = problem_data
+                    add_problem(problem_key, problem_data)
                     save_users_data()
                     st.success(f"문제 '{custom_name}'이(가) 저장되었습니다.")
     
@@ -861,62 +1465,54 @@ def teacher_problem_management():
         
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
+                # 같은 파일은 한 번만 검증하고 결과를 재사용
+                upload_id = f"{uploaded_file.name}:{uploaded_file.size}"
+                pending = st.session_state.get("csv_import_pending")
                 
-                # 필수 열 확인
-                required_columns = ["name", "category", "question", "context"]
-                missing_columns = [col for col in required_columns if col not in df.columns]
+                if pending is None or pending["upload_id"] != upload_id:
+                    missing_columns = csv_import.missing_columns(uploaded_file)
+                    if missing_columns:
+                        st.error(f"CSV 파일에 필수 열이 누락되었습니다: {', '.join(missing_columns)}")
+                        pending = None
+                    else:
+                        progress_bar = st.progress(0.0, text="CSV 파일 검증 중...")
+                        result = csv_import.validate_csv(
+                            uploaded_file,
+                            get_data_store().teacher_problems.keys(),
+                            st.session_state.username,
+                            progress=lambda ratio: progress_bar.progress(ratio, text=f"CSV 파일 검증 중... {ratio:.0%}")
+                        )
+                        progress_bar.empty()
+                        pending = {"upload_id": upload_id, "result": result}
+                    st.session_state.csv_import_pending = pending
                 
-                if missing_columns:
-                    st.error(f"CSV 파일에 필수 열이 누락되었습니다: {', '.join(missing_columns)}")
-                else:
-                    # 업로드된 문제 미리보기
+                if pending is not None:
+                    result = pending["result"]
+                    
+                    # 업로드된 문제 미리보기 (표본)
                     st.subheader("업로드된 문제 미리보기")
-                    st.dataframe(df)
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("전체 행 수", result.total_rows)
+                    with col2:
+                        st.metric("저장할 문제 수", len(result.problems))
+                    with col3:
+                        st.metric("건너뛸 행 수", result.skipped)
+                    if result.preview is not None:
+                        st.caption(f"전체 중 {len(result.preview)}개 행 표본")
+                        st.dataframe(result.preview, use_container_width=True)
                     
                     if st.button("문제 저장하기", key="csv_save"):
-                        imported_count = 0
-                        skipped_count = 0
-                        
-                        for _, row in df.iterrows():
-                            try:
-                                name = str(row["name"]).strip()
-                                category = str(row["category"]).strip()
-                                question = str(row["question"]).strip()
-                                context = str(row["context"]).strip()
-                                example = str(row["example"]).strip() if "example" in row and not pd.isna(row["example"]) else ""
-                                level = str(row["level"]).strip() if "level" in row and not pd.isna(row["level"]) else "초급(중)"
-                                
-                                # 필수 필드 확인
-                                if not name or not category or not question or not context:
-                                    skipped_count += 1
-                                    continue
-                                
-                                problem_key = f"{category}/{name}"
-                                
-                                # 중복 확인
-                                if problem_key in st.session_state.teacher_problems:
-                                    skipped_count += 1
-                                    continue
-                                
-                                # 문제 저장
-                                st.session_state.teacher_problems[problem_key] = {
-                                    "category": category,
-                                    "question": question,
-                                    "context": context,
-                                    "example": example,
-                                    "level": level,
-                                    "created_by": st.session_state.username,
-                                    "created_at": datetime.datetime.now().isoformat()
-                                }
-                                
-                                imported_count += 1
-                            
-                            except Exception as e:
-                                skipped_count += 1
-                        
+                        # 검증 이후 추가된 문제와의 중복 제외 후 한 번에 저장
+                        problems = {
+                            key: problem for key, problem in result.problems.items()
+                            if key not in get_data_store().teacher_problems
+                        }
+                        add_problems(problems)
                         save_users_data()
-                        st.success(f"{imported_count}개의 문제가 성공적으로 저장되었습니다. {skipped_count}개의 문제가 건너뛰어졌습니다.")
+                        skipped_count = result.skipped + len(result.problems) - len(problems)
+                        st.session_state.pop("csv_import_pending", None)
+                        st.success(f"{len(problems)}개의 문제가 성공적으로 저장되었습니다. {skipped_count}개의 문제가 건너뛰어졌습니다.")
             
             except Exception as e:
                 st.error(f"CSV 파일 처리 중 오류가 발생했습니다: {e}")
@@ -928,7 +1524,7 @@ def teacher_problem_management():
 def teacher_student_management():
     st.header("학생 관리")
     
-    tab1, tab2, tab3 = st.tabs(["학생 등록", "학생 목록", "학생 성적 및 진도"])
+    tab1, tab_bulk, tab2, tab3 = st.tabs(["학생 등록", "CSV 일괄 등록", "학생 목록", "학생 성적 및 진도"])
     
     # 학생 등록 탭
     with tab1:
@@ -945,7 +1541,7 @@ def teacher_student_management():
                 st.error("학생 아이디, 이름, 비밀번호는 필수 입력사항입니다.")
             elif password != confirm_password:
                 st.error("비밀번호와 비밀번호 확인이 일치하지 않습니다.")
-            elif username in st.session_state.users:
+            elif username in get_data_store().users:
                 st.error(f"이미 존재하는 아이디입니다: {username}")
             elif len(password) < 6:
                 st.error("비밀번호는 최소 6자 이상이어야 합니다.")
@@ -965,15 +1561,16 @@ def teacher_student_management():
                 else:
                     st.error(message)
     
+    # CSV 일괄 등록 탭
+    with tab_bulk:
+        teacher_bulk_registration()
+    
     # 학생 목록 탭
     with tab2:
         st.subheader("등록된 학생 목록")
         
         # 현재 교사가 등록한 학생만 필터링
-        teacher_students = {}
-        for username, user_data in st.session_state.users.items():
-            if user_data["role"] == "student" and user_data.get("created_by") == st.session_state.username:
-                teacher_students[username] = user_data
+        teacher_students = get_teacher_students(st.session_state.username)
         
         if not teacher_students:
             st.info("아직 등록한 학생이 없습니다. '학생 등록' 탭에서 학생을 추가하세요.")
@@ -987,9 +1584,7 @@ def teacher_student_management():
                     created_at = user_data.get("created_at", "")
                 
                 # 학생 기록에서 총 문제 수 가져오기
-                total_problems = 0
-                if username in st.session_state.student_records:
-                    total_problems = st.session_state.student_records[username].get("total_problems", 0)
+                total_problems = current_view().records(username).get("total_problems", 0)
                 
                 student_data.append({
                     "아이디": username,
@@ -1015,13 +1610,8 @@ def teacher_student_management():
                 confirm_delete = st.checkbox("삭제를 확인합니다")
                 
                 if st.button("선택한 학생 삭제") and confirm_delete:
-                    # 학생 삭제
-                    if selected_student in st.session_state.users:
-                        del st.session_state.users[selected_student]
-                    
-                    # 학생 기록 삭제
-                    if selected_student in st.session_state.student_records:
-                        del st.session_state.student_records[selected_student]
+                    # 학생 및 학생 기록 삭제
+                    delete_user(selected_student)
                     
                     save_users_data()
                     st.success(f"학생 '{selected_student}'이(가) 삭제되었습니다.")
@@ -1032,10 +1622,7 @@ def teacher_student_management():
         st.subheader("학생 성적 및 진도")
         
         # 현재 교사가 등록한 학생만 필터링
-        teacher_students = {}
-        for username, user_data in st.session_state.users.items():
-            if user_data["role"] == "student" and user_data.get("created_by") == st.session_state.username:
-                teacher_students[username] = user_data
+        teacher_students = get_teacher_students(st.session_state.username)
         
         if not teacher_students:
             st.info("아직 등록한 학생이 없습니다. '학생 등록' 탭에서 학생을 추가하세요.")
@@ -1052,8 +1639,8 @@ def teacher_student_management():
                 st.write(f"**학생 이름:** {teacher_students[selected_student].get('name', '')}")
                 
                 # 학생 기록 가져오기
-                if selected_student in st.session_state.student_records:
-                    student_data = st.session_state.student_records[selected_student]
+                if selected_student in get_data_store().student_records:
+                    student_data = current_view().records(selected_student)
                     
                     # 기본 통계
                     st.write(f"**총 푼 문제 수:** {student_data.get('total_problems', 0)}")
@@ -1068,32 +1655,8 @@ def teacher_student_management():
                         except:
                             st.write("**최근 활동:** 정보 없음")
                         
-                        # 카테고리별 문제 수 계산
-                        categories = {}
-                        for problem in solved_problems:
-                            category = problem["problem"].get("category", "기타")
-                            if category in categories:
-                                categories[category] += 1
-                            else:
-                                categories[category] = 1
-                        
-                        # 차트 생성
-                        st.subheader("카테고리별 학습 분포")
-                        df = pd.DataFrame({
-                            "카테고리": list(categories.keys()),
-                            "문제 수": list(categories.values())
-                        })
-                        
-                        chart = alt.Chart(df).mark_bar().encode(
-                            x="문제 수:Q",
-                            y=alt.Y("카테고리:N", sort="-x"),
-                            color=alt.Color("카테고리:N", legend=None),
-                            tooltip=["카테고리", "문제 수"]
-                        ).properties(
-                            title="카테고리별 학습 분포"
-                        )
-                        
-                        st.altair_chart(chart, use_container_width=True)
+                        # 카테고리별 학습 분포 차트
+                        category_chart_panel("카테고리별 학습 분포", student=selected_student)
                         
                         # 주간 학습 추세
                         st.subheader("주간 학습 추세")
@@ -1122,14 +1685,8 @@ def teacher_student_management():
                             except:
                                 pass
                         
-                        # 데이터프레임 생성 (역순으로 정렬)
-                        weekly_df = pd.DataFrame({
-                            "주차": list(reversed(list(weeks_data.keys()))),
-                            "문제 수": list(reversed(list(weeks_data.values())))
-                        })
-                        
-                        # 차트 생성
-                        st.line_chart(weekly_df.set_index("주차"))
+                        # 차트 생성 (역순으로 정렬, 집계가 같으면 캐시된 데이터프레임 사용)
+                        st.line_chart(charts.series_frame("주차", "문제 수", reversed(list(weeks_data.items()))))
                         
                         # 최근 학습 기록
                         st.subheader("최근 학습 기록")
@@ -1153,129 +1710,275 @@ def teacher_student_management():
                 else:
                     st.info("이 학생의 학습 기록이 없습니다.")
 
+def teacher_bulk_registration():
+    """CSV 파일로 여러 학생을 한 번에 등록"""
+    st.subheader("CSV로 학생 일괄 등록")
+    
+    st.info("""
+    CSV 파일 형식:
+    - 첫 번째 행: 헤더 (username,name,email,password)
+    - 각 행: 한 명의 학생 (email은 선택)
+    - 비밀번호는 최소 6자 이상이어야 합니다.
+    """)
+    
+    st.download_button(
+        label="예시 CSV 다운로드",
+        data=bulk_register.EXAMPLE_CSV,
+        file_name="example_students.csv",
+        mime="text/csv"
+    )
+    
+    uploaded_file = st.file_uploader("학생 CSV 파일 업로드", type=["csv"], key="bulk_student_file")
+    
+    if uploaded_file is not None and st.button("일괄 등록", key="bulk_register"):
+        try:
+            fieldnames, rows = bulk_register.read_rows(uploaded_file)
+            missing_columns = [col for col in bulk_register.REQUIRED_COLUMNS if col not in fieldnames]
+            if missing_columns:
+                st.error(f"CSV 파일에 필수 열이 누락되었습니다: {', '.join(missing_columns)}")
+                return
+            
+            with st.spinner(f"{len(rows)}명의 학생을 등록하는 중입니다..."):
+                start = time.perf_counter()
+                result = bulk_register.prepare_registration(
+                    rows,
+                    get_data_store().users,
+                    st.session_state.username
+                )
+                # 모든 학생을 추가한 뒤 한 번만 저장 (해싱 중 다른 곳에서 등록된 아이디는 실패 처리)
+                for username in add_users(result.users):
+                    result.reject(username, "이미 존재하는 아이디입니다.")
+                if result.users and not save_users_data():
+                    return
+                for row in result.rows:
+                    if row["status"] == "등록":
+                        row["message"] = "등록 완료"
+                elapsed = time.perf_counter() - start
+            
+            st.session_state.bulk_register_result = result
+            st.success(f"{result.registered}명 등록, {result.failed}명 실패 ({elapsed:.1f}초)")
+        except Exception as e:
+            st.error(f"학생 일괄 등록 중 오류가 발생했습니다: {e}")
+    
+    result = st.session_state.get("bulk_register_result")
+    if result is not None:
+        st.dataframe(pd.DataFrame(result.rows), use_container_width=True)
+        st.download_button(
+            label="등록 결과 다운로드",
+            data=result.to_csv(),
+            file_name="student_registration_result.csv",
+            mime="text/csv"
+        )
+
 def teacher_grading():
     st.header("채점 및 첨삭")
     
     st.info("이 섹션에서는 학생들의 답변을 직접 채점하고 첨삭할 수 있습니다.")
     
-    # 채점할 학생 선택
-    teacher_students = {}
-    for username, user_data in st.session_state.users.items():
-        if user_data["role"] == "student" and user_data.get("created_by") == st.session_state.username:
-            teacher_students[username] = user_data
+    notice = st.session_state.pop("grading_notice", None)
+    if notice:
+        st.success(notice)
+    
+    teacher = st.session_state.username
+    teacher_students = get_teacher_students(teacher)
     
     if not teacher_students:
         st.warning("아직 등록한 학생이 없습니다. '학생 관리' 메뉴에서 학생을 추가하세요.")
-    else:
-        selected_student = st.selectbox(
-            "학생 선택:",
-            list(teacher_students.keys()),
-            format_func=lambda x: f"{x} ({teacher_students[x].get('name', '')})",
+        return
+    
+    queue = get_grading_queue()
+    counts = queue.counts(teacher)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("미채점 답변", counts[UNGRADED])
+    with col2:
+        st.metric("채점 완료 답변", counts[GRADED])
+    
+    # 상태/학생 필터
+    col1, col2 = st.columns(2)
+    with col1:
+        status_filter = st.radio("상태:", ["미채점", "채점 완료", "전체"], horizontal=True, key="grading_status")
+    with col2:
+        student_filter = st.selectbox(
+            "학생:",
+            ["전체"] + list(teacher_students.keys()),
+            format_func=lambda x: x if x == "전체" else f"{x} ({teacher_students[x].get('name', '')})",
             key="grading_student"
         )
+    
+    status = {"미채점": UNGRADED, "채점 완료": GRADED}.get(status_filter)
+    keys = queue.items(teacher, status=status, student=None if student_filter == "전체" else student_filter)
+    
+    if not keys:
+        st.info("표시할 수 있는 답변이 없습니다.")
+        return
+    
+    # 답변 목록 (현재 페이지만)
+    st.subheader("채점할 답변 선택")
+    page = render_pager("grading_queue", keys)
+    view = current_view()
+    
+    def answer_label(key):
+        student, index = key
+        submission = view.submission(student, index)
+        return f"{teacher_students.get(student, {}).get('name', student)} - {submission['problem'].get('question', '')[:30]}... ({format_timestamp(submission.get('timestamp', ''))})"
+    
+    answer_data = []
+    for student, index in page.keys:
+        submission = view.submission(student, index)
+        answer_data.append({
+            "학생": teacher_students.get(student, {}).get("name", student),
+            "문제": submission["problem"].get("question", "")[:30] + "...",
+            "제출일시": format_timestamp(submission.get("timestamp", "")),
+            "카테고리": submission["problem"].get("category", "기타"),
+            "교사 채점": "완료" if queue.status_of(student, index) == GRADED else "미완료"
+        })
+    st.dataframe(pd.DataFrame(answer_data), use_container_width=True)
+    
+    # 다음 미채점 답변으로 이동
+    current = st.session_state.get("grading_current")
+    if current is not None:
+        current = tuple(current)
+    if st.button("다음 미채점 답변 →"):
+        next_key = queue.next_ungraded(teacher, after=current)
+        if next_key is None:
+            st.info("채점할 답변이 없습니다.")
+        else:
+            st.session_state.grading_current = next_key
+            st.rerun()
+    
+    options = list(page.keys)
+    if current is not None and current not in options and queue.status_of(*current) is not None:
+        options.insert(0, current)
+    selected_key = st.selectbox(
+        "채점할 답변을 선택하세요:",
+        options=options,
+        index=options.index(current) if current in options else 0,
+        format_func=answer_label
+    )
+    st.session_state.grading_current = selected_key
+    
+    if selected_key is not None:
+        grading_editor(teacher, selected_key)
+
+@timed_fragment("grading_editor")
+def grading_editor(teacher, selected_key):
+    """선택한 답변의 채점 편집기 (입력 중에는 이 부분만 다시 실행)"""
+    queue = get_grading_queue()
+    selected_student, selected_answer_index = selected_key
+    item = get_grading_item(selected_key)
+    
+    st.markdown("---")
+    st.subheader("학생 답변 채점")
+    st.write(f"**학생:** {item['student_name']} ({item['timestamp']})")
+    
+    # 문제 및 답변 표시
+    st.write("**문제:**")
+    st.write(item["question"])
+    
+    st.write("**맥락:**")
+    st.write(item["context"])
+    
+    st.write("**학생 답변:**")
+    st.write(item["answer"])
+    
+    # AI 첨삭 결과 표시
+    with st.expander("AI 첨삭 결과 보기"):
+        st.markdown(item["feedback"])
+    
+    # 교사 첨삭 입력
+    st.subheader("교사 첨삭")
+    
+    # 이전 교사 첨삭이 있으면 표시
+    previous_score = item["teacher_score"]
+    
+    teacher_feedback = st.text_area(
+        "첨삭 내용을 입력하세요:",
+        value=item["teacher_feedback"],
+        height=200,
+        key=f"grading_feedback_{selected_student}_{selected_answer_index}"
+    )
+    
+    teacher_score = st.slider(
+        "점수 (0-100):",
+        0, 100, previous_score if previous_score else 70,
+        key=f"grading_score_{selected_student}_{selected_answer_index}"
+    )
+    
+    advance = st.checkbox("저장 후 다음 미채점 답변으로 이동", value=True, key="grading_advance")
+    
+    # 교사가 현재 답변을 채점하는 동안 다음 답변을 미리 준비
+    prefetch_grading_item(queue.next_ungraded(teacher, after=selected_key))
+    
+    if st.button("채점 저장"):
+        # 교사 첨삭 정보 저장
+        save_grade(
+            selected_student,
+            selected_answer_index,
+            teacher_feedback,
+            teacher_score,
+            teacher
+        )
         
-        if selected_student:
-            st.write(f"**선택한 학생:** {teacher_students[selected_student].get('name', '')}")
-            
-            # 학생 기록 가져오기
-            if selected_student in st.session_state.student_records:
-                student_data = st.session_state.student_records[selected_student]
-                solved_problems = student_data.get("solved_problems", [])
-                
-                if not solved_problems:
-                    st.info("이 학생은 아직 문제를 풀지 않았습니다.")
-                else:
-                    # 답변 목록 표시
-                    st.subheader("채점할 답변 선택")
-                    
-                    # 답변 데이터 준비
-                    answer_data = []
-                    for i, problem in enumerate(solved_problems):
-                        try:
-                            timestamp = datetime.datetime.fromisoformat(problem.get("timestamp", "")).strftime("%Y-%m-%d %H:%M")
-                            
-                            # 교사 채점 여부 확인
-                            has_teacher_feedback = "teacher_feedback" in problem
-                            
-                            answer_data.append({
-                                "index": i,
-                                "문제": problem["problem"]["question"][:30] + "...",
-                                "제출일시": timestamp,
-                                "카테고리": problem["problem"].get("category", "기타"),
-                                "교사 채점": "완료" if has_teacher_feedback else "미완료"
-                            })
-                        except:
-                            pass
-                    
-                    if not answer_data:
-                        st.info("표시할 수 있는 답변이 없습니다.")
-                    else:
-                        # 데이터프레임으로 표시
-                        df = pd.DataFrame(answer_data)
-                        st.dataframe(df.drop(columns=["index"]), use_container_width=True)
-                        
-                        # 채점할 답변 선택
-                        selected_answer_index = st.selectbox(
-                            "채점할 답변을 선택하세요:",
-                            options=df["index"].tolist(),
-                            format_func=lambda x: f"{df[df['index']==x]['문제'].iloc[0]} ({df[df['index']==x]['제출일시'].iloc[0]})"
-                        )
-                        
-                        if selected_answer_index is not None:
-                            problem = solved_problems[selected_answer_index]
-                            
-                            st.markdown("---")
-                            st.subheader("학생 답변 채점")
-                            
-                            # 문제 및 답변 표시
-                            st.write("**문제:**")
-                            st.write(problem["problem"]["question"])
-                            
-                            st.write("**맥락:**")
-                            st.write(problem["problem"]["context"])
-                            
-                            st.write("**학생 답변:**")
-                            st.write(problem["answer"])
-                            
-                            # AI 첨삭 결과 표시
-                            with st.expander("AI 첨삭 결과 보기"):
-                                st.markdown(problem["feedback"])
-                            
-                            # 교사 첨삭 입력
-                            st.subheader("교사 첨삭")
-                            
-                            # 이전 교사 첨삭이 있으면 표시
-                            previous_feedback = problem.get("teacher_feedback", "")
-                            previous_score = problem.get("teacher_score", 0)
-                            
-                            teacher_feedback = st.text_area(
-                                "첨삭 내용을 입력하세요:",
-                                value=previous_feedback,
-                                height=200
-                            )
-                            
-                            teacher_score = st.slider(
-                                "점수 (0-100):",
-                                0, 100, previous_score if previous_score else 70
-                            )
-                            
-                            if st.button("채점 저장"):
-                                # 교사 첨삭 정보 저장
-                                st.session_state.student_records[selected_student]["solved_problems"][selected_answer_index]["teacher_feedback"] = teacher_feedback
-                                st.session_state.student_records[selected_student]["solved_problems"][selected_answer_index]["teacher_score"] = teacher_score
-                                st.session_state.student_records[selected_student]["solved_problems"][selected_answer_index]["graded_by"] = st.session_state.username
-                                st.session_state.student_records[selected_student]["solved_problems"][selected_answer_index]["graded_at"] = datetime.datetime.now().isoformat()
-                                
-                                save_users_data()
-                                st.success("채점이 저장되었습니다.")
-            else:
-                st.info("이 학생의 학습 기록이 없습니다.")
+        save_users_data()
+        
+        if advance:
+            next_key = queue.next_ungraded(teacher, after=selected_key)
+            if next_key is not None:
+                st.session_state.grading_current = next_key
+        
+        # 목록과 집계가 바뀌었으므로 화면 전체를 다시 실행
+        st.session_state.grading_notice = "채점이 저장되었습니다."
+        st.rerun()
+
+def teacher_search():
+    st.header("검색")
+    
+    st.info("문제 은행과 학생 답변/첨삭 기록을 영어 또는 한국어로 검색할 수 있습니다.")
+    
+    scope = st.radio("검색 대상:", ["문제", "학생 답변 및 첨삭"], horizontal=True)
+    query = st.text_input("검색어:", key="teacher_search_query")
+    
+    if not query.strip():
+        return
+    
+    if scope == "문제":
+        results, elapsed_ms = search_documents(query, kind="problem", limit=50)
+        st.caption(f"{len(results)}개 결과 ({elapsed_ms:.1f}ms)")
+        
+        for doc_id, score in results:
+            key = doc_id[1]
+            problem = get_data_store().teacher_problems[key]
+            with st.expander(f"{key} (점수 {score:.2f})"):
+                st.write(f"**작성자:** {problem.get('created_by', '')}")
+                st.write(snippet(problem.get('question') or problem.get('content', ''), query, 200))
+    else:
+        # 현재 교사가 등록한 학생의 답변만 검색
+        my_students = set(get_data_index().students_of(st.session_state.username))
+        results, elapsed_ms = search_documents(
+            query,
+            kind="submission",
+            allow=lambda doc_id: doc_id[1] in my_students,
+            limit=50
+        )
+        st.caption(f"{len(results)}개 결과 ({elapsed_ms:.1f}ms)")
+        
+        for doc_id, score in results:
+            _, student, index = doc_id
+            submission = current_view().submission(student, index)
+            student_name = get_data_store().users.get(student, {}).get("name", student)
+            with st.expander(f"{student_name} - {submission['problem'].get('question', '')[:40]}... (점수 {score:.2f})"):
+                st.write(f"**답변:** {snippet(submission.get('answer', ''), query, 200)}")
+                st.write(f"**첨삭:** {snippet(submission.get('feedback', ''), query, 200)}")
+                if submission.get("teacher_feedback"):
+                    st.write(f"**교사 첨삭:** {snippet(submission['teacher_feedback'], query, 200)}")
 
 def teacher_profile():
     st.header("내 프로필")
     
     username = st.session_state.username
-    user_data = st.session_state.users[username]
+    user_data = get_data_store().users[username]
     
     col1, col2 = st.columns(2)
     
@@ -1296,24 +1999,18 @@ def teacher_profile():
         st.subheader("교사 활동 통계")
         
         # 출제한 문제 수
-        problem_count = 0
-        for problem in st.session_state.teacher_problems.values():
-            if problem.get("created_by") == username:
-                problem_count += 1
+        problem_count = get_data_index().count_problems(username)
         
         st.write(f"**출제한 문제 수:** {problem_count}")
         
         # 등록한 학생 수
-        student_count = 0
-        for student in st.session_state.users.values():
-            if student.get("role") == "student" and student.get("created_by") == username:
-                student_count += 1
+        student_count = len(get_data_index().students_of(username))
         
         st.write(f"**등록한 학생 수:** {student_count}")
         
         # 채점한 답변 수
         graded_count = 0
-        for student_id, student_record in st.session_state.student_records.items():
+        for student_id, student_record in get_data_store().student_records.items():
             for problem in student_record.get("solved_problems", []):
                 if problem.get("graded_by") == username:
                     graded_count += 1
@@ -1330,20 +2027,22 @@ def teacher_profile():
         if st.button("비밀번호 변경"):
             if not current_password or not new_password or not confirm_password:
                 st.error("모든 필드를 입력해주세요.")
-            elif hash_password(current_password) != user_data["password"]:
+            elif not verify_password(current_password, user_data["password"]):
                 st.error("현재 비밀번호가 올바르지 않습니다.")
             elif new_password != confirm_password:
                 st.error("새 비밀번호와 확인이 일치하지 않습니다.")
             elif len(new_password) < 6:
                 st.error("비밀번호는 최소 6자 이상이어야 합니다.")
             else:
-                st.session_state.users[username]["password"] = hash_password(new_password)
+                update_user(username, password=hash_password(new_password))
+                # 다른 기기의 로그인은 종료하고 현재 세션만 유지
+                revoke_user_sessions(username, keep_current=True)
                 save_users_data()
                 st.success("비밀번호가 성공적으로 변경되었습니다.")
 
 # Admin Dashboard
 def admin_dashboard():
-    st.title(f"관리자 대시보드 - {st.session_state.users[st.session_state.username]['name']}님")
+    st.title(f"관리자 대시보드 - {get_data_store().users[st.session_state.username]['name']}님")
     
     # 사이드바 - 관리자 메뉴
     st.sidebar.title("관리자 메뉴")
@@ -1352,6 +2051,7 @@ def admin_dashboard():
         "메뉴 선택:",
         ["API 키 설정", "사용자 관리", "백업 및 복원", "시스템 정보"]
     )
+    set_current_view(f"admin/{menu}")
     
     if menu == "API 키 설정":
         admin_api_settings()
@@ -1379,8 +2079,9 @@ def admin_api_settings():
     
     with col1:
         if st.button("API 키 유지하기"):
-            st.session_state.openai_api_key = os.getenv("OPENAI_API_KEY", "")
-            st.session_state.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
+            current = get_config().reload()
+            st.session_state.openai_api_key = current.openai_api_key
+            st.session_state.gemini_api_key = current.gemini_api_key
             st.success("API 키가 환경 변수에서 다시 로드되었습니다.")
     
     with col2:
@@ -1388,9 +2089,7 @@ def admin_api_settings():
             st.session_state.openai_api_key = ""
             st.session_state.gemini_api_key = ""
             try:
-                with open(".env", "w") as f:
-                    f.write("OPENAI_API_KEY=\n")
-                    f.write("GEMINI_API_KEY=\n")
+                get_config().update({"OPENAI_API_KEY": "", "GEMINI_API_KEY": ""})
                 st.success("API 키가 초기화되었습니다.")
             except Exception as e:
                 st.error(f"API 키 초기화 중 오류가 발생했습니다: {e}")
@@ -1407,12 +2106,9 @@ def admin_api_settings():
     
     if st.button("OpenAI API 키 저장"):
         st.session_state.openai_api_key = openai_api_key.strip()
-        # .env 파일에 저장
+        # .env 파일에 저장 (다른 설정은 그대로 유지)
         try:
-            with open(".env", "w") as f:
-                f.write(f"OPENAI_API_KEY={openai_api_key.strip()}\n")
-                if st.session_state.gemini_api_key:
-                    f.write(f"GEMINI_API_KEY={st.session_state.gemini_api_key}\n")
+            get_config().update({"OPENAI_API_KEY": openai_api_key.strip()})
             st.success("OpenAI API 키가 저장되었습니다.")
         except Exception as e:
             st.error(f"API 키 저장 중 오류가 발생했습니다: {e}")
@@ -1429,12 +2125,9 @@ def admin_api_settings():
     
     if st.button("Gemini API 키 저장"):
         st.session_state.gemini_api_key = gemini_api_key.strip()
-        # .env 파일에 저장
+        # .env 파일에 저장 (다른 설정은 그대로 유지)
         try:
-            with open(".env", "w") as f:
-                if st.session_state.openai_api_key:
-                    f.write(f"OPENAI_API_KEY={st.session_state.openai_api_key}\n")
-                f.write(f"GEMINI_API_KEY={gemini_api_key.strip()}\n")
+            get_config().update({"GEMINI_API_KEY": gemini_api_key.strip()})
             st.success("Gemini API 키가 저장되었습니다.")
             # Gemini API 초기화
             if gemini_api_key.strip():
@@ -1456,9 +2149,9 @@ def admin_api_settings():
             else:
                 try:
                     with st.spinner("OpenAI API 연결 테스트 중..."):
-                        client = openai.OpenAI(api_key=st.session_state.openai_api_key)
+                        client = openai_client()
                         response = client.chat.completions.create(
-                            model="gpt-3.5-turbo",
+                            model=settings().openai_model,
                             messages=[
                                 {"role": "system", "content": "You are a helpful assistant."},
                                 {"role": "user", "content": "Hello, can you hear me? Please respond with 'Yes, I can hear you clearly.'"}
@@ -1479,7 +2172,7 @@ def admin_api_settings():
             else:
                 try:
                     with st.spinner("Gemini API 연결 테스트 중..."):
-                        model = genai.GenerativeModel('gemini-pro')
+                        model = genai.GenerativeModel(settings().gemini_model)
                         response = model.generate_content("Hello, can you hear me? Please respond with 'Yes, I can hear you clearly.'")
                         if "I can hear you" in response.text:
                             st.success("Gemini API 연결 테스트 성공!")
@@ -1509,7 +2202,7 @@ def admin_user_management():
                 st.error("사용자 아이디, 이름, 비밀번호는 필수 입력사항입니다.")
             elif password != confirm_password:
                 st.error("비밀번호와 비밀번호 확인이 일치하지 않습니다.")
-            elif username in st.session_state.users:
+            elif username in get_data_store().users:
                 st.error(f"이미 존재하는 아이디입니다: {username}")
             elif len(password) < 6:
                 st.error("비밀번호는 최소 6자 이상이어야 합니다.")
@@ -1533,9 +2226,30 @@ def admin_user_management():
     with tab2:
         st.subheader("등록된 사용자 목록")
         
-        # 표로 보여주기
+        # 역할/검색어 필터와 정렬
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            role_filter = st.selectbox("역할 필터:", ["전체", "student", "teacher", "admin"], key="admin_user_role_filter")
+        with col2:
+            text_filter = st.text_input("아이디/이름/이메일 검색:", key="admin_user_text_filter")
+        with col3:
+            sort_field = st.selectbox(
+                "정렬 기준:",
+                ["created_at", "name", "role", "created_by"],
+                format_func=lambda x: {"created_at": "등록일", "name": "이름", "role": "역할", "created_by": "등록자"}[x],
+                key="admin_user_sort"
+            )
+        
+        users = get_data_store().users
+        keys = get_data_index().users(role=None if role_filter == "전체" else role_filter)
+        keys = filter_keys(keys, users, text_filter, ["name", "email"])
+        keys = sort_keys(keys, users, sort_field, reverse=sort_field == "created_at")
+        page = render_pager("admin_users", keys)
+        
+        # 현재 페이지만 표로 보여주기
         user_data_list = []
-        for username, user_data_item in st.session_state.users.items():
+        for username in page.keys:
+            user_data_item = users[username]
             try:
                 created_at = datetime.datetime.fromisoformat(user_data_item.get("created_at", "")).strftime("%Y-%m-%d")
             except:
@@ -1560,32 +2274,19 @@ def admin_user_management():
         st.subheader("사용자 삭제")
         selected_user = st.selectbox(
             "삭제할 사용자 선택:",
-            [username for username in st.session_state.users.keys() if username != st.session_state.username],
-            format_func=lambda x: f"{x} ({st.session_state.users[x].get('name', '')}, {st.session_state.users[x].get('role', '')})"
+            [username for username in get_data_store().users.keys() if username != st.session_state.username],
+            format_func=lambda x: f"{x} ({get_data_store().users[x].get('name', '')}, {get_data_store().users[x].get('role', '')})"
         )
         
         if selected_user:
             st.warning(f"주의: 사용자 계정을 삭제하면 모든 관련 데이터가 함께 삭제됩니다.")
-            st.info(f"삭제할 사용자: {selected_user} ({st.session_state.users[selected_user].get('name', '')})")
+            st.info(f"삭제할 사용자: {selected_user} ({get_data_store().users[selected_user].get('name', '')})")
             
             confirm_delete = st.checkbox("삭제를 확인합니다")
             
             if st.button("선택한 사용자 삭제") and confirm_delete:
-                # 사용자 삭제
-                if selected_user in st.session_state.users:
-                    selected_role = st.session_state.users[selected_user].get("role", "")
-                    del st.session_state.users[selected_user]
-                    
-                    # 역할에 따른 추가 데이터 삭제
-                    if selected_role == "student":
-                        if selected_user in st.session_state.student_records:
-                            del st.session_state.student_records[selected_user]
-                    elif selected_role == "teacher":
-                        # 교사가 출제한 문제 삭제
-                        teacher_problems = {k: v for k, v in st.session_state.teacher_problems.items() 
-                                           if v.get("created_by") != selected_user}
-                        st.session_state.teacher_problems = teacher_problems
-                    
+                # 사용자 및 역할별 관련 데이터 삭제
+                if delete_user(selected_user):
                     save_users_data()
                     st.success(f"사용자 '{selected_user}'이(가) 삭제되었습니다.")
                     st.rerun()
@@ -1596,12 +2297,12 @@ def admin_user_management():
         
         edit_user = st.selectbox(
             "수정할 사용자 선택:",
-            list(st.session_state.users.keys()),
-            format_func=lambda x: f"{x} ({st.session_state.users[x].get('name', '')}, {st.session_state.users[x].get('role', '')})"
+            list(get_data_store().users.keys()),
+            format_func=lambda x: f"{x} ({get_data_store().users[x].get('name', '')}, {get_data_store().users[x].get('role', '')})"
         )
         
         if edit_user:
-            user_data = st.session_state.users[edit_user]
+            user_data = get_data_store().users[edit_user]
             
             st.write(f"**사용자 아이디:** {edit_user}")
             
@@ -1618,8 +2319,7 @@ def admin_user_management():
             with col1:
                 if st.button("정보 수정"):
                     # 정보 수정
-                    st.session_state.users[edit_user]["name"] = edit_name
-                    st.session_state.users[edit_user]["email"] = edit_email
+                    update_user(edit_user, name=edit_name, email=edit_email)
                     
                     save_users_data()
                     st.success("사용자 정보가 수정되었습니다.")
@@ -1634,7 +2334,8 @@ def admin_user_management():
                         st.error("비밀번호는 최소 6자 이상이어야 합니다.")
                     else:
                         # 비밀번호 초기화
-                        st.session_state.users[edit_user]["password"] = hash_password(new_password)
+                        update_user(edit_user, password=hash_password(new_password))
+                        revoke_user_sessions(edit_user)
                         
                         save_users_data()
                         st.success("비밀번호가 초기화되었습니다.")
@@ -1642,226 +2343,477 @@ def admin_user_management():
 def admin_backup_restore():
     st.header("백업 및 복원")
     
-    tab1, tab2 = st.tabs(["데이터 백업", "데이터 복원"])
+    tab1, tab2, tab3, tab4 = st.tabs(["데이터 백업", "데이터 복원", "증분 백업", "분석용 내보내기"])
     
     # 데이터 백업 탭
     with tab1:
         st.subheader("현재 데이터 백업")
         
         # 백업 형식 선택
-        backup_format = st.radio("백업 형식 선택:", ["JSON", "CSV"])
+        backup_format = st.radio(
+            "백업 형식 선택:",
+            ["jsonl-zip", "json", "csv-zip"],
+            format_func=lambda x: {"jsonl-zip": "JSON Lines (ZIP, 권장)", "json": "JSON", "csv-zip": "CSV (ZIP)"}[x]
+        )
+        
+        compression = "기본"
+        if backup_format != "json":
+            compression = st.select_slider("압축 수준:", options=list(backup.COMPRESSION_LEVELS.keys()), value="기본")
         
         if st.button("백업 파일 생성"):
             try:
                 timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                st.session_state.pop("backup_file", None)
                 
-                if backup_format == "JSON":
-                    # JSON 백업 - API 키 제외
-                    users_data = {
-                        "users": st.session_state.users,
-                        "teacher_problems": st.session_state.teacher_problems,
-                        "student_records": st.session_state.student_records
-                    }
-                    # API 키 관련 데이터 제거
-                    if 'openai_api_key' in users_data:
-                        del users_data['openai_api_key']
-                    if 'gemini_api_key' in users_data:
-                        del users_data['gemini_api_key']
-                    
-                    json_str = json.dumps(users_data, ensure_ascii=False, indent=4)
-                    
-                    st.download_button(
-                        label="JSON 백업 파일 다운로드",
-                        data=json_str,
-                        file_name=f"ai_english_backup_{timestamp}.json",
-                        mime="application/json"
-                    )
-                
-                else:
-                    # CSV 백업
-                    # 사용자 데이터 (API 키 제외)
-                    users_df = pd.DataFrame([
-                        {
-                            "username": username,
-                            "name": data.get("name", ""),
-                            "email": data.get("email", ""),
-                            "role": data.get("role", ""),
-                            "password": data.get("password", ""),
-                            "created_by": data.get("created_by", ""),
-                            "created_at": data.get("created_at", "")
-                        }
-                        for username, data in st.session_state.users.items()
-                    ])
-                    
-                    # CSV 파일들을 ZIP으로 압축
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        # 사용자 데이터 저장
-                        users_csv = users_df.to_csv(index=False)
-                        zip_file.writestr('users.csv', users_csv)
-                        
-                        # 문제 데이터 저장
-                        problems_df = pd.DataFrame([
-                            {
-                                "key": key,
-                                "category": data.get("category", ""),
-                                "question": data.get("question", ""),
-                                "context": data.get("context", ""),
-                                "example": data.get("example", ""),
-                                "level": data.get("level", ""),
-                                "created_by": data.get("created_by", ""),
-                                "created_at": data.get("created_at", "")
-                            }
-                            for key, data in st.session_state.teacher_problems.items()
-                        ])
-                        problems_csv = problems_df.to_csv(index=False)
-                        zip_file.writestr('problems.csv', problems_csv)
-                        
-                        # 학생 기록 데이터 저장
-                        records_data = []
-                        for student_id, record in st.session_state.student_records.items():
-                            for problem in record.get("solved_problems", []):
-                                records_data.append({
-                                    "student_id": student_id,
-                                    "timestamp": problem.get("timestamp", ""),
-                                    "question": problem.get("problem", {}).get("question", ""),
-                                    "answer": problem.get("answer", ""),
-                                    "feedback": problem.get("feedback", ""),
-                                    "teacher_feedback": problem.get("teacher_feedback", ""),
-                                    "score": problem.get("teacher_score", "")
-                                })
-                        
-                        records_df = pd.DataFrame(records_data)
-                        records_csv = records_df.to_csv(index=False)
-                        zip_file.writestr('student_records.csv', records_csv)
-                    
-                    st.download_button(
-                        label="CSV 백업 파일 다운로드 (ZIP)",
-                        data=zip_buffer.getvalue(),
-                        file_name=f"ai_english_backup_{timestamp}.zip",
-                        mime="application/zip"
+                # API 키는 세션 상태에만 있으므로 백업에 포함되지 않음
+                with st.spinner("백업 파일을 만드는 중입니다..."):
+                    path, manifest, stats = backup.create_backup_file(
+                        backup_format,
+                        get_data_store().users,
+                        get_data_store().teacher_problems,
+                        get_data_store().student_records,
+                        compresslevel=backup.COMPRESSION_LEVELS[compression]
                     )
+                    # 임시 파일에는 비밀번호 해시까지 들어 있으므로 읽은 즉시 삭제
+                    try:
+                        with open(path, "rb") as f:
+                            data = f.read()
+                    finally:
+                        os.remove(path)
                 
+                extension = "json" if backup_format == "json" else "zip"
+                st.session_state.backup_file = {
+                    "data": data,
+                    "file_name": f"ai_english_backup_{timestamp}.{extension}",
+                    "mime": "application/json" if backup_format == "json" else "application/zip",
+                    "manifest": manifest,
+                    "stats": stats
+                }
                 st.success("백업 파일이 생성되었습니다. 다운로드 버튼을 클릭하여 저장하세요.")
             
             except Exception as e:
                 st.error(f"백업 파일 생성 중 오류가 발생했습니다: {e}")
+        
+        backup_file = st.session_state.get("backup_file")
+        if backup_file:
+            stats = backup_file["stats"]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("원본 크기", backup.format_bytes(stats["raw_bytes"]))
+            with col2:
+                st.metric("파일 크기", backup.format_bytes(stats["file_bytes"]))
+            with col3:
+                st.metric("처리 속도", f"{backup.format_bytes(stats['throughput'])}/s")
+            
+            with st.expander("매니페스트 (체크섬)"):
+                st.json(backup_file["manifest"])
+            
+            st.download_button(
+                label="백업 파일 다운로드",
+                data=backup_file["data"],
+                file_name=backup_file["file_name"],
+                mime=backup_file["mime"]
+            )
     
     # 데이터 복원 탭
     with tab2:
         st.subheader("백업 데이터 복원")
         
         st.warning("데이터 복원 시 현재 시스템의 모든 데이터가 백업 파일의 데이터로 대체됩니다.")
+        st.caption("JSON Lines (ZIP), JSON, CSV (ZIP) 백업 파일을 모두 지원합니다. 형식은 자동으로 판별됩니다.")
         
-        # 복원 형식 선택
-        restore_format = st.radio("복원 파일 형식:", ["JSON", "CSV (ZIP)"])
+        uploaded_file = st.file_uploader("백업 파일 업로드", type=["zip", "json"], key="restore_file")
         
-        if restore_format == "JSON":
-            uploaded_file = st.file_uploader("JSON 백업 파일 업로드", type=["json"])
-            
-            if uploaded_file is not None:
-                try:
-                    backup_data = json.loads(uploaded_file.getvalue().decode("utf-8"))
-                    
-                    if "users" not in backup_data or "teacher_problems" not in backup_data or "student_records" not in backup_data:
-                        st.error("유효하지 않은 백업 파일입니다. 필수 데이터 구조가 누락되었습니다.")
-                    else:
-                        st.write("백업 파일 정보:")
-                        st.write(f"- 사용자 수: {len(backup_data['users'])}")
-                        st.write(f"- 교사 문제 수: {len(backup_data['teacher_problems'])}")
-                        st.write(f"- 학생 기록 수: {len(backup_data['student_records'])}")
-                        
-                        confirm_restore = st.checkbox("복원을 확인합니다. 현재 데이터가 모두 대체됩니다.")
-                        
-                        if st.button("데이터 복원") and confirm_restore:
-                            st.session_state.users = backup_data["users"]
-                            st.session_state.teacher_problems = backup_data["teacher_problems"]
-                            st.session_state.student_records = backup_data["student_records"]
-                            
-                            save_users_data()
-                            st.success("데이터가 성공적으로 복원되었습니다.")
-                            st.info("변경 사항을 적용하려면 앱을 새로고침하세요.")
+        if uploaded_file is not None:
+            try:
+                # 같은 파일은 한 번만 파싱/검증
+                upload_id = f"{uploaded_file.name}:{uploaded_file.size}"
+                pending = st.session_state.get("restore_pending")
+                if pending is None or pending["upload_id"] != upload_id:
+                    progress_bar = st.progress(0.0, text="백업 파일을 검증하는 중...")
+                    staged = restore.stage_upload(
+                        uploaded_file,
+                        progress=lambda ratio: progress_bar.progress(ratio, text=f"백업 파일을 검증하는 중... {ratio:.0%}")
+                    )
+                    progress_bar.empty()
+                    pending = {"upload_id": upload_id, "staged": staged}
+                    st.session_state.restore_pending = pending
                 
-                except Exception as e:
-                    st.error(f"JSON 파일 처리 중 오류가 발생했습니다: {e}")
-        
-        else:
-            uploaded_file = st.file_uploader("ZIP 백업 파일 업로드", type=["zip"])
-            
-            if uploaded_file is not None:
-                try:
-                    zip_buffer = io.BytesIO(uploaded_file.getvalue())
-                    
-                    with zipfile.ZipFile(zip_buffer, 'r') as zip_file:
-                        # 사용자 데이터 복원
-                        users_df = pd.read_csv(zip_file.open('users.csv'))
-                        
-                        # 문제 데이터 복원
-                        problems_df = pd.read_csv(zip_file.open('problems.csv'))
-                        
-                        # 학생 기록 데이터 복원
-                        records_df = pd.read_csv(zip_file.open('student_records.csv'))
-                        
-                        st.write("백업 파일 정보:")
-                        st.write(f"- 사용자 수: {len(users_df)}")
-                        st.write(f"- 교사 문제 수: {len(problems_df)}")
-                        st.write(f"- 학생 기록 수: {len(records_df)}")
-                        
-                        confirm_restore = st.checkbox("복원을 확인합니다. 현재 데이터가 모두 대체됩니다.")
-                        
-                        if st.button("데이터 복원") and confirm_restore:
-                            # CSV 데이터를 원래 형식으로 변환
-                            st.session_state.users = {
-                                row['username']: {
-                                    'name': row['name'],
-                                    'email': row['email'],
-                                    'role': row['role'],
-                                    'password': row['password'],
-                                    'created_by': row['created_by'],
-                                    'created_at': row['created_at']
-                                }
-                                for _, row in users_df.iterrows()
-                            }
-                            
-                            st.session_state.teacher_problems = {
-                                row['key']: {
-                                    'category': row['category'],
-                                    'question': row['question'],
-                                    'context': row['context'],
-                                    'example': row['example'],
-                                    'level': row['level'],
-                                    'created_by': row['created_by'],
-                                    'created_at': row['created_at']
-                                }
-                                for _, row in problems_df.iterrows()
-                            }
-                            
-                            # 학생 기록 재구성
-                            st.session_state.student_records = {}
-                            for _, row in records_df.iterrows():
-                                student_id = row['student_id']
-                                if student_id not in st.session_state.student_records:
-                                    st.session_state.student_records[student_id] = {
-                                        'solved_problems': [],
-                                        'total_problems': 0
-                                    }
-                                
-                                st.session_state.student_records[student_id]['solved_problems'].append({
-                                    'timestamp': row['timestamp'],
-                                    'problem': {'question': row['question']},
-                                    'answer': row['answer'],
-                                    'feedback': row['feedback'],
-                                    'teacher_feedback': row['teacher_feedback'],
-                                    'teacher_score': row['score']
-                                })
-                                st.session_state.student_records[student_id]['total_problems'] += 1
-                            
-                            save_users_data()
-                            st.success("데이터가 성공적으로 복원되었습니다.")
-                            st.info("변경 사항을 적용하려면 앱을 새로고침하세요.")
+                staged = pending["staged"]
+                counts = staged.counts()
                 
-                except Exception as e:
-                    st.error(f"ZIP 파일 처리 중 오류가 발생했습니다: {e}")
+                st.write("백업 파일 정보:")
+                st.write(f"- 형식: {staged.source}")
+                st.write(f"- 사용자 수: {counts['users']}")
+                st.write(f"- 교사 문제 수: {counts['teacher_problems']}")
+                st.write(f"- 학생 기록 수: {counts['student_records']} (답변 {counts['submissions']}개)")
+                
+                if staged.invalid_count:
+                    st.warning(f"검증에 실패한 레코드 {staged.invalid_count}개는 복원에서 제외됩니다.")
+                    with st.expander("검증 오류 보기"):
+                        for error in staged.errors:
+                            st.write(f"- {error}")
+                
+                confirm_restore = st.checkbox("복원을 확인합니다. 현재 데이터가 모두 대체됩니다.")
+                
+                if st.button("데이터 복원") and confirm_restore:
+                    apply_restore(staged)
+                    st.session_state.pop("restore_pending", None)
+                    st.success("데이터가 성공적으로 복원되었습니다.")
+            
+            except Exception as e:
+                st.error(f"백업 파일 처리 중 오류가 발생했습니다: {e}")
+    
+    # 증분 백업 탭
+    with tab3:
+        admin_incremental_backup()
+    
+    # 분석용 내보내기 탭
+    with tab4:
+        admin_analytics_export()
+
+def apply_restore(staged):
+    """검증된 복원 데이터를 파일에 원자적으로 기록한 뒤 세션 데이터 교체"""
+    # 파일 교체가 실패하면 예외가 발생하고 현재 데이터는 그대로 유지됨
+    get_data_store().restore(lambda: restore.commit(staged))
+    rebuild_data_index()
+
+def admin_analytics_export():
+    """답변, 문제, 채점, LLM 호출 지표를 월/교사별 Parquet 파티션으로 내보내기"""
+    st.subheader("분석용 내보내기 (Parquet)")
+    
+    st.info(
+        f"'{analytics_export.ANALYTICS_DIR}/' 폴더에 테이블별로 month=YYYY-MM/teacher=아이디 파티션을 만듭니다. "
+        "변경된 파티션만 다시 쓰며, pandas에서 `pd.read_parquet('analytics/submissions')`로 바로 읽을 수 있습니다."
+    )
+    
+    previous = analytics_export.last_export()
+    if previous:
+        st.caption(f"마지막 내보내기: {format_timestamp(previous['exported_at'], '%Y-%m-%d %H:%M:%S')} · 파티션 {previous['partitions']}개")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        run_export = st.button("내보내기 (변경분)")
+    with col2:
+        run_full_export = st.button("전체 다시 쓰기")
+    
+    if run_export or run_full_export:
+        try:
+            with st.spinner("Parquet 파일을 쓰는 중입니다..."):
+                stats = analytics_export.export(
+                    get_data_store().users,
+                    get_data_store().teacher_problems,
+                    get_data_store().student_records,
+                    full=run_full_export
+                )
+            st.success(
+                f"파티션 {stats['written']}개를 썼습니다. "
+                f"(변경 없음 {stats['unchanged']}개, 삭제 {stats['removed']}개, {stats['elapsed']:.2f}초)"
+            )
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("답변", stats["rows"]["submissions"])
+            col2.metric("문제", stats["rows"]["problems"])
+            col3.metric("채점", stats["rows"]["grades"])
+            col4.metric("LLM 호출", stats["rows"]["llm_calls"])
+        except analytics_export.AnalyticsExportError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"내보내기 중 오류가 발생했습니다: {e}")
+    
+    if previous and st.button("Parquet 파일 ZIP으로 받기"):
+        path = analytics_export.write_zip()
+        try:
+            with open(path, "rb") as f:
+                st.download_button(
+                    label="분석 데이터 다운로드",
+                    data=f.read(),
+                    file_name=f"analytics_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime="application/zip"
+                )
+        finally:
+            os.remove(path)
+
+def admin_incremental_backup():
+    """기준 스냅샷과 증분 백업 체인 관리"""
+    st.subheader("증분 백업")
+    
+    st.info("마지막 백업 이후 변경된 사용자, 문제, 학생 기록만 저장합니다. 기준 스냅샷이 없으면 전체 백업을 먼저 만듭니다.")
+    
+    chain = BackupChain()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("증분 백업 생성"):
+            try:
+                with st.spinner("변경 사항을 백업하는 중입니다..."):
+                    entry = chain.create(
+                        get_data_store().users,
+                        get_data_store().teacher_problems,
+                        get_data_store().student_records
+                    )
+                if entry is None:
+                    st.info("마지막 백업 이후 변경 사항이 없습니다.")
+                else:
+                    st.success(f"백업 {entry['id']} ({'전체' if entry['type'] == 'full' else '증분'})이 생성되었습니다.")
+            except Exception as e:
+                st.error(f"백업 생성 중 오류가 발생했습니다: {e}")
+    
+    with col2:
+        if st.button("새 기준 스냅샷 생성"):
+            try:
+                with st.spinner("전체 백업을 만드는 중입니다..."):
+                    entry = chain.create(
+                        get_data_store().users,
+                        get_data_store().teacher_problems,
+                        get_data_store().student_records,
+                        full=True
+                    )
+                st.success(f"기준 스냅샷 {entry['id']}이 생성되었습니다.")
+            except Exception as e:
+                st.error(f"백업 생성 중 오류가 발생했습니다: {e}")
+    
+    entries = chain.entries()
+    if not entries:
+        st.info("아직 만든 백업이 없습니다.")
+        return
+    
+    # 백업 체인 목록
+    st.dataframe(pd.DataFrame([
+        {
+            "백업": entry["id"],
+            "유형": "전체" if entry["type"] == "full" else "증분",
+            "기준": entry["base"],
+            "생성일시": entry.get("created_at", ""),
+            "변경 레코드": sum(entry["changes"].values()),
+            "삭제": entry["deletes"],
+            "크기": backup.format_bytes(entry.get("file_bytes", 0))
+        }
+        for entry in reversed(entries)
+    ]), use_container_width=True)
+    
+    if st.button("체인 무결성 검사"):
+        with st.spinner("체크섬을 검증하는 중입니다..."):
+            problems = chain.verify()
+        if problems:
+            for problem in problems:
+                st.error(problem)
+        else:
+            st.success("모든 백업 파일과 청크의 체크섬이 일치합니다.")
+    
+    # 시점 복원
+    st.subheader("시점 복원")
+    restore_id = st.selectbox(
+        "복원할 백업 시점:",
+        [entry["id"] for entry in reversed(entries)],
+        format_func=lambda x: next(f"{e['id']} ({e.get('created_at', '')})" for e in entries if e["id"] == x)
+    )
+    confirm_restore = st.checkbox("복원을 확인합니다. 현재 데이터가 모두 대체됩니다.", key="chain_restore_confirm")
+    
+    if st.button("이 시점으로 복원", key="chain_restore") and confirm_restore:
+        try:
+            progress_bar = st.progress(0.0, text="백업 체인을 재생하는 중...")
+            users, teacher_problems, student_records = chain.restore(
+                restore_id,
+                progress=lambda ratio: progress_bar.progress(ratio, text=f"백업 체인을 재생하는 중... {ratio:.0%}")
+            )
+            apply_restore(restore.stage_data(users, teacher_problems, student_records, f"chain:{restore_id}"))
+            st.success(f"백업 {restore_id} 시점으로 복원되었습니다.")
+        except Exception as e:
+            st.error(f"복원 중 오류가 발생했습니다: {e}")
+
+def admin_startup_report():
+    """콜드 스타트와 로그인 화면 실행 시간, 지연 임포트 현황"""
+    st.subheader("시작 시간")
+    
+    report = get_startup_report()
+    col1, col2, col3 = st.columns(3)
+    first_run = report.get("first_run")
+    login_page_run = report.get("login_page")
+    with col1:
+        st.metric("첫 실행 (콜드 스타트)", f"{first_run['total_ms']:.0f} ms" if first_run else "-")
+    with col2:
+        st.metric("첫 실행 중 임포트", f"{first_run['import_ms']:.0f} ms" if first_run else "-")
+    with col3:
+        st.metric("최근 로그인 화면", f"{login_page_run['total_ms']:.0f} ms" if login_page_run else "-")
+    
+    # 전체 재실행과 프래그먼트 재실행 시간 비교
+    last_run = report.get("last_run")
+    if last_run or report["fragments"]:
+        parts = [f"전체 실행 {last_run['total_ms']:.0f} ms"] if last_run else []
+        parts += [f"{name} {elapsed:.0f} ms" for name, elapsed in report["fragments"].items()]
+        st.caption("최근 재실행 시간: " + ", ".join(parts))
+    
+    chart_stats = charts.cache_stats()
+    st.caption(
+        f"차트 캐시: {chart_stats['entries']}개 보관, 적중률 {chart_stats['hit_rate']:.0%} "
+        f"(적중 {chart_stats['hits']}, 생성 {chart_stats['misses']})"
+    )
+    
+    # 처음 사용할 때 불러온 모듈과 걸린 시간
+    if lazy.IMPORT_TIMES:
+        st.write("**지연 임포트된 모듈:** " + ", ".join(
+            f"{name} ({elapsed:.0f} ms)" for name, elapsed in sorted(lazy.IMPORT_TIMES.items(), key=lambda item: -item[1])
+        ))
+    
+    if st.button("임포트 시간 측정 (python -X importtime)"):
+        try:
+            with st.spinner("새 프로세스에서 임포트 시간을 측정하는 중입니다..."):
+                rows = lazy.measure_import_times(["streamlit", "pandas", "altair", "openai", "google.generativeai"])
+            st.dataframe(
+                pd.DataFrame(rows, columns=["모듈", "자체 (ms)", "누적 (ms)"]),
+                use_container_width=True
+            )
+        except Exception as e:
+            st.error(f"임포트 시간 측정 중 오류가 발생했습니다: {e}")
+
+def admin_performance_panel():
+    """실행별 구간 시간, 성능 오버레이 설정, 한 번의 실행 프로파일링"""
+    st.subheader("성능 진단")
+    
+    # 이 관리자 세션에만 적용 (다른 사용자의 화면에는 표시하지 않음)
+    st.session_state.timing_overlay = st.checkbox(
+        "이 세션의 모든 화면에 실행 시간 오버레이 표시 (사이드바)",
+        value=st.session_state.get("timing_overlay", False)
+    )
+    
+    # 모든 세션의 최근 실행 (느린 화면 찾기)
+    runs = instrumentation.history()
+    if runs:
+        with st.expander(f"최근 실행 {len(runs)}건", expanded=False):
+            st.dataframe(pd.DataFrame([
+                {
+                    "화면": run["label"] or "-",
+                    "시각": datetime.datetime.fromtimestamp(run["finished_at"]).strftime("%H:%M:%S"),
+                    "전체 (ms)": round(run["total_ms"], 1),
+                    "주요 구간": ", ".join(f"{name} {total:.0f}ms" for name, _, total in run["breakdown"][:3])
+                }
+                for run in runs
+            ]), use_container_width=True)
+    
+    # cProfile로 다음 실행 한 번 기록
+    if st.button("다음 실행 프로파일링"):
+        st.session_state.profile_next_run = True
+        st.rerun()
+    
+    result = st.session_state.get("profile_result")
+    if result:
+        st.caption(f"프로파일: {result['label'] or '-'} ({format_timestamp(result['created_at'], '%Y-%m-%d %H:%M:%S')})")
+        with st.expander("프로파일 결과 (누적 시간 상위 함수)"):
+            st.code(result["report"])
+        st.download_button(
+            label="프로파일 다운로드 (.prof)",
+            data=result["data"],
+            file_name=f"profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.prof",
+            mime="application/octet-stream"
+        )
+
+def admin_metrics_info():
+    """Prometheus 지표 서버 상태와 현재 지표"""
+    st.subheader("모니터링 지표")
+    
+    exporter = start_metrics_exporter()
+    if exporter["address"]:
+        st.write(f"**지표 주소:** `{exporter['address']}` (Prometheus 텍스트 형식)")
+    elif exporter["error"]:
+        st.error(f"지표 서버를 시작하지 못했습니다: {exporter['error']}")
+    else:
+        st.info("지표 서버가 꺼져 있습니다. 환경 변수 METRICS_PORT를 설정하고 앱을 다시 시작하면 /metrics를 제공합니다.")
+    
+    writer_stats = get_data_store().writer.stats()
+    st.caption(
+        f"데이터 기록 {writer_stats['writes']}회 (요청 {writer_stats['coalesced']}건은 다른 요청과 합쳐 기록), "
+        f"기록 대기 중인 저장 요청 {writer_stats['pending']}건"
+    )
+    if writer_stats["last_error"]:
+        st.error(f"마지막 데이터 기록 실패: {writer_stats['last_error']}")
+    
+    with st.expander("현재 지표 보기"):
+        st.code(metrics.render(), language="text")
+
+def admin_memory_diagnostics():
+    """프로세스 메모리, 세션별 상태 크기, tracemalloc 할당 비교"""
+    st.subheader("메모리 진단")
+    
+    current = settings()
+    record_session_memory(force=st.button("이 세션 지금 측정"))
+    registry = get_memory_registry()
+    entries = registry.entries()
+    rss = memory.process_rss()
+    state_total = sum(entry["total"] for entry in entries)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("프로세스 메모리 (RSS)", backup.format_bytes(rss))
+    with col2:
+        st.metric("측정된 세션 수", len(entries))
+    with col3:
+        st.metric("세션 상태 합계", backup.format_bytes(state_total))
+    
+    # 경고 기준 (용량 산정과 회귀 확인용)
+    if rss is not None and rss > current.memory_alert_mb * 1024 * 1024:
+        st.error(f"프로세스 메모리가 경고 기준({current.memory_alert_mb:.0f} MB)을 넘었습니다.")
+    large_sessions = [entry for entry in entries if entry["total"] > current.session_memory_alert_mb * 1024 * 1024]
+    if large_sessions:
+        st.warning(
+            f"세션 {len(large_sessions)}개의 상태가 세션당 경고 기준({current.session_memory_alert_mb:.0f} MB)을 넘었습니다."
+        )
+    
+    if entries:
+        st.caption(
+            f"세션 상태는 각 세션이 실행될 때 최대 {current.memory_sample_seconds:.0f}초마다 한 번 측정되며, "
+            f"{memory.SESSION_EXPIRY // 60}분 동안 측정되지 않은 세션은 목록에서 빠집니다."
+        )
+        now = time.time()
+        st.dataframe(pd.DataFrame([
+            {
+                "사용자": entry["username"] or "(로그인 전)",
+                "역할": entry["role"] or "-",
+                "상태 크기": backup.format_bytes(entry["total"]),
+                "큰 항목": ", ".join(
+                    f"{key} {backup.format_bytes(size)}"
+                    for key, size in sorted(entry["sizes"].items(), key=lambda item: -item[1])[:3]
+                ),
+                "측정": f"{now - entry['measured_at']:.0f}초 전"
+            }
+            for entry in entries
+        ]), use_container_width=True)
+        
+        with st.expander("가장 큰 상태 항목"):
+            st.dataframe(pd.DataFrame(
+                [(key, username, backup.format_bytes(size)) for size, username, key in registry.largest()],
+                columns=["키", "세션 사용자", "크기"]
+            ), use_container_width=True)
+    
+    # tracemalloc: 켜 둔 동안 두 번의 실행 사이에 늘어난 할당 비교
+    tracker = get_allocation_tracker()
+    if tracker.tracing:
+        traced, peak = tracker.traced_memory()
+        st.write(f"**tracemalloc 추적 중:** 현재 {backup.format_bytes(traced)}, 최대 {backup.format_bytes(peak)}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("스냅샷 찍고 이전과 비교"):
+                rows, previous_at = tracker.snapshot()
+                st.session_state.memory_snapshot = {"rows": rows, "previous_at": previous_at}
+        with col2:
+            if st.button("tracemalloc 끄기"):
+                tracker.stop()
+                st.session_state.pop("memory_snapshot", None)
+                st.rerun()
+        
+        snapshot = st.session_state.get("memory_snapshot")
+        if snapshot:
+            if snapshot["previous_at"]:
+                st.caption(f"{datetime.datetime.fromtimestamp(snapshot['previous_at']).strftime('%H:%M:%S')} 스냅샷 이후 늘어난 할당")
+            else:
+                st.caption("첫 스냅샷의 상위 할당 (다음 스냅샷부터 차이를 비교합니다)")
+            st.dataframe(pd.DataFrame(
+                [(location, backup.format_bytes(size), backup.format_bytes(diff), count)
+                 for location, size, diff, count in snapshot["rows"]],
+                columns=["위치", "크기", "증가", "블록 증가"]
+            ), use_container_width=True)
+    elif st.button("tracemalloc 켜기 (추적 중에는 실행이 느려집니다)"):
+        tracker.start()
+        st.rerun()
 
 def admin_system_info():
     st.header("시스템 정보")
@@ -1870,17 +2822,29 @@ def admin_system_info():
     st.write("**앱 이름:** AI 영어 첨삭 앱")
     st.write("**버전:** 1.0.0")
     
+    # 비밀번호 해싱 설정
+    hashing = configure_password_hashing()
+    legacy_count = sum(1 for user in get_data_store().users.values() if auth.is_legacy_hash(user.get("password")))
+    st.write(
+        f"**비밀번호 해싱:** PBKDF2-SHA256, 반복 {hashing['iterations']:,}회 "
+        f"(검증 약 {hashing['verify_ms']:.0f}ms, {'자동 측정' if hashing['calibrated'] else '환경 변수 지정'})"
+    )
+    if legacy_count:
+        st.caption(f"예전 방식(SHA-256) 비밀번호 {legacy_count}개는 해당 사용자가 다음에 로그인할 때 자동으로 변환됩니다.")
+    
+    admin_startup_report()
+    admin_performance_panel()
+    admin_metrics_info()
+    admin_memory_diagnostics()
+    
     st.subheader("사용 통계")
     
     # 사용자 통계
-    st.write(f"**총 사용자 수:** {len(st.session_state.users)}")
+    st.write(f"**총 사용자 수:** {len(get_data_store().users)}")
     
     # 역할별 사용자 수
-    role_counts = {"student": 0, "teacher": 0, "admin": 0}
-    for user in st.session_state.users.values():
-        role = user.get("role", "")
-        if role in role_counts:
-            role_counts[role] += 1
+    indexed_counts = get_data_index().role_counts()
+    role_counts = {role: indexed_counts.get(role, 0) for role in ["student", "teacher", "admin"]}
     
     col1, col2, col3 = st.columns(3)
     
@@ -1897,7 +2861,7 @@ def admin_system_info():
     st.subheader("문제 통계")
     
     total_sample_problems = len(SAMPLE_PROBLEMS)
-    total_teacher_problems = len(st.session_state.teacher_problems)
+    total_teacher_problems = len(get_data_store().teacher_problems)
     
     col1, col2 = st.columns(2)
     
@@ -1907,49 +2871,14 @@ def admin_system_info():
     with col2:
         st.metric("교사 출제 문제 수", total_teacher_problems)
     
-    # 카테고리별 문제 분포
-    categories = {}
-    
-    # 예제 문제 카테고리
-    for problem in SAMPLE_PROBLEMS.values():
-        category = problem.get("category", "기타")
-        if category in categories:
-            categories[category] += 1
-        else:
-            categories[category] = 1
-    
-    # 교사 출제 문제 카테고리
-    for problem in st.session_state.teacher_problems.values():
-        category = problem.get("category", "기타")
-        if category in categories:
-            categories[category] += 1
-        else:
-            categories[category] = 1
-    
-    if categories:
-        st.subheader("카테고리별 문제 분포")
-        
-        df = pd.DataFrame({
-            "카테고리": list(categories.keys()),
-            "문제 수": list(categories.values())
-        })
-        
-        chart = alt.Chart(df).mark_bar().encode(
-            x="문제 수:Q",
-            y=alt.Y("카테고리:N", sort="-x"),
-            color=alt.Color("카테고리:N", legend=None),
-            tooltip=["카테고리", "문제 수"]
-        ).properties(
-            title="카테고리별 문제 분포"
-        )
-        
-        st.altair_chart(chart, use_container_width=True)
+    # 카테고리별 문제 분포 (예제 문제 + 교사 출제 문제)
+    category_chart_panel("카테고리별 문제 분포")
     
     # 학습 통계
     st.subheader("학습 통계")
     
     total_solved = 0
-    for student_data in st.session_state.student_records.values():
+    for student_data in get_data_store().student_records.values():
         total_solved += student_data.get("total_problems", 0)
     
     st.metric("총 학습 문제 수", total_solved)
@@ -1960,7 +2889,7 @@ def admin_system_info():
     recent_activities = []
     
     # 최근 등록된 사용자
-    for username, user_data in st.session_state.users.items():
+    for username, user_data in get_data_store().users.items():
         if "created_at" in user_data:
             try:
                 created_at = datetime.datetime.fromisoformat(user_data["created_at"])
@@ -1973,7 +2902,7 @@ def admin_system_info():
                 pass
     
     # 최근 출제된 문제
-    for problem_key, problem in st.session_state.teacher_problems.items():
+    for problem_key, problem in get_data_store().teacher_problems.items():
         if "created_at" in problem:
             try:
                 created_at = datetime.datetime.fromisoformat(problem["created_at"])
@@ -1986,12 +2915,12 @@ def admin_system_info():
                 pass
     
     # 최근 학습 기록
-    for student_id, student_data in st.session_state.student_records.items():
+    for student_id, student_data in get_data_store().student_records.items():
         for problem in student_data.get("solved_problems", []):
             if "timestamp" in problem:
                 try:
                     timestamp = datetime.datetime.fromisoformat(problem["timestamp"])
-                    student_name = st.session_state.users.get(student_id, {}).get("name", student_id)
+                    student_name = get_data_store().users.get(student_id, {}).get("name", student_id)
                     recent_activities.append({
                         "timestamp": timestamp,
                         "activity": f"학습 완료: {student_name} - {problem['problem']['question'][:30]}...",
@@ -2010,7 +2939,7 @@ def admin_system_info():
         st.info("최근 활동 기록이 없습니다.")
 
 def view_teacher_problems():
-    if 'teacher_problems' in st.session_state and st.session_state.teacher_problems:
+    if get_data_store().teacher_problems:
         st.subheader("저장된 문제 목록")
         
         # 필터 옵션
@@ -2022,16 +2951,21 @@ def view_teacher_problems():
         with col3:
             filter_difficulty = st.selectbox("난이도 필터:", ["전체", "상", "중", "하"])
         
-        # 필터링된 문제 목록 표시
-        filtered_problems = {}
-        for key, problem in st.session_state.teacher_problems.items():
-            if (filter_school == "전체" or problem.get("school_type") == filter_school) and \
-               (filter_grade == "전체" or problem.get("grade") == filter_grade) and \
-               (filter_difficulty == "전체" or problem.get("difficulty") == filter_difficulty):
-                filtered_problems[key] = problem
-        
-        if filtered_problems:
-            for key, problem in filtered_problems.items():
+        # 필터링된 문제 키 (최근 작성순)
+        teacher_problems = get_data_store().teacher_problems
+        filtered_keys = [
+            key for key, problem in teacher_problems.items()
+            if (filter_school == "전체" or problem.get("school_type") == filter_school) and
+               (filter_grade == "전체" or problem.get("grade") == filter_grade) and
+               (filter_difficulty == "전체" or problem.get("difficulty") == filter_difficulty)
+        ]
+        filtered_keys = sort_keys(filtered_keys, teacher_problems, "created_at", reverse=True)
+        
+        if filtered_keys:
+            # 현재 페이지의 문제만 렌더링
+            page = render_pager("ai_problems", filtered_keys)
+            for key in page.keys:
+                problem = teacher_problems[key]
                 with st.expander(f"{problem.get('school_type', '')} {problem.get('grade', '')} - {problem.get('topic', '')} ({problem.get('difficulty', '')})"):
                     st.text(f"작성자: {problem.get('created_by', '')}")
                     st.text(f"작성일: {problem.get('created_at', '')}")
@@ -2049,15 +2983,14 @@ def view_teacher_problems():
                                 key=f"edit_area_{key}"
                             )
                             if st.button(f"수정 사항 저장", key=f"save_{key}"):
-                                st.session_state.teacher_problems[key]['content'] = edited_content
+                                add_problem(key, {**problem, 'content': edited_content})
                                 save_users_data()
                                 st.success("문제가 수정되었습니다.")
                                 st.rerun()
                     
                     with col2:
                         if st.button(f"삭제 ({key})", key=f"delete_{key}"):
-                            if key in st.session_state.teacher_problems:
-                                del st.session_state.teacher_problems[key]
+                            if delete_problem(key):
                                 save_users_data()
                                 st.success(f"문제가 삭제되었습니다.")
                                 st.rerun()
@@ -2066,8 +2999,9 @@ def view_teacher_problems():
     else:
         st.info("저장된 문제가 없습니다.")
 
+@timed_fragment("solve_panel")
 def display_and_solve_problem(problem_key, problem_data):
-    """문제를 표시하고 학생이 풀 수 있도록 하는 함수"""
+    """문제를 표시하고 학생이 풀 수 있도록 하는 함수 (제출 시 이 패널만 다시 실행)"""
     st.write("**문제:**")
     st.write(problem_data["question"])
     
@@ -2084,27 +3018,18 @@ def display_and_solve_problem(problem_key, problem_data):
         
         # AI 첨삭 생성
         try:
-            feedback = generate_feedback(problem_data, user_answer)
-            
-            # 학생 기록 저장
-            username = st.session_state.username
-            if username not in st.session_state.student_records:
-                st.session_state.student_records[username] = {
-                    "solved_problems": [],
-                    "total_problems": 0
-                }
+            feedback, llm_info = generate_feedback(problem_data, user_answer)
             
             # 문제 풀이 기록 추가
-            st.session_state.student_records[username]["solved_problems"].append({
+            record_submission(st.session_state.username, {
+                "problem_key": problem_key,
                 "problem": problem_data,
                 "answer": user_answer,
                 "feedback": feedback,
+                "llm": llm_info,
                 "timestamp": datetime.datetime.now().isoformat()
             })
             
-            # 총 문제 수 증가
-            st.session_state.student_records[username]["total_problems"] += 1
-            
             # 데이터 저장
             save_users_data()
             
@@ -2116,29 +3041,68 @@ def display_and_solve_problem(problem_key, problem_data):
         except Exception as e:
             st.error(f"첨삭 생성 중 오류가 발생했습니다: {str(e)}")
 
+def llm_call_info(provider, model, purpose, started, response, call=None):
+    """LLM 호출 한 번의 지표 (지연 시간, 토큰 수) - 분석용 내보내기에 기록됨
+
+    call(metrics.LLMCall)을 주면 토큰 수를 Prometheus 지표에도 더합니다.
+    """
+    info = {
+        "provider": provider,
+        "model": model,
+        "purpose": purpose,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "called_at": datetime.datetime.now().isoformat()
+    }
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        info["prompt_tokens"] = getattr(usage, "prompt_tokens", None)
+        info["completion_tokens"] = getattr(usage, "completion_tokens", None)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        info["prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+        info["completion_tokens"] = getattr(usage, "candidates_token_count", None)
+    if call is not None:
+        call.tokens(info["prompt_tokens"], info["completion_tokens"])
+    return info
+
 def generate_feedback(problem_data, user_answer):
-    """AI를 사용하여 학생의 답변에 대한 첨삭을 생성하는 함수"""
+    """AI를 사용하여 학생의 답변에 대한 첨삭을 생성하는 함수
+
+    Returns:
+        tuple: (첨삭 내용, LLM 호출 지표)
+    """
     try:
         # OpenAI API 사용 시도
         if st.session_state.openai_api_key:
-            client = openai.OpenAI(api_key=st.session_state.openai_api_key)
+            model_name = settings().openai_model
             prompt = get_correction_prompt(problem_data, user_answer)
             
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7
-            )
+            with instrumentation.timer("llm.feedback"), llm_slot(), \
+                    metrics.llm_call("openai", model_name, "feedback") as call:
+                started = time.perf_counter()
+                response = openai_client(call).chat.completions.create(
+                    model=model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7
+                )
             
-            return response.choices[0].message.content
+            info = llm_call_info("openai", model_name, "feedback", started, response, call)
+            return response.choices[0].message.content, info
         
         # Gemini API 사용 시도
         elif st.session_state.gemini_api_key:
-            model = genai.GenerativeModel('gemini-pro')
+            model_name = settings().gemini_model
+            model = genai.GenerativeModel(model_name)
             prompt = get_correction_prompt(problem_data, user_answer)
             
-            response = model.generate_content(prompt)
-            return response.text
+            with instrumentation.timer("llm.feedback"), llm_slot(), \
+                    metrics.llm_call("gemini", model_name, "feedback") as call:
+                started = time.perf_counter()
+                response = model.generate_content(prompt)
+            info = llm_call_info("gemini", model_name, "feedback", started, response, call)
+            return response.text, info
         
         else:
             raise Exception("API 키가 설정되지 않았습니다.")
@@ -2148,8 +3112,8 @@ def generate_feedback(problem_data, user_answer):
 
 # Main app function
 def main():
-    # 로그인 확인
-    if not st.session_state.logged_in:
+    # 로그인 확인 (URL의 세션 토큰이 유효하면 로그인 화면 없이 복원)
+    if not st.session_state.logged_in and not restore_session():
         login_page()
     else:
         # 역할에 따른 대시보드 표시
@@ -2163,6 +3127,74 @@ def main():
             st.error("알 수 없는 사용자 역할입니다. 관리자에게 문의하세요.")
             logout_user()
 
+def record_run_time():
+    """이번 스크립트 실행의 임포트/전체 시간 기록"""
+    report = get_startup_report()
+    run = {
+        "import_ms": (_IMPORTS_DONE - _SCRIPT_STARTED) * 1000,
+        "total_ms": (time.perf_counter() - _SCRIPT_STARTED) * 1000
+    }
+    # 첫 실행은 모듈이 아직 캐시되지 않은 콜드 스타트
+    report.setdefault("first_run", run)
+    report["last_run"] = run
+    if not st.session_state.get("logged_in"):
+        report["login_page"] = run
+
+@st.cache_resource
+def get_memory_registry():
+    """세션별 상태 크기 기록 (모든 세션 공통)"""
+    return memory.SessionMemoryRegistry(sample_interval=settings().memory_sample_seconds)
+
+@st.cache_resource
+def get_allocation_tracker():
+    return memory.AllocationTracker()
+
+def record_session_memory(force=False):
+    """이 세션의 상태 크기 측정 (MEMORY_SAMPLE_SECONDS마다 한 번)"""
+    registry = get_memory_registry()
+    if not force and not registry.due(session_id()):
+        return
+    with instrumentation.timer("memory.sample"):
+        started = time.perf_counter()
+        sizes = memory.state_sizes(st.session_state.to_dict().items())
+        registry.record(
+            session_id(),
+            st.session_state.get("username"),
+            st.session_state.get("user_role"),
+            sizes,
+            elapsed_ms=(time.perf_counter() - started) * 1000
+        )
+
+def render_timing_overlay(summary):
+    """사이드바에 이번 실행의 구간별 시간 표시"""
+    with st.sidebar.expander(f"⏱ 실행 시간 {summary['total_ms']:.0f} ms", expanded=False):
+        for name, count, total in summary["breakdown"]:
+            st.write(f"`{name}` {total:.1f} ms" + (f" ({count}회)" if count > 1 else ""))
+
+def run_app():
+    """스크립트 한 번의 실행 (요청 시 cProfile로 기록)"""
+    if st.session_state.pop("profile_next_run", False):
+        profiler = instrumentation.Profiler()
+        try:
+            with profiler:
+                main()
+        finally:
+            # st.rerun()으로 중단되어도 기록은 남김
+            st.session_state.profile_result = {
+                "label": instrumentation.current_label(),
+                "created_at": datetime.datetime.now().isoformat(),
+                "report": profiler.report(),
+                "data": profiler.dump()
+            }
+    else:
+        main()
+    mark_data_seen()
+    record_session_memory()
+    summary = instrumentation.end_run()
+    record_run_time()
+    if st.session_state.get("timing_overlay") and st.session_state.get("user_role") == "admin":
+        render_timing_overlay(summary)
+
 # Run the app
 if __name__ == "__main__":
-    main()
+    run_app()
@@ -0,0 +1,228 @@
+"""
+Password hashing helpers.
+
+Kept outside app.py so worker processes can import them without running
+the Streamlit script.
+
+Passwords are stored as salted PBKDF2-HMAC-SHA256 strings:
+
+    pbkdf2_sha256$<iterations>$<salt, base64>$<hash, base64>
+
+The iteration count is chosen by calibrate_iterations() so one
+verification takes about TARGET_VERIFY_MS on the current machine, or set
+explicitly with configure(). Older unsalted SHA-256 hex digests are still
+accepted, and needs_rehash() reports them (and hashes well below the
+current iteration count) so the caller can upgrade them on the next
+successful login. Calibration is noisy, so a hash within
+REHASH_TOLERANCE of the current setting is kept; otherwise every restart
+would rehash and save most of the user base again.
+"""
+
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# 이 개수 미만이면 프로세스 풀을 띄우는 비용이 더 크므로 순차 처리
+PARALLEL_THRESHOLD = 16
+
+ALGORITHM = "pbkdf2_sha256"
+SALT_BYTES = 16
+DEFAULT_ITERATIONS = 260000
+# 보안상 이보다 낮은 값은 쓰지 않음
+MIN_ITERATIONS = 50000
+# 로그인 한 번의 검증에 쓸 목표 시간 (밀리초)
+TARGET_VERIFY_MS = 200
+# 현재 반복 횟수의 이 비율 이상인 해시는 다시 해싱하지 않음 (측정 오차 허용)
+REHASH_TOLERANCE = 0.8
+
+# 검증 성공 결과 캐시 (같은 세션의 재확인, 재접속 시 반복 계산 방지)
+VERIFY_CACHE_SIZE = 1024
+VERIFY_CACHE_TTL = 600
+
+_settings = {"iterations": DEFAULT_ITERATIONS}
+_verify_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+# 캐시 키에만 쓰는 프로세스별 임의 키 (캐시에 비밀번호 유래 값이 그대로 남지 않도록)
+_cache_key = os.urandom(32)
+_verify_pool = None
+_pool_lock = threading.Lock()
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def is_legacy_hash(stored):
+    """예전 방식(솔트 없는 SHA-256 16진수)의 해시인지 확인"""
+    return isinstance(stored, str) and len(stored) == 64 and "$" not in stored
+
+
+def calibrate_iterations(target_ms=TARGET_VERIFY_MS, sample_iterations=20000):
+    """짧은 벤치마크로 목표 시간에 맞는 반복 횟수 계산 (1000 단위로 반올림)"""
+    salt = os.urandom(SALT_BYTES)
+    started = time.perf_counter()
+    _pbkdf2("calibration-password", salt, sample_iterations)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms <= 0:
+        return DEFAULT_ITERATIONS
+    iterations = int(sample_iterations * target_ms / elapsed_ms) // 1000 * 1000
+    return max(MIN_ITERATIONS, iterations)
+
+
+def configure(iterations=None, target_ms=None):
+    """해싱 반복 횟수 설정 (지정하지 않으면 target_ms 기준으로 측정)
+
+    Returns:
+        dict: 적용된 설정 (iterations, calibrated, verify_ms)
+    """
+    calibrated = iterations is None
+    if calibrated:
+        iterations = calibrate_iterations(target_ms or TARGET_VERIFY_MS)
+    _settings["iterations"] = max(MIN_ITERATIONS, int(iterations))
+    started = time.perf_counter()
+    _pbkdf2("calibration-password", os.urandom(SALT_BYTES), _settings["iterations"])
+    return {
+        "iterations": _settings["iterations"],
+        "calibrated": calibrated,
+        "verify_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def current_iterations():
+    return _settings["iterations"]
+
+
+def hash_password(password, iterations=None):
+    """비밀번호 해싱 함수 (솔트가 포함된 PBKDF2 문자열 반환)"""
+    iterations = iterations or _settings["iterations"]
+    salt = os.urandom(SALT_BYTES)
+    digest = _pbkdf2(password, salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def _verify(password, stored):
+    if is_legacy_hash(stored):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored)
+    try:
+        algorithm, iterations, salt, digest = stored.split("$")
+        if algorithm != ALGORITHM:
+            return False
+        expected = _unb64(digest)
+        actual = _pbkdf2(password, _unb64(salt), int(iterations))
+    except (AttributeError, ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def _cache_token(password, stored):
+    return hmac.new(_cache_key, f"{stored}\0{password}".encode(), hashlib.sha256).digest()
+
+
+def _cache_get(token):
+    with _cache_lock:
+        expires = _verify_cache.get(token)
+        if expires is None:
+            _cache_stats["misses"] += 1
+            return False
+        if expires < time.monotonic():
+            del _verify_cache[token]
+            _cache_stats["misses"] += 1
+            return False
+        _verify_cache.move_to_end(token)
+        _cache_stats["hits"] += 1
+        return True
+
+
+def _cache_put(token):
+    with _cache_lock:
+        _verify_cache[token] = time.monotonic() + VERIFY_CACHE_TTL
+        _verify_cache.move_to_end(token)
+        while len(_verify_cache) > VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+
+
+def clear_verify_cache():
+    with _cache_lock:
+        _verify_cache.clear()
+
+
+def verify_cache_stats():
+    """검증 캐시 적중/미적중 수"""
+    with _cache_lock:
+        return {"entries": len(_verify_cache), **_cache_stats}
+
+
+def _get_verify_pool():
+    """검증 전용 스레드 풀 (동시에 실행되는 KDF 계산 수를 CPU 수로 제한)"""
+    global _verify_pool
+    with _pool_lock:
+        if _verify_pool is None:
+            _verify_pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                thread_name_prefix="password-verify"
+            )
+        return _verify_pool
+
+
+def verify_password(password, stored):
+    """비밀번호가 저장된 해시와 일치하는지 확인
+
+    PBKDF2 계산은 검증 스레드 풀에서 실행되어, 수업 시작 때 로그인이 몰려도
+    동시에 도는 계산 수가 CPU 수를 넘지 않습니다. 호출한 스크립트 스레드는
+    결과를 기다리므로 검증 시간만큼 대기합니다 (풀은 동시 실행 제한일 뿐
+    비동기 처리가 아님). hashlib은 계산 중 GIL을 놓으므로 다른 세션의
+    스크립트 실행은 멈추지 않습니다. 성공한 검증은 잠시 캐시합니다.
+    """
+    if not password or not stored:
+        return False
+    token = _cache_token(password, stored)
+    if _cache_get(token):
+        return True
+    ok = _get_verify_pool().submit(_verify, password, stored).result()
+    if ok:
+        _cache_put(token)
+    return ok
+
+
+def needs_rehash(stored):
+    """예전 방식이거나 반복 횟수가 현재 설정의 REHASH_TOLERANCE 미만인 해시인지 확인"""
+    if is_legacy_hash(stored):
+        return True
+    try:
+        algorithm, iterations, _, _ = stored.split("$")
+        return algorithm != ALGORITHM or int(iterations) < _settings["iterations"] * REHASH_TOLERANCE
+    except (AttributeError, ValueError):
+        return True
+
+
+def hash_passwords(passwords, max_workers=None):
+    """여러 비밀번호를 프로세스 풀에서 병렬로 해싱 (입력 순서 유지)"""
+    passwords = list(passwords)
+    # 작업 프로세스에는 현재 설정이 없으므로 반복 횟수를 명시해 전달
+    hasher = functools.partial(hash_password, iterations=_settings["iterations"])
+    if len(passwords) < PARALLEL_THRESHOLD:
+        return [hasher(password) for password in passwords]
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(hasher, passwords, chunksize=chunksize))
+    except (OSError, RuntimeError):
+        # 프로세스를 만들 수 없는 환경에서는 순차 처리
+        return [hasher(password) for password in passwords]
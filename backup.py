@@ -0,0 +1,306 @@
+"""
+Streaming backup writer and reader.
+
+Backups are written record by record to a temporary file on disk, so
+peak memory stays bounded by a single record instead of the whole
+dataset. The recommended format is a ZIP archive holding one JSON Lines
+file per entity plus a manifest with record counts and SHA-256
+checksums.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+FORMAT_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+USERS_MEMBER = "users.jsonl"
+PROBLEMS_MEMBER = "problems.jsonl"
+RECORDS_MEMBER = "student_records.jsonl"
+SUBMISSIONS_MEMBER = "submissions.jsonl"
+
+# 체크섬을 따로 기록하는 청크 단위 (레코드 수)
+CHUNK_RECORDS = 1000
+
+# 압축 수준 선택지 (zlib 수준)
+COMPRESSION_LEVELS = {
+    "빠름": 1,
+    "기본": 6,
+    "최대 압축": 9,
+}
+
+# 기존 CSV 백업 형식의 열
+_CSV_COLUMNS = {
+    "users.csv": ["username", "name", "email", "role", "password", "created_by", "created_at"],
+    "problems.csv": ["key", "category", "question", "context", "example", "level", "created_by", "created_at"],
+    "student_records.csv": ["student_id", "timestamp", "question", "answer", "feedback", "teacher_feedback", "score"],
+}
+
+
+class BackupError(Exception):
+    """백업 파일이 손상되었거나 형식이 올바르지 않을 때 발생"""
+
+
+def iter_sections(users, teacher_problems, student_records):
+    """(ZIP 항목 이름, 레코드 이터레이터) 목록"""
+    def user_records():
+        for username, data in users.items():
+            yield {"username": username, **data}
+
+    def problem_records():
+        for key, data in teacher_problems.items():
+            yield {"key": key, **data}
+
+    def student_record_meta():
+        for student_id, record in student_records.items():
+            meta = {k: v for k, v in record.items() if k != "solved_problems"}
+            yield {"student_id": student_id, **meta}
+
+    def submission_records():
+        for student_id, record in student_records.items():
+            for index, submission in enumerate(record.get("solved_problems", [])):
+                yield {"student_id": student_id, "index": index, **submission}
+
+    return [
+        (USERS_MEMBER, user_records()),
+        (PROBLEMS_MEMBER, problem_records()),
+        (RECORDS_MEMBER, student_record_meta()),
+        (SUBMISSIONS_MEMBER, submission_records()),
+    ]
+
+
+def _new_temp_path(suffix):
+    handle, path = tempfile.mkstemp(prefix="ai_english_backup_", suffix=suffix)
+    os.close(handle)
+    return path
+
+
+def _finish_stats(stats, path, started):
+    stats["elapsed"] = time.perf_counter() - started
+    stats["file_bytes"] = os.path.getsize(path)
+    stats["throughput"] = stats["raw_bytes"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
+    return stats
+
+
+def write_member(zip_file, member, records):
+    """레코드를 JSON Lines로 ZIP 항목에 기록하고 매니페스트 항목 반환
+
+    전체 체크섬과 함께 CHUNK_RECORDS개 레코드마다 청크 체크섬을 남겨,
+    손상된 위치를 청크 단위로 찾을 수 있게 합니다.
+    """
+    digest = hashlib.sha256()
+    chunk_digest = hashlib.sha256()
+    chunks = []
+    count = 0
+    size = 0
+    with zip_file.open(member, "w") as out:
+        for record in records:
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            out.write(line)
+            digest.update(line)
+            chunk_digest.update(line)
+            count += 1
+            size += len(line)
+            if count % CHUNK_RECORDS == 0:
+                chunks.append(chunk_digest.hexdigest())
+                chunk_digest = hashlib.sha256()
+    if count % CHUNK_RECORDS:
+        chunks.append(chunk_digest.hexdigest())
+    return {"records": count, "bytes": size, "sha256": digest.hexdigest(), "chunks": chunks}
+
+
+def write_sections(path, sections, manifest, compresslevel=6):
+    """(항목 이름, 레코드) 목록을 JSON Lines ZIP으로 기록하고 (매니페스트, 통계) 반환"""
+    started = time.perf_counter()
+    manifest = {
+        "format": "jsonl-zip",
+        "version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **manifest,
+        "members": {},
+    }
+    raw_bytes = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zip_file:
+        for member, records in sections:
+            manifest["members"][member] = write_member(zip_file, member, records)
+            raw_bytes += manifest["members"][member]["bytes"]
+        zip_file.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+    stats = _finish_stats({"raw_bytes": raw_bytes}, path, started)
+    return manifest, stats
+
+
+def write_jsonl_zip(path, users, teacher_problems, student_records, compresslevel=6):
+    """JSON Lines ZIP 백업을 파일에 스트리밍으로 기록하고 (매니페스트, 통계) 반환"""
+    sections = iter_sections(users, teacher_problems, student_records)
+    return write_sections(path, sections, {"type": "full"}, compresslevel)
+
+
+def write_json(path, users, teacher_problems, student_records):
+    """기존 단일 JSON 형식 백업을 파일에 스트리밍으로 기록"""
+    started = time.perf_counter()
+    data = {
+        "users": users,
+        "teacher_problems": teacher_problems,
+        "student_records": student_records,
+    }
+    digest = hashlib.sha256()
+    raw_bytes = 0
+    with open(path, "w", encoding="utf-8") as f:
+        # json.dump는 내부적으로 iterencode 조각을 순서대로 기록
+        for chunk in json.JSONEncoder(ensure_ascii=False, indent=4).iterencode(data):
+            f.write(chunk)
+            encoded = chunk.encode("utf-8")
+            digest.update(encoded)
+            raw_bytes += len(encoded)
+    manifest = {"format": "json", "version": FORMAT_VERSION, "sha256": digest.hexdigest()}
+    return manifest, _finish_stats({"raw_bytes": raw_bytes}, path, started)
+
+
+def write_csv_zip(path, users, teacher_problems, student_records, compresslevel=6):
+    """기존 CSV(ZIP) 형식 백업을 파일에 스트리밍으로 기록"""
+    started = time.perf_counter()
+
+    def rows(member):
+        if member == "users.csv":
+            for username, data in users.items():
+                yield {"username": username, **data}
+        elif member == "problems.csv":
+            for key, data in teacher_problems.items():
+                yield {"key": key, **data}
+        else:
+            for student_id, record in student_records.items():
+                for problem in record.get("solved_problems", []):
+                    yield {
+                        "student_id": student_id,
+                        "timestamp": problem.get("timestamp", ""),
+                        "question": problem.get("problem", {}).get("question", ""),
+                        "answer": problem.get("answer", ""),
+                        "feedback": problem.get("feedback", ""),
+                        "teacher_feedback": problem.get("teacher_feedback", ""),
+                        "score": problem.get("teacher_score", ""),
+                    }
+
+    manifest = {"format": "csv-zip", "version": FORMAT_VERSION, "members": {}}
+    raw_bytes = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zip_file:
+        for member, columns in _CSV_COLUMNS.items():
+            count = 0
+            with zip_file.open(member, "w") as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as out:
+                    writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+                    writer.writeheader()
+                    for row in rows(member):
+                        writer.writerow({col: "" if row.get(col) is None else row.get(col) for col in columns})
+                        count += 1
+            info = zip_file.getinfo(member)
+            manifest["members"][member] = {"records": count, "bytes": info.file_size, "crc32": info.CRC}
+            raw_bytes += info.file_size
+    return manifest, _finish_stats({"raw_bytes": raw_bytes}, path, started)
+
+
+def create_backup_file(backup_format, users, teacher_problems, student_records, compresslevel=6):
+    """임시 파일에 백업을 만들고 (경로, 매니페스트, 통계) 반환
+
+    파일에는 비밀번호 해시를 포함한 전체 데이터가 들어 있으므로 호출한 쪽에서
+    다 읽은 뒤 바로 지워야 합니다. 만드는 도중 실패하면 여기서 지웁니다.
+
+    Args:
+        backup_format (str): "jsonl-zip", "json" 또는 "csv-zip"
+    """
+    path = _new_temp_path(".json" if backup_format == "json" else ".zip")
+    try:
+        if backup_format == "json":
+            manifest, stats = write_json(path, users, teacher_problems, student_records)
+        elif backup_format == "csv-zip":
+            manifest, stats = write_csv_zip(path, users, teacher_problems, student_records, compresslevel)
+        else:
+            manifest, stats = write_jsonl_zip(path, users, teacher_problems, student_records, compresslevel)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, manifest, stats
+
+
+def is_jsonl_backup(zip_file):
+    """ZIP이 JSON Lines 백업(매니페스트 포함)인지 확인"""
+    return MANIFEST_NAME in zip_file.namelist()
+
+
+def read_manifest(zip_file):
+    try:
+        return json.loads(zip_file.read(MANIFEST_NAME).decode("utf-8"))
+    except (KeyError, ValueError) as e:
+        raise BackupError(f"매니페스트를 읽을 수 없습니다: {e}")
+
+
+def iter_member(zip_file, member, expected=None):
+    """ZIP 항목의 레코드를 한 줄씩 읽으며 청크마다 체크섬을 검증
+
+    매니페스트 항목이 없으면 검증 없이 읽고, 항목 자체가 ZIP에 없으면
+    아무것도 반환하지 않습니다.
+    """
+    if member not in zip_file.namelist():
+        if expected and expected.get("records"):
+            raise BackupError(f"{member} 항목이 백업 파일에 없습니다.")
+        return
+    digest = hashlib.sha256()
+    chunk_digest = hashlib.sha256()
+    chunks = (expected or {}).get("chunks")
+    count = 0
+    with zip_file.open(member) as f:
+        for line in f:
+            digest.update(line)
+            chunk_digest.update(line)
+            count += 1
+            if chunks is not None and count % CHUNK_RECORDS == 0:
+                _check_chunk(member, chunks, count // CHUNK_RECORDS - 1, chunk_digest)
+                chunk_digest = hashlib.sha256()
+            yield json.loads(line)
+    if expected is not None:
+        if chunks is not None and count % CHUNK_RECORDS:
+            _check_chunk(member, chunks, count // CHUNK_RECORDS, chunk_digest)
+        if digest.hexdigest() != expected.get("sha256") or count != expected.get("records"):
+            raise BackupError(f"{member}의 체크섬 또는 레코드 수가 매니페스트와 일치하지 않습니다.")
+
+
+def _check_chunk(member, chunks, position, chunk_digest):
+    if position >= len(chunks) or chunks[position] != chunk_digest.hexdigest():
+        raise BackupError(f"{member}의 {position + 1}번째 청크가 손상되었습니다.")
+
+
+def read_jsonl_zip(zip_file):
+    """JSON Lines ZIP 백업을 (users, teacher_problems, student_records)로 복원"""
+    manifest = read_manifest(zip_file)
+    members = manifest.get("members", {})
+    users = {}
+    for record in iter_member(zip_file, USERS_MEMBER, members.get(USERS_MEMBER)):
+        users[record.pop("username")] = record
+    teacher_problems = {}
+    for record in iter_member(zip_file, PROBLEMS_MEMBER, members.get(PROBLEMS_MEMBER)):
+        teacher_problems[record.pop("key")] = record
+    student_records = {}
+    for record in iter_member(zip_file, RECORDS_MEMBER, members.get(RECORDS_MEMBER)):
+        student_id = record.pop("student_id")
+        student_records[student_id] = {**record, "solved_problems": []}
+    for record in iter_member(zip_file, SUBMISSIONS_MEMBER, members.get(SUBMISSIONS_MEMBER)):
+        student_id = record.pop("student_id")
+        record.pop("index", None)
+        student_records.setdefault(student_id, {"solved_problems": [], "total_problems": 0})
+        student_records[student_id]["solved_problems"].append(record)
+    return users, teacher_problems, student_records
+
+
+def format_bytes(size):
+    """바이트 수를 읽기 쉬운 문자열로 변환 (음수는 증감량, None은 "-")"""
+    if size is None:
+        return "-"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
@@ -0,0 +1,228 @@
+"""
+Incremental backups chained to a full base snapshot.
+
+Every user, problem, student record and submission is an entity with a
+content hash. A full backup stores every entity; an incremental backup
+stores only entities whose hash changed since the previous backup in the
+chain, plus deletions. Any point in the chain can be rebuilt by
+replaying the base snapshot and the incrementals up to that point, with
+each member verified chunk by chunk against its manifest.
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+
+import backup
+
+BACKUP_DIR = "backups"
+CHAIN_FILE = "chain.json"
+STATE_FILE = "state.json"
+DELETES_MEMBER = "deletes.jsonl"
+
+# 엔터티 종류별 ZIP 항목과 키 필드
+_KINDS = {
+    "user": (backup.USERS_MEMBER, ("username",)),
+    "problem": (backup.PROBLEMS_MEMBER, ("key",)),
+    "record": (backup.RECORDS_MEMBER, ("student_id",)),
+    "submission": (backup.SUBMISSIONS_MEMBER, ("student_id", "index")),
+}
+_MEMBER_KINDS = {member: kind for kind, (member, _) in _KINDS.items()}
+
+
+def entity_id(kind, record):
+    """엔터티 아이디 문자열 (예: submission/student01/3)"""
+    fields = _KINDS[kind][1]
+    return "/".join([kind] + [str(record[field]) for field in fields])
+
+
+def content_hash(record):
+    """레코드 내용 해시 (키 순서와 무관)"""
+    encoded = json.dumps(record, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def iter_entities(users, teacher_problems, student_records):
+    """(종류, 레코드) 순서로 모든 엔터티 반환"""
+    for member, records in backup.iter_sections(users, teacher_problems, student_records):
+        kind = _MEMBER_KINDS[member]
+        for record in records:
+            yield kind, record
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+class BackupChain:
+    """백업 디렉터리의 기준 스냅샷과 증분 백업 체인"""
+
+    def __init__(self, directory=BACKUP_DIR):
+        self.directory = directory
+
+    @property
+    def chain_path(self):
+        return os.path.join(self.directory, CHAIN_FILE)
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, STATE_FILE)
+
+    def entries(self):
+        """체인 항목 목록 (오래된 순)"""
+        return _read_json(self.chain_path, [])
+
+    def _path(self, entry):
+        return os.path.join(self.directory, entry["file"])
+
+    def create(self, users, teacher_problems, student_records, full=False, compresslevel=6):
+        """백업 생성 (기준 스냅샷이 없거나 full이면 전체 백업)
+
+        Returns:
+            dict: 추가된 체인 항목 (변경 사항이 없으면 None)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entries = self.entries()
+        previous_hashes = {} if full or not entries else _read_json(self.state_path, {})
+        full = full or not entries
+
+        current_hashes = {}
+        changed = {member: [] for member, _ in _KINDS.values()}
+        for kind, record in iter_entities(users, teacher_problems, student_records):
+            key = entity_id(kind, record)
+            digest = content_hash(record)
+            current_hashes[key] = digest
+            if full or previous_hashes.get(key) != digest:
+                changed[_KINDS[kind][0]].append(record)
+        deleted = [key for key in previous_hashes if key not in current_hashes]
+
+        if not full and not deleted and not any(changed.values()):
+            return None
+
+        backup_id = f"{len(entries) + 1:04d}"
+        entry = {
+            "id": backup_id,
+            "type": "full" if full else "incremental",
+            "parent": None if full else entries[-1]["id"],
+            "base": backup_id if full else entries[-1]["base"],
+            "file": f"backup_{backup_id}_{'full' if full else 'incr'}.zip",
+            "changes": {member: len(records) for member, records in changed.items()},
+            "deletes": len(deleted),
+        }
+        sections = list(changed.items())
+        sections.append((DELETES_MEMBER, ({"id": key} for key in deleted)))
+        manifest, stats = backup.write_sections(
+            self._path(entry),
+            sections,
+            {"type": entry["type"], "id": backup_id, "parent": entry["parent"], "base": entry["base"]},
+            compresslevel
+        )
+        entry["created_at"] = manifest["created_at"]
+        entry["file_bytes"] = stats["file_bytes"]
+        entry["sha256"] = _file_sha256(self._path(entry))
+
+        # 새 기준 스냅샷이면 이전 체인은 그대로 두고 새 체인을 시작
+        entries.append(entry)
+        _write_json(self.chain_path, entries)
+        _write_json(self.state_path, current_hashes)
+        return entry
+
+    def lineage(self, backup_id):
+        """기준 스냅샷부터 지정한 백업까지의 항목 목록"""
+        by_id = {entry["id"]: entry for entry in self.entries()}
+        if backup_id not in by_id:
+            raise backup.BackupError(f"백업 {backup_id}을(를) 찾을 수 없습니다.")
+        lineage = []
+        entry = by_id[backup_id]
+        while entry is not None:
+            lineage.append(entry)
+            entry = by_id.get(entry["parent"]) if entry["parent"] else None
+        lineage.reverse()
+        if lineage[0]["type"] != "full":
+            raise backup.BackupError("기준 스냅샷이 체인에 없습니다.")
+        return lineage
+
+    def verify(self, backup_id=None):
+        """체인(또는 지정한 시점까지)의 파일/청크 체크섬 검증, 문제 목록 반환"""
+        entries = self.lineage(backup_id) if backup_id else self.entries()
+        problems = []
+        for entry in entries:
+            path = self._path(entry)
+            if not os.path.exists(path):
+                problems.append(f"{entry['file']}: 파일이 없습니다.")
+                continue
+            if _file_sha256(path) != entry.get("sha256"):
+                problems.append(f"{entry['file']}: 파일 체크섬이 일치하지 않습니다.")
+                continue
+            try:
+                with zipfile.ZipFile(path) as zip_file:
+                    manifest = backup.read_manifest(zip_file)
+                    for member, expected in manifest["members"].items():
+                        for _ in backup.iter_member(zip_file, member, expected):
+                            pass
+            except (backup.BackupError, zipfile.BadZipFile, ValueError) as e:
+                problems.append(f"{entry['file']}: {e}")
+        return problems
+
+    def restore(self, backup_id, progress=None):
+        """지정한 시점의 데이터를 재구성해 (users, teacher_problems, student_records) 반환"""
+        lineage = self.lineage(backup_id)
+        entities = {}
+        for position, entry in enumerate(lineage):
+            path = self._path(entry)
+            if _file_sha256(path) != entry.get("sha256"):
+                raise backup.BackupError(f"{entry['file']}의 파일 체크섬이 일치하지 않습니다.")
+            with zipfile.ZipFile(path) as zip_file:
+                manifest = backup.read_manifest(zip_file)
+                members = manifest["members"]
+                for member, kind in _MEMBER_KINDS.items():
+                    for record in backup.iter_member(zip_file, member, members.get(member)):
+                        entities[entity_id(kind, record)] = (kind, record)
+                for record in backup.iter_member(zip_file, DELETES_MEMBER, members.get(DELETES_MEMBER)):
+                    entities.pop(record["id"], None)
+            if progress is not None:
+                progress((position + 1) / len(lineage))
+        return assemble(entities.values())
+
+
+def assemble(entities):
+    """(종류, 레코드) 목록을 users, teacher_problems, student_records로 조립"""
+    users = {}
+    teacher_problems = {}
+    student_records = {}
+    submissions = {}
+    for kind, record in entities:
+        record = dict(record)
+        if kind == "user":
+            users[record.pop("username")] = record
+        elif kind == "problem":
+            teacher_problems[record.pop("key")] = record
+        elif kind == "record":
+            student_id = record.pop("student_id")
+            student_records[student_id] = {**record, "solved_problems": []}
+        else:
+            submissions.setdefault(record.pop("student_id"), []).append(record)
+    for student_id, items in submissions.items():
+        items.sort(key=lambda item: item.get("index", 0))
+        record = student_records.setdefault(student_id, {"solved_problems": [], "total_problems": 0})
+        record["solved_problems"] = [{k: v for k, v in item.items() if k != "index"} for item in items]
+    return users, teacher_problems, student_records
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,9 @@
+"""
+Benchmarks for the app at realistic data sizes.
+
+    python -m benchmarks.run --scale medium --output benchmark_results.json
+
+dataset generates users_data.json-shaped data seeded from SAMPLE_PROBLEMS,
+fake_llm serves an OpenAI-compatible endpoint with canned bilingual
+feedback, and run times the hot paths and writes the results as JSON.
+"""
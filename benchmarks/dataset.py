@@ -0,0 +1,199 @@
+"""
+Synthetic users_data.json-shaped datasets.
+
+Teachers, students, teacher problems and submissions are generated with
+a seeded random generator, so the same arguments always produce the same
+data. Problems are variants of SAMPLE_PROBLEMS; answers and feedback are
+English/Korean text of realistic length.
+"""
+
+import csv
+import datetime
+import io
+import random
+
+from auth import hash_password
+from problems import SAMPLE_PROBLEMS
+from recommender import LEVELS
+
+# 규모별 기본값 (학생 수, 학생당 답변 수)
+SCALES = {
+    "small": (100, 20),
+    "medium": (500, 50),
+    "large": (1000, 100),
+}
+
+BENCH_PASSWORD = "bench1234"
+
+_ANSWER_SENTENCES = [
+    "I think this topic is very important for students like me.",
+    "Last year, I had a chance to think about it more deeply.",
+    "My family usually spends the weekend together at home.",
+    "In my opinion, technology makes our lives more convenient but also more stressful.",
+    "When I was young, I wanted to become a teacher because I liked helping people.",
+    "There are many reasons why people choose to travel abroad.",
+    "First of all, it is good for our health and our mind.",
+    "However, some people disagree with this idea for several reasons.",
+    "For example, my friend Jisoo studies English every morning before school.",
+    "In conclusion, I believe we should try our best to solve this problem together.",
+    "It was the most memorable experience in my life so far.",
+    "I am going to practice more so that I can improve my writing skills.",
+]
+
+_FEEDBACK_EN = [
+    "Your answer addresses the question clearly and stays on topic.",
+    "Consider using a wider range of linking words such as 'moreover' and 'as a result'.",
+    "Watch the verb tense: when describing past events, use the simple past consistently.",
+    "The second paragraph would be stronger with a concrete example.",
+    "Articles are sometimes missing before singular countable nouns.",
+    "Overall, the structure is logical and easy to follow.",
+    "Try to vary your sentence length to make the writing more engaging.",
+]
+
+_FEEDBACK_KO = [
+    "질문의 요지를 잘 파악하고 주제에서 벗어나지 않았습니다.",
+    "'moreover', 'as a result'와 같은 연결어를 더 다양하게 사용해 보세요.",
+    "과거의 일을 설명할 때는 과거 시제를 일관되게 사용해야 합니다.",
+    "두 번째 문단에 구체적인 예시를 추가하면 더 설득력이 있습니다.",
+    "단수 가산 명사 앞에 관사가 빠진 부분이 있습니다.",
+    "전체적으로 구성이 논리적이고 읽기 쉽습니다.",
+    "문장 길이에 변화를 주면 글이 더 생동감 있어집니다.",
+]
+
+
+def fake_answer(rng, sentences=None):
+    """학생 답변 (영어 4-10문장)"""
+    return " ".join(rng.choice(_ANSWER_SENTENCES) for _ in range(sentences or rng.randint(4, 10)))
+
+
+def fake_feedback(rng, answer=""):
+    """AI 첨삭 형식의 영어/한국어 피드백 (약 1,000-2,000자)"""
+    points = rng.sample(range(len(_FEEDBACK_EN)), 4)
+    sections = [
+        "1. PROBLEM ANALYSIS:\nThis is a short descriptive writing task that tests organization and grammar.\n\n"
+        "한국어 설명:\n짧은 서술형 글쓰기 과제로 글의 구성과 문법을 평가합니다.",
+        "2. STRENGTHS:\n" + "\n".join(f"- {_FEEDBACK_EN[i]}" for i in points[:2]) +
+        "\n\n한국어 설명:\n" + "\n".join(f"- {_FEEDBACK_KO[i]}" for i in points[:2]),
+        "3. AREAS FOR IMPROVEMENT:\n" + "\n".join(f"- {_FEEDBACK_EN[i]}" for i in points[2:]) +
+        "\n\n한국어 설명:\n" + "\n".join(f"- {_FEEDBACK_KO[i]}" for i in points[2:]),
+        "4. CORRECTED VERSION:\n" + (answer or fake_answer(rng)),
+        f"5. SCORE: {rng.randint(55, 98)}/100",
+    ]
+    return "\n\n".join(sections)
+
+
+def generate(students=100, submissions=20, teachers=None, problems_per_teacher=20,
+             graded_ratio=0.6, days=180, seed=0):
+    """users_data.json과 같은 구조의 데이터 생성
+
+    Args:
+        students (int): 학생 수
+        submissions (int): 학생당 답변 수
+        teachers (int): 교사 수 (기본: 학생 25명당 1명)
+        problems_per_teacher (int): 교사당 출제 문제 수
+        graded_ratio (float): 교사 채점이 끝난 답변 비율
+        days (int): 답변 제출 시각을 흩뿌릴 기간 (일)
+    """
+    rng = random.Random(seed)
+    teachers = teachers or max(1, students // 25)
+    now = datetime.datetime.now().replace(microsecond=0)
+    # 해싱 비용은 측정 대상이 아니므로 모든 계정이 같은 해시를 사용
+    password = hash_password(BENCH_PASSWORD)
+    created_at = (now - datetime.timedelta(days=days + 1)).isoformat()
+
+    users = {
+        "admin": {"password": password, "role": "admin", "name": "관리자", "email": "",
+                  "created_by": None, "created_at": created_at}
+    }
+    teacher_ids = [f"teacher{t:03d}" for t in range(teachers)]
+    for t, teacher in enumerate(teacher_ids):
+        users[teacher] = {"password": password, "role": "teacher", "name": f"교사{t}",
+                          "email": f"{teacher}@example.com", "created_by": "admin", "created_at": created_at}
+
+    seeds = list(SAMPLE_PROBLEMS.values())
+    teacher_problems = {}
+    for teacher in teacher_ids:
+        for p in range(problems_per_teacher):
+            seed_problem = seeds[(p + rng.randrange(len(seeds))) % len(seeds)]
+            key = f"{seed_problem['category']}/{teacher}-{p:03d}"
+            teacher_problems[key] = {
+                "category": seed_problem["category"],
+                "question": seed_problem["question"],
+                "context": seed_problem["context"],
+                "example": seed_problem.get("example", ""),
+                "level": rng.choice(LEVELS),
+                "created_by": teacher,
+                "created_at": created_at
+            }
+    problem_keys = list(teacher_problems)
+    sample_keys = list(SAMPLE_PROBLEMS)
+
+    student_records = {}
+    for s in range(students):
+        student = f"student{s:05d}"
+        teacher = teacher_ids[s % teachers]
+        users[student] = {"password": password, "role": "student", "name": f"학생{s}",
+                          "email": "", "created_by": teacher, "created_at": created_at}
+        solved = []
+        for _ in range(submissions):
+            if rng.random() < 0.7:
+                problem_key = rng.choice(problem_keys)
+                problem = teacher_problems[problem_key]
+            else:
+                problem_key = rng.choice(sample_keys)
+                problem = SAMPLE_PROBLEMS[problem_key]
+            submitted = now - datetime.timedelta(seconds=rng.randrange(days * 86400))
+            answer = fake_answer(rng)
+            submission = {
+                "problem_key": problem_key,
+                "problem": dict(problem),
+                "answer": answer,
+                "feedback": fake_feedback(rng, answer),
+                "llm": {
+                    "provider": "openai",
+                    "model": "gpt-3.5-turbo",
+                    "purpose": "feedback",
+                    "latency_ms": round(rng.uniform(1500, 9000), 1),
+                    "prompt_tokens": rng.randint(600, 900),
+                    "completion_tokens": rng.randint(500, 1100),
+                    "called_at": submitted.isoformat()
+                },
+                "timestamp": submitted.isoformat()
+            }
+            if rng.random() < graded_ratio:
+                submission["teacher_feedback"] = rng.choice(_FEEDBACK_KO)
+                submission["teacher_score"] = rng.randint(50, 100)
+                submission["graded_by"] = teacher
+                submission["graded_at"] = (submitted + datetime.timedelta(hours=rng.randint(1, 72))).isoformat()
+            solved.append(submission)
+        solved.sort(key=lambda item: item["timestamp"])
+        student_records[student] = {"solved_problems": solved, "total_problems": len(solved), "feedback_history": []}
+
+    return {
+        "teacher_problems": teacher_problems,
+        "student_records": student_records,
+        "users": users,
+    }
+
+
+def problems_csv(rows, seed=0, invalid_ratio=0.02, duplicate_ratio=0.02):
+    """교사 CSV 문제 가져오기 형식의 CSV 텍스트 (일부 잘못된 행과 중복 행 포함)"""
+    rng = random.Random(seed)
+    seeds = list(SAMPLE_PROBLEMS.values())
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=["name", "category", "question", "context", "example", "level"])
+    writer.writeheader()
+    for row in range(rows):
+        seed_problem = rng.choice(seeds)
+        name = f"bench-{row:06d}"
+        if rng.random() < duplicate_ratio and row:
+            name = f"bench-{rng.randrange(row):06d}"
+        writer.writerow({
+            "name": name,
+            "category": seed_problem["category"],
+            "question": "" if rng.random() < invalid_ratio else seed_problem["question"],
+            "context": seed_problem["context"],
+            "example": seed_problem.get("example", ""),
+            "level": rng.choice(LEVELS)
+        })
+    return output.getvalue()
@@ -0,0 +1,105 @@
+"""
+Fake OpenAI-compatible LLM server.
+
+Serves POST /v1/chat/completions on a local port with canned bilingual
+feedback, a configurable delay and error rate, and OpenAI-style usage
+counts. Point the app at it with OPENAI_BASE_URL=<server.base_url>.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.dataset import fake_answer, fake_feedback
+
+
+class FakeLLMServer:
+    """로컬 스레드에서 동작하는 가짜 OpenAI 호환 서버"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0, port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload = fake.respond(self.path, body)
+                encoded = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+        return Handler
+
+    def respond(self, path, body):
+        """(HTTP 상태, 응답 JSON) 반환"""
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            fail = self.rng.random() < self.error_rate
+            seed = self.rng.random()
+        time.sleep(delay)
+        if not path.endswith("/chat/completions"):
+            return 404, {"error": {"message": f"unknown path {path}", "type": "invalid_request_error"}}
+        if fail:
+            with self.lock:
+                self.errors += 1
+            return 500, {"error": {"message": "fake server error", "type": "server_error"}}
+        prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+        rng = random.Random(seed)
+        content = fake_feedback(rng, fake_answer(rng))
+        return 200, {
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4
+            }
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-llm", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,309 @@
+"""
+Drive many concurrent student sessions through the app and report load.
+
+    python -m benchmarks.load --sessions 30 --rounds 3 --llm-latency 2.0
+
+Each simulated student gets its own streamlit.testing AppTest (its own
+session state and script runs, sharing the process-wide caches like a
+real server) and goes through login -> pick a recommended problem ->
+submit an answer -> view learning history, against the fake
+OpenAI-compatible server. Results include throughput, p50/p95 latency
+per step, errors, and lost writes: submissions the app reported as saved
+that are missing from users_data.json when the run ends.
+
+AppTest is not built for concurrent use. The app is compiled once and
+the bytecode is shared, because concurrent compile() calls can fail.
+AppTest also swaps a process-global mock Runtime around each run, so a
+run can occasionally break when another session's run finishes. Any
+step that raises, shows an exception or renders nothing is counted as
+an error rather than dropped.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from benchmarks import dataset
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.run import APP_PATH, app_environment, git_commit
+import storage
+
+STEPS = ["login", "pick_problem", "submit", "history"]
+
+
+def percentile(samples, q):
+    """q 백분위수 (선형 보간)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_latency(samples_ms):
+    if not samples_ms:
+        return {"count": 0}
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 1),
+        "p95_ms": round(percentile(samples_ms, 95), 1),
+        "max_ms": round(max(samples_ms), 1),
+        "mean_ms": round(statistics.mean(samples_ms), 1),
+    }
+
+
+class StepFailed(Exception):
+    pass
+
+
+@contextmanager
+def shared_script_bytecode():
+    """모든 AppTest가 한 번 컴파일한 앱 코드를 함께 쓰도록 함
+
+    AppTest는 실행할 때마다 새 ScriptCache로 앱을 다시 컴파일하는데, 여러
+    스레드가 동시에 compile()하면 CPython 3.11이 "AST constructor recursion
+    depth mismatch" SystemError를 낼 수 있습니다. 컴파일을 잠금 아래에서 한
+    번만 하고 그 코드 객체를 재사용합니다.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    original = ScriptCache.get_bytecode
+    compiled = {}
+    lock = threading.Lock()
+
+    def get_bytecode(cache, script_path):
+        path = os.path.abspath(script_path)
+        with lock:
+            if path not in compiled:
+                compiled[path] = original(cache, script_path)
+            return compiled[path]
+
+    ScriptCache.get_bytecode = get_bytecode
+    try:
+        yield
+    finally:
+        ScriptCache.get_bytecode = original
+
+
+class SimulatedStudent:
+    """학생 한 명의 세션 (AppTest 하나)"""
+
+    def __init__(self, username, args, results, seed):
+        self.username = username
+        self.args = args
+        self.results = results
+        self.rng = random.Random(seed)
+        self.at = None
+
+    def step(self, name, action):
+        """단계 하나를 실행하고 소요 시간 기록 (실패 시 StepFailed)"""
+        started = time.perf_counter()
+        try:
+            action()
+            if self.at.exception:
+                raise StepFailed(self.at.exception[0].message)
+            # 컴파일 오류 등으로 스크립트가 시작되지 못하면 AppTest는 예외 없이 빈 화면을 돌려줌
+            if not self.at.main.children and not self.at.sidebar.children:
+                raise StepFailed("스크립트가 아무것도 그리지 않았습니다 (컴파일 오류 등)")
+        except StepFailed:
+            raise
+        except Exception as e:
+            raise StepFailed(f"{type(e).__name__}: {e}")
+        finally:
+            self.results.latency(name, (time.perf_counter() - started) * 1000)
+
+    def login(self):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(APP_PATH, default_timeout=self.args.page_timeout)
+        self.at.run()
+        self.at.text_input(key="login_username").input(self.username)
+        self.at.text_input(key="login_password").input(dataset.BENCH_PASSWORD)
+        next(button for button in self.at.button if button.label == "로그인").click().run()
+        if not self.at.session_state["logged_in"]:
+            raise StepFailed("로그인 실패")
+
+    def pick_problem(self):
+        menu = self.at.sidebar.radio[0]
+        if menu.value != "문제 풀기":
+            menu.set_value("문제 풀기").run()
+        select = next(box for box in self.at.selectbox if box.label == "추천 문제:")
+        select.select_index(self.rng.randrange(len(select.options))).run()
+
+    def submit(self, marker):
+        area = next(widget for widget in self.at.text_area if widget.label == "답변을 입력하세요:")
+        area.input(f"{dataset.fake_answer(self.rng)} {marker}")
+        next(button for button in self.at.button if button.label == "답변 제출").click().run()
+        if not any("답변이 제출되었습니다" in message.value for message in self.at.success):
+            errors = [message.value for message in self.at.error]
+            raise StepFailed(errors[0] if errors else "제출 확인 메시지 없음")
+
+    def history(self):
+        self.at.sidebar.radio[0].set_value("내 학습 기록").run()
+
+    def run(self):
+        try:
+            self.step("login", self.login)
+            for round_no in range(self.args.rounds):
+                self.think()
+                self.step("pick_problem", self.pick_problem)
+                marker = f"[load:{self.username}:{round_no}]"
+                self.step("submit", lambda: self.submit(marker))
+                # 앱이 저장했다고 응답한 답변 (종료 후 파일에서 확인)
+                self.results.saved(self.username, marker)
+                self.think()
+                self.step("history", self.history)
+            self.results.finished()
+        except StepFailed as e:
+            self.results.error(self.username, str(e))
+        except Exception as e:
+            # 단계 밖에서 난 예외도 오류로 집계 (스레드 풀이 삼키지 않도록)
+            self.results.error(self.username, f"{type(e).__name__}: {e}")
+
+    def think(self):
+        if self.args.think_time:
+            time.sleep(self.rng.uniform(0, self.args.think_time))
+
+
+class LoadResults:
+    """여러 스레드에서 모으는 측정값"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {step: [] for step in STEPS}
+        self.markers = {}
+        self.errors = []
+        self.completed = 0
+
+    def latency(self, step, elapsed_ms):
+        with self.lock:
+            self.latencies[step].append(elapsed_ms)
+
+    def saved(self, username, marker):
+        with self.lock:
+            self.markers.setdefault(username, []).append(marker)
+
+    def error(self, username, message):
+        with self.lock:
+            self.errors.append({"username": username, "error": message})
+
+    def finished(self):
+        with self.lock:
+            self.completed += 1
+
+
+def count_lost_writes(path, markers):
+    """저장되었다고 응답했지만 파일에 없는 답변 수"""
+    records = storage.read_json(path).get("student_records", {})
+    lost = []
+    for username, expected in markers.items():
+        answers = " ".join(item.get("answer", "") for item in records.get(username, {}).get("solved_problems", []))
+        lost += [marker for marker in expected if marker not in answers]
+    return lost
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 영어 첨삭 앱 동시 접속 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=20, help="동시에 접속하는 학생 수")
+    parser.add_argument("--rounds", type=int, default=3, help="학생당 문제 풀이 반복 횟수")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="모든 세션이 시작될 때까지의 시간 (초)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="단계 사이 최대 대기 시간 (초)")
+    parser.add_argument("--students", type=int, default=None, help="데이터셋 학생 수 (기본: 세션 수)")
+    parser.add_argument("--submissions", type=int, default=20, help="데이터셋의 학생당 기존 답변 수")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="가짜 LLM 응답 지연 (초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="가짜 LLM 지연 편차 (초)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="가짜 LLM 오류 비율 (0-1)")
+    parser.add_argument("--page-timeout", type=float, default=120.0, help="스크립트 실행 제한 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results_load.json", help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as e:
+        parser.error(f"streamlit이 필요합니다: {e}")
+
+    students = max(args.students or args.sessions, args.sessions)
+    data = dataset.generate(students=students, submissions=args.submissions, seed=args.seed)
+    usernames = sorted(name for name, user in data["users"].items() if user["role"] == "student")[:args.sessions]
+    output = os.path.abspath(args.output)
+    results = LoadResults()
+
+    with tempfile.TemporaryDirectory(prefix="ai_english_load_") as workdir, \
+            FakeLLMServer(latency=args.llm_latency, jitter=args.llm_jitter,
+                          error_rate=args.llm_error_rate, seed=args.seed) as llm, \
+            app_environment(workdir, data, llm), \
+            shared_script_bytecode():
+        # 스레드를 시작하기 전에 앱을 한 번 컴파일하고 프로세스 캐시를 준비
+        # (첫 세션만 콜드 스타트 비용을 내지 않도록)
+        warmup = AppTest.from_file(APP_PATH, default_timeout=args.page_timeout).run()
+        if warmup.exception or not warmup.main.children:
+            raise SystemExit(f"앱 준비 실행 실패: {warmup.exception[0].message if warmup.exception else '빈 화면'}")
+
+        delay = args.ramp_up / max(1, args.sessions)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix="load-session") as pool:
+            for i, username in enumerate(usernames):
+                student = SimulatedStudent(username, args, results, seed=args.seed * 100003 + i)
+                pool.submit(student.run)
+                time.sleep(delay)
+        elapsed = time.perf_counter() - started
+        # 앱은 저장을 모아서 기록하므로 파일을 확인하기 전에 남은 변경을 기록
+        storage.flush_all()
+        lost = count_lost_writes(os.path.join(workdir, storage.DATA_FILE), results.markers)
+        llm_requests, llm_errors = llm.requests, llm.errors
+
+    saved = sum(len(markers) for markers in results.markers.values())
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "sessions": args.sessions,
+            "rounds": args.rounds,
+            "ramp_up": args.ramp_up,
+            "think_time": args.think_time,
+            "students": students,
+            "llm_latency": args.llm_latency,
+            "llm_jitter": args.llm_jitter,
+            "llm_error_rate": args.llm_error_rate,
+            "llm_requests": llm_requests,
+            "llm_errors": llm_errors,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "completed_sessions": results.completed,
+        "submissions_saved": saved,
+        "throughput": {
+            "submissions_per_s": round(saved / elapsed, 3) if elapsed else None,
+            "steps_per_s": round(sum(len(v) for v in results.latencies.values()) / elapsed, 3) if elapsed else None,
+        },
+        "latency": {step: summarize_latency(samples) for step, samples in results.latencies.items()},
+        "lost_writes": len(lost),
+        "lost_markers": lost[:50],
+        "errors": len(results.errors),
+        "error_samples": results.errors[:20],
+    }
+
+    print(f"세션 {args.sessions}개, {elapsed:.1f}초, 저장된 답변 {saved}개 ({report['throughput']['submissions_per_s']}/s)")
+    for step, stats in report["latency"].items():
+        if stats["count"]:
+            print(f"  {step:<14} p50 {stats['p50_ms']:>9.1f} ms   p95 {stats['p95_ms']:>9.1f} ms   ({stats['count']}회)")
+    print(f"유실된 저장: {len(lost)}개, 오류: {len(results.errors)}개")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Time the app's hot paths on a generated dataset and write JSON results.
+
+    python -m benchmarks.run --scale large --repeat 5 --output benchmark_results.json
+
+Storage, indexes, CSV import and backup/restore are timed by calling the
+modules directly. Dashboard pages (student learning history, teacher
+grading, admin system info, answer submission with the fake LLM) are
+timed through streamlit.testing's AppTest, so the numbers include the
+full script run the way a browser interaction would trigger it.
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import backup  # noqa: E402
+import restore  # noqa: E402
+import storage  # noqa: E402
+from benchmarks import dataset  # noqa: E402
+from benchmarks.fake_llm import FakeLLMServer  # noqa: E402
+from grading_queue import GradingQueue  # noqa: E402
+from indexes import DataIndex  # noqa: E402
+from problems import SAMPLE_PROBLEMS  # noqa: E402
+from recommender import Recommender  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+# 페이지 측정: (이름, 역할, 아이디, 사이드바 메뉴)
+PAGES = [
+    ("student_learning_history", "student", "student00000", "내 학습 기록"),
+    ("teacher_grading", "teacher", "teacher000", "채점 및 첨삭"),
+    ("admin_system_info", "admin", "admin", "시스템 정보"),
+]
+
+
+def summarize(samples_ms, **extra):
+    """측정값(ms) 목록의 요약"""
+    return {
+        "runs": len(samples_ms),
+        "min_ms": round(min(samples_ms), 3),
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+        **extra,
+    }
+
+
+def measure(func, repeat):
+    """func를 repeat번 실행해 (요약, 마지막 반환값) 반환"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples), result
+
+
+class Benchmark:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.results = {}
+
+    def record(self, name, stats):
+        self.results[name] = stats
+        print(f"{name:<40} {stats.get('median_ms', 0):>12.1f} ms" if "median_ms" in stats else f"{name:<40} {stats}")
+
+    def skip(self, name, reason):
+        self.results[name] = {"skipped": reason}
+        print(f"{name:<40} 건너뜀: {reason}")
+
+    def run_storage(self, data):
+        path = os.path.join(self.workdir, storage.DATA_FILE)
+        stats, size = measure(lambda: storage.write_json_atomic(path, data), self.args.repeat)
+        self.record("save_users_data", {**stats, "bytes": size})
+        stats, _ = measure(lambda: storage.read_json(path), self.args.repeat)
+        self.record("load_users_data", stats)
+        return size
+
+    def run_indexes(self, data):
+        users, problems, records = data["users"], data["teacher_problems"], data["student_records"]
+        self.record("index.data_index", measure(lambda: DataIndex().rebuild(users, problems), self.args.repeat)[0])
+        self.record("index.grading_queue", measure(lambda: GradingQueue().rebuild(users, records), self.args.repeat)[0])
+        self.record("index.search", measure(lambda: SearchIndex().rebuild(problems, records), self.args.repeat)[0])
+
+        def recommender():
+            engine = Recommender(SAMPLE_PROBLEMS)
+            engine.rebuild(problems, records)
+            return engine
+
+        stats, engine = measure(recommender, self.args.repeat)
+        self.record("index.recommender", stats)
+        student = next(iter(records), None)
+        if student:
+            self.record("recommend", measure(lambda: engine.recommend(student, 10), self.args.repeat)[0])
+
+    def run_csv_import(self, data):
+        try:
+            import csv_import
+        except ImportError as e:
+            return self.skip("csv_import", str(e))
+        text = dataset.problems_csv(self.args.csv_rows, seed=self.args.seed).encode("utf-8")
+
+        def validate():
+            return csv_import.validate_csv(io.BytesIO(text), set(data["teacher_problems"]), "teacher000")
+
+        stats, result = measure(validate, self.args.repeat)
+        self.record("csv_import", {**stats, "rows": result.total_rows, "accepted": len(result.problems)})
+
+    def run_backup_restore(self, data):
+        users, problems, records = data["users"], data["teacher_problems"], data["student_records"]
+        restored_path = os.path.join(self.workdir, "restored_users_data.json")
+        for backup_format in ("jsonl-zip", "json", "csv-zip"):
+            paths = []
+
+            def create():
+                path, manifest, stats = backup.create_backup_file(backup_format, users, problems, records)
+                paths.append(path)
+                return stats
+
+            stats, backup_stats = measure(create, self.args.repeat)
+            self.record(f"backup.{backup_format}", {**stats, "file_bytes": backup_stats["file_bytes"]})
+
+            def restore_file():
+                with open(paths[-1], "rb") as f:
+                    staged = restore.stage_upload(f)
+                return restore.commit(staged, restored_path)
+
+            self.record(f"restore.{backup_format}", measure(restore_file, self.args.repeat)[0])
+            for path in paths:
+                os.remove(path)
+
+    def run_pages(self):
+        try:
+            from streamlit.testing.v1 import AppTest
+        except ImportError as e:
+            return self.skip("pages", str(e))
+
+        def session(role, username):
+            at = AppTest.from_file(APP_PATH, default_timeout=self.args.page_timeout)
+            at.session_state["logged_in"] = True
+            at.session_state["username"] = username
+            at.session_state["user_role"] = role
+            return at
+
+        def check(at, name):
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].message}")
+            return at
+
+        for name, role, username, menu in PAGES:
+            try:
+                # 새 세션의 첫 실행 (데이터 로드와 인덱스 구성 포함)
+                stats, at = measure(lambda: check(session(role, username).run(), name), self.args.repeat)
+                self.record(f"page.{name}.session_start", stats)
+
+                at.sidebar.radio[0].set_value(menu)
+                started = time.perf_counter()
+                check(at.run(), name)
+                open_ms = (time.perf_counter() - started) * 1000
+                stats, _ = measure(lambda: check(at.run(), name), self.args.repeat)
+                self.record(f"page.{name}.rerun", {**stats, "open_ms": round(open_ms, 3)})
+            except Exception as e:
+                self.skip(f"page.{name}", str(e))
+
+        # 답변 제출 (가짜 LLM 첨삭 + 기록 저장)
+        try:
+            at = check(session("student", "student00001").run(), "submit")
+            rng = random.Random(self.args.seed)
+
+            def submit():
+                area = next(widget for widget in at.text_area if widget.label == "답변을 입력하세요:")
+                area.input(dataset.fake_answer(rng))
+                button = next(widget for widget in at.button if widget.label == "답변 제출")
+                return check(button.click().run(), "submit")
+
+            self.record("page.submit_answer", measure(submit, self.args.repeat)[0])
+        except Exception as e:
+            self.skip("page.submit_answer", str(e))
+
+
+@contextmanager
+def app_environment(workdir, data, llm):
+    """앱이 workdir의 데이터와 가짜 LLM 서버를 쓰도록 작업 디렉터리와 환경 변수를 바꾼 뒤 되돌림
+
+    앱은 작업 디렉터리의 users_data.json과 .env를 사용하므로 임시 디렉터리에서 실행합니다.
+    """
+    storage.write_json_atomic(os.path.join(workdir, storage.DATA_FILE), data)
+    previous_cwd = os.getcwd()
+    environment = {
+        "OPENAI_API_KEY": "fake-key",
+        "OPENAI_BASE_URL": llm.base_url,
+        "PASSWORD_HASH_ITERATIONS": "50000",
+        "SESSION_SECRET": "benchmark",
+    }
+    # 끝나면 환경 변수도 원래 값으로 (없던 키는 삭제)
+    with mock.patch.dict(os.environ, environment):
+        os.chdir(workdir)
+        try:
+            yield
+        finally:
+            os.chdir(previous_cwd)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 영어 첨삭 앱 성능 측정")
+    parser.add_argument("--scale", choices=sorted(dataset.SCALES), default="small")
+    parser.add_argument("--students", type=int, help="학생 수 (--scale 값을 덮어씀)")
+    parser.add_argument("--submissions", type=int, help="학생당 답변 수 (--scale 값을 덮어씀)")
+    parser.add_argument("--teachers", type=int, help="교사 수 (기본: 학생 25명당 1명)")
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 반복 횟수")
+    parser.add_argument("--csv-rows", type=int, default=10000, help="CSV 가져오기 측정 행 수")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="가짜 LLM 응답 지연 (초)")
+    parser.add_argument("--page-timeout", type=float, default=120.0, help="페이지 실행 제한 시간 (초)")
+    parser.add_argument("--skip-pages", action="store_true", help="AppTest 페이지 측정 생략")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    students, submissions = dataset.SCALES[args.scale]
+    students = args.students or students
+    submissions = args.submissions or submissions
+    output = os.path.abspath(args.output)
+
+    started = time.perf_counter()
+    data = dataset.generate(students=students, submissions=submissions, teachers=args.teachers, seed=args.seed)
+    generate_ms = (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory(prefix="ai_english_bench_") as workdir, \
+            FakeLLMServer(latency=args.llm_latency, seed=args.seed) as llm:
+        bench = Benchmark(args, workdir)
+        bench.record("dataset.generate", summarize([generate_ms]))
+        data_bytes = bench.run_storage(data)
+        bench.run_indexes(data)
+        bench.run_csv_import(data)
+        bench.run_backup_restore(data)
+
+        if args.skip_pages:
+            bench.skip("pages", "--skip-pages")
+        else:
+            with app_environment(workdir, data, llm):
+                bench.run_pages()
+
+        report = {
+            "meta": {
+                "created_at": datetime.datetime.now().isoformat(),
+                "git_commit": git_commit(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "scale": {
+                    "students": students,
+                    "submissions_per_student": submissions,
+                    "teachers": len([u for u in data["users"].values() if u["role"] == "teacher"]),
+                    "teacher_problems": len(data["teacher_problems"]),
+                    "data_bytes": data_bytes,
+                },
+                "repeat": args.repeat,
+                "llm_latency": args.llm_latency,
+                "llm_requests": llm.requests,
+            },
+            "results": bench.results,
+        }
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
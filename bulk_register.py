@@ -0,0 +1,111 @@
+"""
+Bulk student registration from CSV.
+"""
+
+import csv
+import datetime
+import io
+
+from auth import hash_passwords
+
+REQUIRED_COLUMNS = ["username", "name", "password"]
+OPTIONAL_COLUMNS = ["email"]
+MIN_PASSWORD_LENGTH = 6
+
+EXAMPLE_CSV = """username,name,email,password
+student01,김민수,minsu@example.com,welcome01
+student02,이서연,,welcome02"""
+
+
+class RegistrationResult:
+    """일괄 등록 결과 (행별 결과와 등록할 사용자)"""
+
+    def __init__(self):
+        self.rows = []
+        self.users = {}
+
+    @property
+    def registered(self):
+        return len(self.users)
+
+    @property
+    def failed(self):
+        return len(self.rows) - len(self.users)
+
+    def reject(self, username, message):
+        """등록 대기였던 사용자를 실패로 바꿈 (저장 직전 중복이 확인된 경우)"""
+        self.users.pop(username, None)
+        for entry in self.rows:
+            if entry["username"] == username and entry["status"] == "등록":
+                entry["status"] = "실패"
+                entry["message"] = message
+
+    def to_csv(self):
+        """행별 결과를 CSV 문자열로 반환"""
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=["row", "username", "name", "status", "message"])
+        writer.writeheader()
+        writer.writerows(self.rows)
+        return output.getvalue()
+
+
+def read_rows(file):
+    """업로드된 CSV를 읽어 (헤더, 행 목록) 반환"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        rows = list(reader)
+        return reader.fieldnames or [], rows
+    finally:
+        text.detach()
+
+
+def prepare_registration(rows, existing_usernames, created_by, max_workers=None):
+    """행을 검증하고 유효한 학생의 비밀번호를 병렬 해싱해 등록 결과 준비
+
+    Args:
+        rows (list): CSV 행 (dict) 목록
+        existing_usernames: 이미 존재하는 아이디 (집합처럼 in 연산 지원)
+        created_by (str): 등록하는 교사 아이디
+        max_workers (int): 해싱 프로세스 수 (None이면 CPU 수)
+
+    Returns:
+        RegistrationResult: 행별 결과와 저장할 사용자 정보
+    """
+    result = RegistrationResult()
+    seen = set()
+    valid = []
+    for number, row in enumerate(rows, start=2):
+        username = (row.get("username") or "").strip()
+        name = (row.get("name") or "").strip()
+        email = (row.get("email") or "").strip()
+        password = row.get("password") or ""
+        entry = {"row": number, "username": username, "name": name, "status": "실패", "message": ""}
+        result.rows.append(entry)
+
+        if not username or not name or not password:
+            entry["message"] = "아이디, 이름, 비밀번호는 필수 입력사항입니다."
+        elif len(password) < MIN_PASSWORD_LENGTH:
+            entry["message"] = f"비밀번호는 최소 {MIN_PASSWORD_LENGTH}자 이상이어야 합니다."
+        elif username in existing_usernames:
+            entry["message"] = "이미 존재하는 아이디입니다."
+        elif username in seen:
+            entry["message"] = "파일 안에서 중복된 아이디입니다."
+        else:
+            seen.add(username)
+            valid.append((entry, email, password))
+
+    created_at = datetime.datetime.now().isoformat()
+    hashed = hash_passwords([password for _, _, password in valid], max_workers=max_workers)
+    for (entry, email, _), password_hash in zip(valid, hashed):
+        result.users[entry["username"]] = {
+            "password": password_hash,
+            "role": "student",
+            "name": entry["name"],
+            "email": email,
+            "created_by": created_by,
+            "created_at": created_at
+        }
+        entry["status"] = "등록"
+        entry["message"] = "등록 대기"
+    return result
@@ -0,0 +1,123 @@
+"""
+Memoized chart building.
+
+Dashboards redraw the same charts on every rerun even when the counts
+behind them have not changed. Charts built here are kept as finished
+Vega-Lite specs (Altair's to_dict(), data included) and DataFrames as
+built, in a bounded LRU cache keyed by a fingerprint of the aggregate
+inputs (chart kind, title and counts). An unchanged dashboard passes the
+cached spec to st.vega_lite_chart and skips pandas and Altair, including
+the to_dict() conversion st.altair_chart would run on every rerun.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import instrumentation
+import lazy
+
+pd = lazy.module("pandas")
+alt = lazy.module("altair")
+
+# 캐시에 보관할 최대 차트/데이터프레임 수
+MAX_ENTRIES = 256
+
+
+def fingerprint(kind, title, data):
+    """차트 종류, 제목, 집계 값으로 만든 캐시 키"""
+    encoded = json.dumps([kind, title, data], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """지문(fingerprint) 기준 LRU 캐시 (프로세스 전체에서 공유)"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """캐시에 있으면 반환, 없으면 build()로 만들어 저장"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+        with instrumentation.timer("chart.build"):
+            value = build()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_cache = ChartCache()
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def category_bar_chart(title, counts):
+    """카테고리별 개수 막대 차트의 Vega-Lite 스펙 (같은 집계면 이전에 만든 스펙 재사용)
+
+    반환된 dict는 공유되므로 st.vega_lite_chart에는 render_spec()으로 복사해 넘깁니다.
+
+    Args:
+        title (str): 차트 제목
+        counts (dict): 카테고리 -> 개수
+    """
+    def build():
+        df = pd.DataFrame({
+            "카테고리": list(counts.keys()),
+            "문제 수": list(counts.values())
+        })
+        return alt.Chart(df).mark_bar().encode(
+            x="문제 수:Q",
+            y=alt.Y("카테고리:N", sort="-x"),
+            color=alt.Color("카테고리:N", legend=None),
+            tooltip=["카테고리", "문제 수"]
+        ).properties(
+            title=title
+        ).to_dict()
+
+    return _cache.get(fingerprint("category_bar", title, sorted(counts.items())), build)
+
+
+def render_spec(spec):
+    """캐시된 스펙의 얕은 복사본 (st.vega_lite_chart가 datasets 키를 떼어 내므로)"""
+    return dict(spec)
+
+
+def series_frame(index_name, value_name, series):
+    """(라벨, 값) 목록을 라벨 인덱스의 DataFrame으로 (st.line_chart용, 캐시됨)"""
+    series = list(series)
+
+    def build():
+        return pd.DataFrame({
+            index_name: [label for label, _ in series],
+            value_name: [value for _, value in series]
+        }).set_index(index_name)
+
+    return _cache.get(fingerprint("series", [index_name, value_name], series), build)
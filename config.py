@@ -0,0 +1,186 @@
+"""
+Configuration snapshot service.
+
+Settings are read from the process environment and the .env file once,
+converted to typed values and kept as an immutable snapshot. As with
+load_dotenv, a variable set in the real environment wins over .env.
+snapshot() re-checks the .env modification time at most every
+CHECK_INTERVAL seconds and reloads only when the file changed, so a
+Streamlit rerun does no configuration disk I/O. update() rewrites the
+changed keys' lines of .env atomically and swaps in the new snapshot
+right away.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from dotenv import dotenv_values
+
+ENV_FILE = ".env"
+
+# .env 수정 시각을 다시 확인하는 최소 간격 (초)
+CHECK_INTERVAL = 2.0
+
+# 설정 이름: (환경 변수, 타입, 기본값)
+FIELDS = {
+    "openai_api_key": ("OPENAI_API_KEY", str, ""),
+    "gemini_api_key": ("GEMINI_API_KEY", str, ""),
+    "google_api_key": ("GOOGLE_API_KEY", str, ""),
+    "openai_base_url": ("OPENAI_BASE_URL", str, ""),
+    "openai_model": ("OPENAI_MODEL", str, "gpt-3.5-turbo"),
+    "gemini_model": ("GEMINI_MODEL", str, "gemini-pro"),
+    "llm_timeout": ("LLM_TIMEOUT_SECONDS", float, 60.0),
+    "llm_max_retries": ("LLM_MAX_RETRIES", int, 2),
+    "llm_concurrency": ("LLM_MAX_CONCURRENCY", int, 8),
+    "password_hash_iterations": ("PASSWORD_HASH_ITERATIONS", int, None),
+    "password_hash_target_ms": ("PASSWORD_HASH_TARGET_MS", float, None),
+    "session_secret": ("SESSION_SECRET", str, ""),
+    "session_ttl_hours": ("SESSION_TTL_HOURS", float, 12.0),
+    "metrics_port": ("METRICS_PORT", int, None),
+    "metrics_host": ("METRICS_HOST", str, "127.0.0.1"),
+    "memory_alert_mb": ("MEMORY_ALERT_MB", float, 1024.0),
+    "session_memory_alert_mb": ("SESSION_MEMORY_ALERT_MB", float, 64.0),
+    "memory_sample_seconds": ("MEMORY_SAMPLE_SECONDS", float, 60.0),
+    "data_watch_seconds": ("DATA_WATCH_SECONDS", float, 2.0),
+    "live_update_seconds": ("LIVE_UPDATE_SECONDS", float, 5.0),
+    "save_delay_seconds": ("SAVE_DELAY_SECONDS", float, 0.5),
+    "save_max_delay_seconds": ("SAVE_MAX_DELAY_SECONDS", float, 3.0),
+}
+
+
+def _convert(value, kind, default):
+    if value is None:
+        return default
+    if kind is str:
+        return value.strip()
+    try:
+        return kind(value) if value.strip() else default
+    except ValueError:
+        return default
+
+
+class Settings:
+    """한 시점의 설정 값 (읽기 전용)"""
+
+    def __init__(self, values, loaded_at=None):
+        for name, (key, kind, default) in FIELDS.items():
+            object.__setattr__(self, name, _convert(values.get(key), kind, default))
+        object.__setattr__(self, "loaded_at", loaded_at or time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings는 읽기 전용입니다. ConfigService.update()를 사용하세요.")
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+
+class ConfigService:
+    """설정 스냅샷을 제공하고 .env 변경을 감시"""
+
+    def __init__(self, path=ENV_FILE, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.reload_count = 0
+        self._mtime = None
+        self._checked_at = 0.0
+        self._settings = None
+        self.reload()
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _file_values(self):
+        if not os.path.exists(self.path):
+            return {}
+        return {key: value for key, value in dotenv_values(self.path).items() if value is not None}
+
+    def reload(self):
+        """.env와 환경 변수를 읽어 새 스냅샷 생성 (환경 변수가 우선)"""
+        with self.lock:
+            mtime = self._file_mtime()
+            values = self._file_values()
+            values.update({key: os.environ[key] for key, _, _ in FIELDS.values() if key in os.environ})
+            self._settings = Settings(values)
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+            self.reload_count += 1
+            return self._settings
+
+    def snapshot(self):
+        """현재 설정 (check_interval마다 한 번만 .env 수정 시각 확인)"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._file_mtime() != self._mtime:
+                return self.reload()
+        return self._settings
+
+    def update(self, changes):
+        """.env의 일부 키를 원자적으로 바꾸고 새 스냅샷 반환
+
+        바꾸는 키의 줄만 고쳐 쓰고, 다른 줄(주석, 빈 줄 포함)은 그대로 둡니다.
+        같은 이름의 환경 변수가 있으면 스냅샷에는 계속 환경 변수 값이 쓰입니다.
+
+        Args:
+            changes (dict): 환경 변수 이름 -> 새 값 (다른 키는 그대로 유지)
+        """
+        changes = {key: "" if value is None else str(value) for key, value in changes.items()}
+        with self.lock:
+            lines = []
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    lines = f.read().splitlines(keepends=True)
+            written = set()
+            result = []
+            for line in lines:
+                key = _line_key(line)
+                if key not in changes:
+                    result.append(line)
+                elif key not in written:
+                    # 같은 키가 여러 번 있으면 첫 줄만 바꾸고 나머지는 지움
+                    result.append(f"{key}={_quote(changes[key])}\n")
+                    written.add(key)
+            if result and not result[-1].endswith("\n"):
+                result[-1] += "\n"
+            result += [f"{key}={_quote(value)}\n" for key, value in changes.items() if key not in written]
+            _write_text_atomic(self.path, "".join(result))
+        return self.reload()
+
+
+def _line_key(line):
+    """.env 한 줄의 키 (주석이나 빈 줄이면 None)"""
+    text = line.strip()
+    if not text or text.startswith("#") or "=" not in text:
+        return None
+    key = text.split("=", 1)[0].strip()
+    if key.startswith("export "):
+        key = key[len("export "):].strip()
+    return key
+
+
+def _quote(value):
+    if value == "" or all(ch.isalnum() or ch in "-_./:@+" for ch in value):
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _write_text_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(prefix=".env_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # API 키가 들어 있으므로 소유자만 읽을 수 있게
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
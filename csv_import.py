@@ -0,0 +1,117 @@
+"""
+Chunked CSV problem import with column-wise (vectorized) validation.
+"""
+
+import datetime
+import pandas as pd
+
+REQUIRED_COLUMNS = ["name", "category", "question", "context"]
+OPTIONAL_COLUMNS = {"example": "", "level": "초급(중)"}
+
+# 한 번에 읽을 행 수
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class ImportResult:
+    """CSV 검증 결과 (저장 전 대기 중인 문제 포함)"""
+
+    def __init__(self):
+        self.problems = {}
+        self.total_rows = 0
+        self.invalid_rows = 0
+        self.duplicate_rows = 0
+        self.preview = None
+
+    @property
+    def skipped(self):
+        return self.invalid_rows + self.duplicate_rows
+
+
+def missing_columns(file):
+    """필수 열 중 CSV 헤더에 없는 열 목록"""
+    header = pd.read_csv(file, nrows=0)
+    file.seek(0)
+    return [col for col in REQUIRED_COLUMNS if col not in header.columns]
+
+
+def _clean_chunk(chunk):
+    """필요한 열만 남기고 공백 제거, 선택 열 기본값 채우기"""
+    cleaned = pd.DataFrame(index=chunk.index)
+    for col in REQUIRED_COLUMNS:
+        cleaned[col] = chunk[col].fillna("").astype(str).str.strip()
+    for col, default in OPTIONAL_COLUMNS.items():
+        if col in chunk.columns:
+            values = chunk[col].fillna("").astype(str).str.strip()
+            cleaned[col] = values.where(values != "", default) if default else values
+        else:
+            cleaned[col] = default
+    return cleaned
+
+
+def validate_csv(file, existing_keys, created_by, chunksize=DEFAULT_CHUNK_SIZE,
+                 preview_rows=20, progress=None):
+    """CSV를 청크 단위로 읽어 검증하고 저장할 문제를 모음
+
+    Args:
+        file: 업로드된 파일 객체 (seek/tell 지원)
+        existing_keys: 이미 존재하는 문제 키 집합
+        created_by (str): 출제 교사 아이디
+        chunksize (int): 한 번에 읽을 행 수
+        preview_rows (int): 미리보기에 포함할 최대 행 수
+        progress (callable): 0.0-1.0 진행률을 받는 함수
+
+    Returns:
+        ImportResult: 검증 결과
+    """
+    result = ImportResult()
+    seen = set(existing_keys)
+    created_at = datetime.datetime.now().isoformat()
+    file.seek(0, 2)
+    size = file.tell() or 1
+    file.seek(0)
+    samples = []
+
+    reader = pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunksize)
+    for chunk in reader:
+        result.total_rows += len(chunk)
+        cleaned = _clean_chunk(chunk)
+
+        # 필수 필드가 비어 있는 행 제외
+        valid = (cleaned[REQUIRED_COLUMNS] != "").all(axis=1)
+        result.invalid_rows += int((~valid).sum())
+        cleaned = cleaned[valid]
+
+        # 기존 문제 및 파일 내 중복 제외
+        keys = cleaned["category"] + "/" + cleaned["name"]
+        fresh = ~keys.isin(seen) & ~keys.duplicated()
+        result.duplicate_rows += int((~fresh).sum())
+        cleaned = cleaned[fresh]
+        keys = keys[fresh]
+        seen.update(keys)
+
+        for key, category, question, context, example, level in zip(
+            keys, cleaned["category"], cleaned["question"], cleaned["context"],
+            cleaned["example"], cleaned["level"]
+        ):
+            result.problems[key] = {
+                "category": category,
+                "question": question,
+                "context": context,
+                "example": example,
+                "level": level,
+                "created_by": created_by,
+                "created_at": created_at
+            }
+
+        # 각 청크에서 고르게 미리보기 표본 추출
+        sampled = sum(len(sample) for sample in samples)
+        if sampled < preview_rows and len(cleaned):
+            take = min(len(cleaned), max(1, preview_rows // 4), preview_rows - sampled)
+            samples.append(cleaned.sample(n=take, random_state=0) if len(cleaned) > take else cleaned)
+
+        if progress is not None:
+            progress(min(file.tell() / size, 1.0))
+
+    if samples:
+        result.preview = pd.concat(samples).head(preview_rows)
+    return result
@@ -0,0 +1,353 @@
+"""
+Process-wide shared data store for users, teacher problems and records.
+
+One DataStore per server process holds the contents of users_data.json,
+so memory grows with the dataset instead of sessions x dataset; each
+Streamlit session keeps only its identity and UI state. Writes happen
+under a lock and are copy-on-write: the top-level dicts (and the student
+record being changed) are replaced rather than mutated, so a session
+iterating the previous dict on another thread never sees it change.
+
+The price is paid on writes: every change makes a shallow copy of the
+top-level dict it touches (one pointer per user or student, not a copy
+of the records), and a new submission also copies that student's record
+and answer list. That is cheap next to the JSON save that follows, but
+it grows with the number of users, so bulk changes should go through
+put_users()/put_records() rather than one call per entity.
+
+Derived structures (data index, search index, grading queue, recommender)
+live here too, shared by all sessions and updated incrementally by the
+writer. ScopedView limits what one logged-in user can read.
+
+Every change bumps a version number and is recorded in a short change
+feed with topics ("users", "problems", "records:<student>", or "*" for a
+full reload), so sessions can cheaply ask what changed since the version
+they last rendered. A watcher thread reloads the file when another
+process replaces it.
+
+save() does not write the file itself: it asks a storage.WriteBehind to
+write the whole snapshot in the background. Because writes are
+copy-on-write, a snapshot taken under the lock is never mutated
+afterwards and can be serialized without holding it.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import storage
+
+# 변경 피드에 남길 최근 변경 수 (이보다 오래 보지 않은 세션은 전체 변경으로 처리)
+CHANGE_HISTORY = 1000
+
+# 모든 것이 바뀌었음을 뜻하는 변경 주제 (파일 다시 읽기, 복원)
+ALL = "*"
+
+def new_record():
+    """빈 학생 기록"""
+    return {"solved_problems": [], "total_problems": 0, "feedback_history": []}
+
+
+class DataStore:
+    """프로세스 전체에서 공유하는 데이터 (반환된 dict는 읽기 전용으로 다룸)"""
+
+    def __init__(self, path=storage.DATA_FILE, save_delay=0.0, save_max_delay=3.0, on_save=None, on_save_error=None):
+        """
+        Args:
+            save_delay (float): 저장 요청을 모으는 시간 (초, 0이면 save()가 바로 기록)
+            save_max_delay (float): 첫 저장 요청 후 늦어도 이 시간 안에 기록
+            on_save (callable): 기록 후 on_save(소요 초, 바이트 수, 병합된 요청 수) 호출
+            on_save_error (callable): 기록 실패 시 on_save_error(예외) 호출
+        """
+        self.path = os.path.abspath(path)
+        self.lock = threading.RLock()
+        self.version = 0
+        self.mtime = None
+        self.users = {}
+        self.teacher_problems = {}
+        self.student_records = {}
+        self._derived = {}
+        self.changes = deque(maxlen=CHANGE_HISTORY)
+        self._origin = None
+        self._watcher = None
+        self._on_save = on_save
+        self.writer = storage.WriteBehind(
+            path, self.snapshot, delay=save_delay, max_delay=save_max_delay,
+            on_flush=self._saved, on_error=on_save_error
+        )
+
+    # 파일
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def load(self, force=False):
+        """파일이 바뀌었으면 다시 읽음 (다시 읽었으면 True)
+
+        아직 기록하지 않은 변경이 있으면 다시 읽지 않습니다 (곧 그 변경으로 덮어씀).
+        """
+        mtime = self._file_mtime()
+        if not force and mtime == self.mtime:
+            return False
+        with self.writer.io_lock, self.lock:
+            mtime = self._file_mtime()
+            if not force and (mtime == self.mtime or self.writer.pending):
+                return False
+            data = storage.read_json(self.path) if mtime is not None else {}
+            self._replace(data, mtime)
+            return True
+
+    def restore(self, commit):
+        """commit()이 파일을 통째로 바꾸는 동안 다른 기록을 막고, 돌려준 데이터로 교체
+
+        기록 대기 중인 변경은 버립니다 (복원된 파일을 덮어쓰지 않도록).
+        """
+        with self.writer.io_lock, self.lock:
+            self.writer.discard()
+            data = commit()
+            self._replace(data, self._file_mtime())
+            return data
+
+    def _replace(self, data, mtime):
+        self.users = data.get("users", {})
+        self.teacher_problems = data.get("teacher_problems", {})
+        self.student_records = data.get("student_records", {})
+        self.mtime = mtime
+        self._derived = {}
+        self._changed(ALL)
+
+    def snapshot(self):
+        """현재 데이터 (users_data.json 구조, 읽기 전용)"""
+        with self.lock:
+            return {
+                "teacher_problems": self.teacher_problems,
+                "student_records": self.student_records,
+                "users": self.users,
+            }
+
+    def save(self):
+        """지금까지의 변경 저장 요청 (save_delay가 0이면 바로 기록하고 바이트 수 반환)
+
+        write() 구간 밖에서 호출해야 합니다 (기록 중인 저장 스레드와 잠금 순서가 엇갈리지 않도록).
+        """
+        return self.writer.mark_dirty()
+
+    def flush(self):
+        """기록 대기 중인 변경을 지금 기록 (테스트, 종료 시)"""
+        return self.writer.flush()
+
+    def _saved(self, seconds, size, requests):
+        # 직접 기록한 파일은 다시 읽을 필요가 없음 (io_lock 안에서 호출됨)
+        with self.lock:
+            self.mtime = self._file_mtime()
+        if self._on_save:
+            self._on_save(seconds, size, requests)
+
+    def watch(self, interval=2.0):
+        """다른 프로세스가 파일을 바꾸면 다시 읽는 감시 스레드 시작 (한 번만)"""
+        with self.lock:
+            if self._watcher is not None or not interval:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="data-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.load()
+            except (OSError, ValueError):
+                # 교체 중인 파일을 읽은 경우 등 - 다음 확인 때 다시 시도
+                pass
+
+    # 변경 피드
+    def _changed(self, topic):
+        self.version += 1
+        self.changes.append((self.version, topic, self._origin))
+
+    def changes_since(self, version, exclude_origin=None):
+        """version 이후 바뀐 주제 집합 (exclude_origin이 만든 변경 제외)
+
+        피드에 남아 있지 않을 만큼 오래된 version이면 {ALL}을 반환합니다.
+        """
+        with self.lock:
+            if version >= self.version:
+                return set()
+            if not self.changes or self.changes[0][0] > version + 1:
+                return {ALL}
+            return {
+                topic for changed, topic, origin in self.changes
+                if changed > version and (origin is None or origin != exclude_origin)
+            }
+
+    # 읽기
+    def user(self, username):
+        return self.users.get(username)
+
+    def records_of(self, username):
+        """학생 기록 (없으면 새 빈 기록 - 공유되지 않으므로 고쳐도 저장소에는 영향 없음)"""
+        return self.student_records.get(username) or new_record()
+
+    def view(self, username, role):
+        return ScopedView(self, username, role)
+
+    # 파생 구조 (모든 세션이 공유)
+    def derived(self, name, build):
+        """이름별 파생 구조 반환 (없으면 build()로 구성)"""
+        value = self._derived.get(name)
+        if value is None:
+            with self.lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = build()
+                    self._derived[name] = value
+        return value
+
+    def peek_derived(self, name):
+        """이미 구성된 파생 구조 (없으면 None, 증분 갱신용)"""
+        return self._derived.get(name)
+
+    def drop_derived(self, *names):
+        """파생 구조를 버림 (이름이 없으면 전부) - 다음 사용 시 다시 구성"""
+        with self.lock:
+            for name in names or list(self._derived):
+                self._derived.pop(name, None)
+
+    # 쓰기 (copy-on-write)
+    @contextmanager
+    def write(self, origin=None):
+        """여러 변경과 파생 구조 갱신을 한 번에 하는 쓰기 구간 (다른 쓰기와 구성을 막음)
+
+        origin(세션 식별자)을 주면 변경 피드에 기록되어, 그 세션은 자신이
+        만든 변경을 다른 세션의 변경으로 보지 않습니다.
+        """
+        with self.lock:
+            previous, self._origin = self._origin, origin
+            try:
+                yield self
+            finally:
+                self._origin = previous
+
+    def put_user(self, username, user_data):
+        with self.lock:
+            self.users = {**self.users, username: user_data}
+            self._changed("users")
+
+    def put_users(self, users):
+        """여러 사용자를 한 번의 교체로 추가"""
+        with self.lock:
+            self.users = {**self.users, **users}
+            self._changed("users")
+
+    def update_user(self, username, **changes):
+        """사용자 정보 일부 변경 (새 dict로 교체) 후 반환"""
+        with self.lock:
+            user_data = {**self.users[username], **changes}
+            self.users = {**self.users, username: user_data}
+            self._changed("users")
+            return user_data
+
+    def remove_user(self, username):
+        with self.lock:
+            users = dict(self.users)
+            removed = users.pop(username, None)
+            self.users = users
+            self._changed("users")
+            return removed
+
+    def put_problems(self, problems):
+        with self.lock:
+            self.teacher_problems = {**self.teacher_problems, **problems}
+            self._changed("problems")
+
+    def remove_problem(self, key):
+        with self.lock:
+            problems = dict(self.teacher_problems)
+            removed = problems.pop(key, None)
+            self.teacher_problems = problems
+            self._changed("problems")
+            return removed
+
+    def put_record(self, username, record):
+        with self.lock:
+            self.student_records = {**self.student_records, username: record}
+            self._changed(record_topic(username))
+
+    def put_records(self, records):
+        """여러 학생 기록을 한 번의 교체로 저장"""
+        with self.lock:
+            self.student_records = {**self.student_records, **records}
+            for username in records:
+                self._changed(record_topic(username))
+
+    def remove_record(self, username):
+        with self.lock:
+            records = dict(self.student_records)
+            removed = records.pop(username, None)
+            self.student_records = records
+            self._changed(record_topic(username))
+            return removed
+
+    def append_submission(self, username, submission):
+        """학생 답변 추가 후 그 답변의 위치 반환
+
+        그 학생의 기록과 답변 목록, student_records의 최상위 dict만 얕게 복사합니다.
+        """
+        with self.lock:
+            record = self.student_records.get(username) or new_record()
+            solved = record.get("solved_problems", []) + [submission]
+            self.put_record(username, {**record, "solved_problems": solved, "total_problems": record.get("total_problems", 0) + 1})
+            return len(solved) - 1
+
+    def update_submission(self, username, index, **changes):
+        """학생 답변 일부 변경 (새 dict로 교체) 후 반환"""
+        with self.lock:
+            record = self.student_records[username]
+            solved = list(record["solved_problems"])
+            solved[index] = {**solved[index], **changes}
+            self.put_record(username, {**record, "solved_problems": solved})
+            return solved[index]
+
+
+def record_topic(username):
+    """학생 기록 변경 주제"""
+    return f"records:{username}"
+
+
+class ScopedView:
+    """로그인한 사용자 한 명이 읽을 수 있는 범위
+
+    학생은 자신의 기록만, 교사는 자신이 등록한 학생의 기록만, 관리자는
+    모든 기록을 읽을 수 있습니다.
+    """
+
+    def __init__(self, store, username, role):
+        self.store = store
+        self.username = username
+        self.role = role
+
+    def profile(self):
+        return self.store.user(self.username) or {}
+
+    def can_read(self, student):
+        if self.role == "admin":
+            return True
+        if self.role == "student":
+            return student == self.username
+        if self.role == "teacher":
+            return (self.store.user(student) or {}).get("created_by") == self.username
+        return False
+
+    def records(self, student=None):
+        """학생 기록 (student가 없으면 자신의 기록)"""
+        student = student or self.username
+        if not self.can_read(student):
+            raise PermissionError(f"{self.username}은(는) {student}의 기록을 볼 수 없습니다.")
+        return self.store.records_of(student)
+
+    def submission(self, student, index):
+        return self.records(student)["solved_problems"][index]
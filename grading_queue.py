@@ -0,0 +1,101 @@
+"""
+Cross-student grading queue indexed by teacher, status and submission time.
+"""
+
+import bisect
+
+UNGRADED = "ungraded"
+GRADED = "graded"
+
+
+def submission_status(submission):
+    """교사 채점 여부에 따른 상태"""
+    return GRADED if "teacher_feedback" in submission else UNGRADED
+
+
+class GradingQueue:
+    """교사별/상태별로 제출 시각 순서를 유지하는 채점 대기열
+
+    항목 키는 (학생 아이디, 답변 인덱스)이며, 각 (교사, 상태) 버킷은
+    (제출 시각, 학생 아이디, 답변 인덱스) 튜플의 정렬된 리스트입니다.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, users, student_records):
+        """전체 학생 기록으로 대기열을 다시 구성"""
+        self.__init__()
+        for student, record in student_records.items():
+            teacher = users.get(student, {}).get("created_by")
+            for index, submission in enumerate(record.get("solved_problems", [])):
+                self.add(student, index, submission, teacher)
+
+    def add(self, student, index, submission, teacher):
+        """답변 추가 (이미 있으면 갱신)"""
+        self.remove(student, index)
+        status = submission_status(submission)
+        item = (submission.get("timestamp", "") or "", student, index)
+        bisect.insort(self.buckets.setdefault((teacher, status), []), item)
+        self._entries[(student, index)] = (teacher, status, item)
+
+    def remove(self, student, index):
+        """답변 제거"""
+        entry = self._entries.pop((student, index), None)
+        if entry is None:
+            return
+        teacher, status, item = entry
+        bucket = self.buckets[(teacher, status)]
+        position = bisect.bisect_left(bucket, item)
+        if position < len(bucket) and bucket[position] == item:
+            del bucket[position]
+
+    def remove_student(self, student):
+        """학생의 모든 답변 제거"""
+        for key in [key for key in self._entries if key[0] == student]:
+            self.remove(*key)
+
+    def mark(self, student, index, submission):
+        """채점 등으로 상태가 바뀐 답변 갱신"""
+        entry = self._entries.get((student, index))
+        if entry is not None:
+            self.add(student, index, submission, entry[0])
+
+    def items(self, teacher, status=None, student=None):
+        """교사의 답변 키 목록 (제출 시각 순, 상태/학생 조건 선택)"""
+        statuses = [status] if status else [UNGRADED, GRADED]
+        merged = []
+        for item_status in statuses:
+            merged.extend(self.buckets.get((teacher, item_status), []))
+        if len(statuses) > 1:
+            merged.sort()
+        return [(item[1], item[2]) for item in merged if student is None or item[1] == student]
+
+    def counts(self, teacher):
+        """교사의 상태별 답변 수"""
+        return {
+            UNGRADED: len(self.buckets.get((teacher, UNGRADED), [])),
+            GRADED: len(self.buckets.get((teacher, GRADED), [])),
+        }
+
+    def status_of(self, student, index):
+        entry = self._entries.get((student, index))
+        return entry[1] if entry else None
+
+    def next_ungraded(self, teacher, after=None):
+        """현재 답변 다음으로 제출된 미채점 답변 키 (없으면 처음부터 다시 탐색)"""
+        bucket = self.buckets.get((teacher, UNGRADED), [])
+        if not bucket:
+            return None
+        position = 0
+        if after is not None and after in self._entries:
+            position = bisect.bisect_right(bucket, self._entries[after][2])
+        for item in bucket[position:] + bucket[:position]:
+            key = (item[1], item[2])
+            if key != after:
+                return key
+        return None
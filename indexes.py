@@ -0,0 +1,155 @@
+"""
+In-memory secondary indexes over users and teacher problems.
+"""
+
+
+def _ordered_add(bucket, key):
+    """순서를 유지하는 집합(dict)에 키 추가"""
+    bucket[key] = None
+
+
+def _ordered_discard(index, bucket_key, key):
+    """버킷에서 키를 제거하고 비어 있으면 버킷도 제거"""
+    bucket = index.get(bucket_key)
+    if bucket is None:
+        return
+    bucket.pop(key, None)
+    if not bucket:
+        del index[bucket_key]
+
+
+def _intersect(buckets):
+    """여러 버킷의 교집합을 가장 작은 버킷의 순서대로 반환"""
+    if not buckets:
+        return []
+    buckets = sorted(buckets, key=len)
+    smallest, rest = buckets[0], buckets[1:]
+    return [key for key in smallest if all(key in bucket for bucket in rest)]
+
+
+class DataIndex:
+    """사용자(등록자/역할)와 문제(출제자/카테고리/난이도)에 대한 보조 인덱스
+
+    각 버킷은 삽입 순서를 유지하는 dict(값은 None)로, 화면에 표시되는
+    순서가 원본 데이터의 순서와 같도록 합니다.
+    """
+
+    def __init__(self):
+        self.users_by_creator = {}
+        self.users_by_role = {}
+        self.problems_by_creator = {}
+        self.problems_by_category = {}
+        self.problems_by_level = {}
+        # 학생이 풀 수 있는 문제 (question이 있는 문제, AI 생성 문제 세트 제외)
+        self.solvable_problems = {}
+        # 갱신/삭제 시 이전 버킷을 찾기 위한 역방향 정보
+        self._user_entries = {}
+        self._problem_entries = {}
+
+    def rebuild(self, users, teacher_problems):
+        """전체 데이터로 인덱스를 다시 구성"""
+        self.__init__()
+        for username, user_data in users.items():
+            self.add_user(username, user_data)
+        for key, problem in teacher_problems.items():
+            self.add_problem(key, problem)
+
+    # 사용자 인덱스
+    def add_user(self, username, user_data):
+        """사용자 추가 (이미 있으면 갱신)"""
+        self.remove_user(username)
+        role = user_data.get("role")
+        creator = user_data.get("created_by")
+        _ordered_add(self.users_by_role.setdefault(role, {}), username)
+        _ordered_add(self.users_by_creator.setdefault(creator, {}), username)
+        self._user_entries[username] = (role, creator)
+
+    def remove_user(self, username):
+        """사용자 제거"""
+        entry = self._user_entries.pop(username, None)
+        if entry is None:
+            return
+        role, creator = entry
+        _ordered_discard(self.users_by_role, role, username)
+        _ordered_discard(self.users_by_creator, creator, username)
+
+    # 문제 인덱스
+    def add_problem(self, key, problem):
+        """문제 추가 (이미 있으면 갱신)"""
+        self.remove_problem(key)
+        creator = problem.get("created_by")
+        category = problem.get("category", "기타")
+        level = problem.get("level")
+        _ordered_add(self.problems_by_creator.setdefault(creator, {}), key)
+        _ordered_add(self.problems_by_category.setdefault(category, {}), key)
+        _ordered_add(self.problems_by_level.setdefault(level, {}), key)
+        if problem.get("question"):
+            _ordered_add(self.solvable_problems, key)
+        self._problem_entries[key] = (creator, category, level)
+
+    def remove_problem(self, key):
+        """문제 제거"""
+        entry = self._problem_entries.pop(key, None)
+        if entry is None:
+            return
+        creator, category, level = entry
+        _ordered_discard(self.problems_by_creator, creator, key)
+        _ordered_discard(self.problems_by_category, category, key)
+        _ordered_discard(self.problems_by_level, level, key)
+        self.solvable_problems.pop(key, None)
+
+    # 조회 API
+    def users(self, role=None, created_by=None):
+        """역할/등록자 조건에 맞는 사용자 아이디 목록"""
+        buckets = []
+        if role is not None:
+            buckets.append(self.users_by_role.get(role, {}))
+        if created_by is not None:
+            buckets.append(self.users_by_creator.get(created_by, {}))
+        if not buckets:
+            return list(self._user_entries)
+        return _intersect(buckets)
+
+    def students_of(self, teacher):
+        """교사가 등록한 학생 아이디 목록"""
+        return self.users(role="student", created_by=teacher)
+
+    def role_counts(self):
+        """역할별 사용자 수"""
+        return {role: len(bucket) for role, bucket in self.users_by_role.items()}
+
+    def problems(self, created_by=None, category=None, level=None, solvable=False):
+        """출제자/카테고리/난이도 조건에 맞는 문제 키 목록 (solvable이면 풀 수 있는 문제만)"""
+        buckets = []
+        if solvable:
+            buckets.append(self.solvable_problems)
+        if created_by is not None:
+            buckets.append(self.problems_by_creator.get(created_by, {}))
+        if category is not None:
+            buckets.append(self.problems_by_category.get(category, {}))
+        if level is not None:
+            buckets.append(self.problems_by_level.get(level, {}))
+        if not buckets:
+            return list(self._problem_entries)
+        return _intersect(buckets)
+
+    def is_solvable(self, key):
+        """학생이 풀 수 있는 문제인지 (question이 있는지)"""
+        return key in self.solvable_problems
+
+    def categories(self, created_by=None, solvable=False):
+        """문제가 있는 카테고리 목록 (출제자 조건, solvable이면 풀 수 있는 문제의 카테고리만)"""
+        if created_by is None and not solvable:
+            return list(self.problems_by_category)
+        categories = {}
+        for key in self.problems(created_by=created_by, solvable=solvable):
+            _ordered_add(categories, self._problem_entries[key][1])
+        return list(categories)
+
+    def category_counts(self):
+        """카테고리별 문제 수"""
+        return {category: len(bucket) for category, bucket in self.problems_by_category.items()}
+
+    def count_problems(self, created_by):
+        """출제자별 문제 수"""
+        return len(self.problems_by_creator.get(created_by, {}))
@@ -0,0 +1,140 @@
+"""
+Per-rerun timing instrumentation and single-run profiling.
+
+Each Streamlit session runs its script on its own thread, so timings are
+collected in a thread-local list that begin_run() resets at the start of
+every script run (and at the start of a fragment rerun, which does not
+run the script). timer() and timed() record how long a block or function
+took; end_run() returns the breakdown and keeps it in a small
+process-wide history so an admin can look at slow runs from other
+sessions. Profiler wraps cProfile for capturing one whole rerun.
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 최근 실행 기록 보관 개수 (프로세스 전체)
+HISTORY_SIZE = 100
+
+_local = threading.local()
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+
+
+def begin_run(label=None):
+    """스크립트 실행 시작 (이전 실행의 측정값 초기화)"""
+    _local.started = time.perf_counter()
+    _local.label = label
+    _local.timings = []
+    _local.active = True
+
+
+def in_run():
+    """시작한 실행이 아직 끝나지 않았는지 (프래그먼트가 전체 실행의 일부로 도는지 판단)"""
+    return getattr(_local, "active", False)
+
+
+def set_label(label):
+    """현재 실행의 이름 (예: teacher/채점 및 첨삭)"""
+    _local.label = label
+
+
+def current_label():
+    return getattr(_local, "label", None)
+
+
+def _timings():
+    if not hasattr(_local, "timings"):
+        begin_run()
+    return _local.timings
+
+
+@contextmanager
+def timer(name):
+    """with 블록의 실행 시간을 현재 실행의 측정값에 추가"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings().append((name, (time.perf_counter() - started) * 1000))
+
+
+def timed(name):
+    """함수 실행 시간을 측정하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def breakdown():
+    """현재 실행의 이름별 (이름, 호출 수, 합계 ms) 목록 (합계가 큰 순)"""
+    totals = {}
+    for name, elapsed in _timings():
+        count, total = totals.get(name, (0, 0.0))
+        totals[name] = (count + 1, total + elapsed)
+    return sorted(((name, count, total) for name, (count, total) in totals.items()), key=lambda row: -row[2])
+
+
+def end_run(label=None):
+    """현재 실행을 마치고 요약을 기록 후 반환"""
+    summary = {
+        "label": label or getattr(_local, "label", None),
+        "finished_at": time.time(),
+        "total_ms": (time.perf_counter() - getattr(_local, "started", time.perf_counter())) * 1000,
+        "breakdown": breakdown(),
+    }
+    _local.active = False
+    with _history_lock:
+        _history.append(summary)
+    return summary
+
+
+def history(label=None):
+    """최근 실행 요약 목록 (최신 순, label로 거를 수 있음)"""
+    with _history_lock:
+        runs = list(_history)
+    runs.reverse()
+    return [run for run in runs if label is None or run["label"] == label]
+
+
+class Profiler:
+    """스크립트 한 번의 실행을 cProfile로 기록"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+
+    def report(self, limit=40, sort="cumulative"):
+        """상위 함수 통계 텍스트"""
+        output = io.StringIO()
+        pstats.Stats(self.profile, stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def dump(self):
+        """pstats/snakeviz 등에서 열 수 있는 .prof 파일 내용"""
+        handle, path = tempfile.mkstemp(suffix=".prof")
+        os.close(handle)
+        try:
+            self.profile.dump_stats(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
@@ -0,0 +1,78 @@
+"""
+Deferred imports for heavy modules.
+
+module("pandas") returns a placeholder that imports pandas the first time
+an attribute is accessed, so a page that never draws a table or calls an
+LLM never pays for the import. Import durations are recorded in
+IMPORT_TIMES for the startup report in the admin system info page.
+"""
+
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# 모듈 이름 -> 실제 임포트에 걸린 시간 (밀리초)
+IMPORT_TIMES = {}
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """처음 속성에 접근할 때 실제 모듈을 불러오는 자리 표시자"""
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+
+    def _load(self):
+        with _lock:
+            if self._module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self._name)
+                if self._on_load is not None:
+                    self._on_load(module)
+                IMPORT_TIMES[self._name] = (time.perf_counter() - started) * 1000
+                self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        return getattr(self._module or self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def module(name, on_load=None):
+    return LazyModule(name, on_load)
+
+
+def measure_import_times(modules, limit=15):
+    """새 프로세스에서 python -X importtime으로 모듈 임포트 시간 측정
+
+    Returns:
+        list: 누적 시간이 큰 순서의 (모듈 이름, 자체 시간 ms, 누적 시간 ms)
+    """
+    statement = "; ".join(f"import {name}" for name in modules)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, timeout=120
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+    if completed.returncode != 0 and not rows:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "임포트 실패")
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:limit]
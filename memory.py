@@ -0,0 +1,186 @@
+"""
+Memory diagnostics: per-session state size, process RSS and tracemalloc.
+
+Whatever a session keeps in st.session_state is multiplied by the number
+of concurrent sessions, so it is worth watching. SessionMemoryRegistry
+collects a deep size of each session's state (sampled at most once per
+interval, since walking every record is not free) so an admin can see
+which sessions and which keys use the memory.
+AllocationTracker wraps tracemalloc to compare allocations between two
+snapshots taken on different reruns.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+# 내용까지 따라가지 않는 객체 (모듈이나 함수를 따라가면 프로그램 전체를 세게 됨)
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+# 이 시간 동안 측정되지 않은 세션은 종료된 것으로 보고 목록에서 뺌 (초)
+SESSION_EXPIRY = 1800
+
+
+def deep_sizeof(obj, seen=None):
+    """obj와 그 안의 dict/list/tuple/set 내용까지 합친 크기 (바이트, 같은 객체는 한 번만)"""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, _OPAQUE):
+            stack.append(vars(current))
+    return total
+
+
+def state_sizes(items):
+    """(키, 값) 목록의 키별 크기 {키: 바이트} (키 사이에 공유되는 객체는 처음 키에만 계산)"""
+    seen = set()
+    return {str(key): deep_sizeof(value, seen) for key, value in items}
+
+
+def process_rss():
+    """현재 프로세스의 실제 메모리 사용량 (바이트, 알 수 없으면 None)"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # /proc이 없는 환경에서는 최대 사용량으로 대신 (macOS는 바이트, Linux는 KB)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+class SessionMemoryRegistry:
+    """세션별 상태 크기 기록 (프로세스 전체에서 공유)"""
+
+    def __init__(self, sample_interval=60.0, expiry=SESSION_EXPIRY):
+        self.sample_interval = sample_interval
+        self.expiry = expiry
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def due(self, session_id):
+        """이 세션을 다시 측정할 때가 되었는지"""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+        return entry is None or time.time() - entry["measured_at"] >= self.sample_interval
+
+    def record(self, session_id, username, role, sizes, elapsed_ms=None):
+        with self.lock:
+            self.sessions[session_id] = {
+                "session_id": session_id,
+                "username": username,
+                "role": role,
+                "sizes": sizes,
+                "total": sum(sizes.values()),
+                "measured_at": time.time(),
+                "elapsed_ms": elapsed_ms,
+            }
+
+    def forget(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def prune(self):
+        cutoff = time.time() - self.expiry
+        with self.lock:
+            for session_id in [key for key, entry in self.sessions.items() if entry["measured_at"] < cutoff]:
+                del self.sessions[session_id]
+
+    def entries(self):
+        """최근 세션별 측정값 (큰 순)"""
+        self.prune()
+        with self.lock:
+            entries = list(self.sessions.values())
+        return sorted(entries, key=lambda entry: -entry["total"])
+
+    def total(self):
+        return sum(entry["total"] for entry in self.entries())
+
+    def largest(self, limit=15):
+        """모든 세션에서 가장 큰 상태 항목 [(크기, 세션 사용자, 키)]"""
+        rows = [
+            (size, entry["username"] or "-", key)
+            for entry in self.entries()
+            for key, size in entry["sizes"].items()
+        ]
+        return sorted(rows, reverse=True)[:limit]
+
+
+class AllocationTracker:
+    """tracemalloc 스냅샷을 찍어 이전 스냅샷과의 할당 차이 비교"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.previous = None
+        self.previous_at = None
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        with self.lock:
+            self.previous = None
+            self.previous_at = None
+
+    def stop(self):
+        with self.lock:
+            self.previous = None
+            self.previous_at = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def snapshot(self, limit=20):
+        """새 스냅샷을 찍고 (직전 스냅샷과 비교한 상위 할당, 직전 스냅샷 시각) 반환
+
+        직전 스냅샷이 없으면 현재 스냅샷의 상위 할당을 반환합니다.
+        """
+        if not tracemalloc.is_tracing():
+            return [], None
+        current = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        with self.lock:
+            previous, previous_at = self.previous, self.previous_at
+            self.previous, self.previous_at = current, time.time()
+        if previous is None:
+            stats = current.statistics("lineno")[:limit]
+            rows = [(_location(stat), stat.size, stat.size, stat.count) for stat in stats]
+        else:
+            stats = current.compare_to(previous, "lineno")[:limit]
+            rows = [(_location(stat), stat.size, stat.size_diff, stat.count_diff) for stat in stats]
+        return rows, previous_at
+
+    def traced_memory(self):
+        """(현재, 최대) 추적 중인 메모리 (바이트)"""
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.get_traced_memory()
+
+
+def _location(stat):
+    frame = stat.traceback[0]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno}"
@@ -0,0 +1,290 @@
+"""
+Prometheus text-format metrics.
+
+A small in-process registry of counters, gauges and histograms with
+labels, rendered in the Prometheus exposition format (version 0.0.4) and
+served from a background HTTP thread so an existing Prometheus can
+scrape /metrics. Values that already live elsewhere (cache hit counts,
+active login sessions) are read through callbacks at scrape time instead
+of being copied on every rerun.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# LLM 응답은 수 초 단위, 데이터 저장은 수 ms 단위
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+SAVE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """레이블 값 조합별 값을 가진 지표의 공통 부분"""
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블은 {self.labelnames} 이어야 합니다 ({tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(이름 접미사, 레이블 값, 추가 레이블, 값) 목록"""
+        with self.lock:
+            return [("", key, (), value) for key, value in sorted(self.values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counter는 감소할 수 없습니다")
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LLM_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        result = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                result.append(("_bucket", key, (("le", _format_value(bound)),), count))
+            result.append(("_sum", key, (), total))
+            result.append(("_count", key, (), counts[-1]))
+        return result
+
+
+class CallbackMetric(Metric):
+    """수집 시점에 function()이 돌려주는 {레이블 값 튜플: 값}을 내보내는 지표"""
+
+    def __init__(self, name, help, kind, labelnames=(), function=None):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.function = function
+
+    def samples(self):
+        if self.function is None:
+            return []
+        values = self.function()
+        return [("", tuple(str(v) for v in key), (), value) for key, value in sorted(values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self.lock:
+            # 같은 이름은 마지막 등록으로 교체 (앱 모듈이 다시 실행되는 경우)
+            self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # 콜백 하나가 실패해도 나머지 지표는 수집되도록
+                lines.append(f"# {metric.name} 수집 실패: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_LLM_LABELS = ("provider", "model", "purpose")
+
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "LLM 호출 소요 시간 (재시도 포함)", _LLM_LABELS, LLM_BUCKETS))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "llm_tokens_total", "LLM 토큰 수 (direction=prompt|completion)", _LLM_LABELS + ("direction",)))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "llm_errors_total", "실패한 LLM 호출 수", _LLM_LABELS))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "llm_retries_total", "LLM 클라이언트가 자동으로 재시도한 요청 수", _LLM_LABELS))
+STORAGE_SAVE_SECONDS = REGISTRY.register(Histogram(
+    "storage_save_duration_seconds", "users_data.json 저장 소요 시간", (), SAVE_BUCKETS))
+STORAGE_SAVE_BYTES = REGISTRY.register(Counter(
+    "storage_save_bytes_total", "users_data.json에 기록한 바이트 수"))
+STORAGE_SAVE_REQUESTS = REGISTRY.register(Counter(
+    "storage_save_requests_total", "저장 요청 수 (여러 요청이 한 번의 기록으로 모일 수 있음)"))
+STORAGE_SAVE_ERRORS = REGISTRY.register(Counter(
+    "storage_save_errors_total", "실패한 users_data.json 저장 수"))
+STORAGE_LAST_SAVE_BYTES = REGISTRY.register(Gauge(
+    "storage_last_save_bytes", "마지막으로 저장한 users_data.json 크기"))
+
+
+def register_callback(name, help, kind, function, labelnames=()):
+    """수집 시점에 값을 읽는 지표 등록 (캐시 적중 수, 활성 세션 수 등)"""
+    return REGISTRY.register(CallbackMetric(name, help, kind, labelnames, function))
+
+
+class LLMCall:
+    """LLM 호출 한 번의 지표 기록 (with 블록)
+
+    OpenAI 클라이언트의 HTTP 요청 훅에 on_request를 연결하면 자동 재시도
+    횟수도 기록됩니다.
+    """
+
+    def __init__(self, provider, model, purpose):
+        self.labels = {"provider": provider, "model": model or "", "purpose": purpose}
+        self.attempts = 0
+        self.started = None
+
+    def on_request(self, request=None):
+        self.attempts += 1
+
+    def tokens(self, prompt_tokens, completion_tokens):
+        if prompt_tokens:
+            LLM_TOKENS.inc(prompt_tokens, direction="prompt", **self.labels)
+        if completion_tokens:
+            LLM_TOKENS.inc(completion_tokens, direction="completion", **self.labels)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        LLM_LATENCY.observe(time.perf_counter() - self.started, **self.labels)
+        if self.attempts > 1:
+            LLM_RETRIES.inc(self.attempts - 1, **self.labels)
+        if exc_type is not None:
+            LLM_ERRORS.inc(**self.labels)
+        return False
+
+
+def llm_call(provider, model, purpose):
+    return LLMCall(provider, model, purpose)
+
+
+def record_save(seconds, size):
+    """데이터 파일 저장 한 번 기록 (size가 None이면 실패)"""
+    if size is None:
+        STORAGE_SAVE_ERRORS.inc()
+        return
+    STORAGE_SAVE_SECONDS.observe(seconds)
+    STORAGE_SAVE_BYTES.inc(size)
+    STORAGE_LAST_SAVE_BYTES.set(size)
+
+
+def render():
+    return REGISTRY.render()
+
+
+class MetricsServer:
+    """/metrics를 제공하는 로컬 HTTP 스레드"""
+
+    def __init__(self, host="127.0.0.1", port=9464, registry=REGISTRY):
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-exporter", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,69 @@
+"""
+Server-side pagination helpers for large lists.
+
+Views first narrow a list of keys through the data index, then fetch and
+render only the records of the current page.
+"""
+
+import math
+
+# 화면별 기본 페이지 크기
+DEFAULT_PAGE_SIZES = {
+    "teacher_problems": 10,
+    "ai_problems": 5,
+    "admin_users": 25,
+}
+
+PAGE_SIZE_OPTIONS = [5, 10, 25, 50, 100]
+
+
+class Page:
+    """한 페이지 분량의 키와 페이지 정보"""
+
+    def __init__(self, keys, page, page_size, total):
+        self.keys = keys
+        self.page = page
+        self.page_size = page_size
+        self.total = total
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(self.total / self.page_size))
+
+    @property
+    def start(self):
+        return (self.page - 1) * self.page_size
+
+    def label(self):
+        """표시용 범위 문자열 (예: 11-20 / 135)"""
+        if not self.total:
+            return "0 / 0"
+        return f"{self.start + 1}-{self.start + len(self.keys)} / {self.total}"
+
+
+def paginate(keys, page, page_size):
+    """키 목록에서 요청한 페이지만 잘라 반환 (범위를 벗어난 페이지는 보정)"""
+    page_size = max(1, int(page_size))
+    total = len(keys)
+    page_count = max(1, math.ceil(total / page_size))
+    page = min(max(1, int(page)), page_count)
+    start = (page - 1) * page_size
+    return Page(list(keys[start:start + page_size]), page, page_size, total)
+
+
+def sort_keys(keys, records, field, reverse=False):
+    """레코드의 필드 값으로 키 정렬 (값이 없으면 빈 문자열로 취급)"""
+    return sorted(keys, key=lambda key: str(records[key].get(field, "") or ""), reverse=reverse)
+
+
+def filter_keys(keys, records, text, fields):
+    """여러 필드 중 하나라도 검색어를 포함하는 키만 반환"""
+    text = text.strip().lower()
+    if not text:
+        return list(keys)
+    result = []
+    for key in keys:
+        record = records[key]
+        if text in str(key).lower() or any(text in str(record.get(field, "") or "").lower() for field in fields):
+            result.append(key)
+    return result
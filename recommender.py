@@ -0,0 +1,198 @@
+"""
+Adaptive next-problem recommendations based on each student's history.
+
+A student profile (categories covered, recent levels, teacher scores and
+last practice time per category) is updated incrementally on every
+submission or grade, and the student's ranked candidate list is
+recomputed only for that student.
+"""
+
+import datetime
+
+LEVELS = ["초급(초)", "초급(중)", "초급(상)", "중급(초)", "중급(중)", "중급(상)", "상급(초)", "상급(중)", "상급(상)"]
+_LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+_DEFAULT_RANK = _LEVEL_RANK["초급(중)"]
+
+# 점수 가중치
+_WEIGHTS = {
+    "coverage": 0.35,
+    "level": 0.3,
+    "weakness": 0.2,
+    "staleness": 0.15,
+}
+
+# 최근 난이도를 계산할 때 사용하는 답변 수
+_RECENT_WINDOW = 5
+
+
+def level_rank(level):
+    """난이도 문자열을 0-8 순위로 변환 (알 수 없으면 초급(중))"""
+    return _LEVEL_RANK.get(level, _DEFAULT_RANK)
+
+
+def problem_identity(problem, key=None):
+    """이미 푼 문제인지 비교할 때 사용하는 식별자"""
+    return key or problem.get("question", "")
+
+
+def _parse_time(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class StudentProfile:
+    """학생의 학습 이력 요약"""
+
+    def __init__(self):
+        self.solved = set()
+        self.category_counts = {}
+        self.category_last = {}
+        self.category_scores = {}
+        self.recent_levels = []
+        self.recent_scores = []
+
+    def add_submission(self, submission):
+        problem = submission.get("problem", {})
+        self.solved.add(problem_identity(problem, submission.get("problem_key")))
+        self.solved.add(problem.get("question", ""))
+        category = problem.get("category", "기타")
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        timestamp = _parse_time(submission.get("timestamp"))
+        if timestamp and (category not in self.category_last or timestamp > self.category_last[category]):
+            self.category_last[category] = timestamp
+        self.recent_levels = (self.recent_levels + [level_rank(problem.get("level"))])[-_RECENT_WINDOW:]
+        if submission.get("teacher_score") not in (None, ""):
+            self.add_score(category, submission["teacher_score"])
+
+    def add_score(self, category, score):
+        try:
+            score = float(score)
+        except (TypeError, ValueError):
+            return
+        self.category_scores.setdefault(category, []).append(score)
+        self.recent_scores = (self.recent_scores + [score])[-_RECENT_WINDOW:]
+
+    def target_rank(self):
+        """최근 난이도와 교사 점수로 다음 목표 난이도 결정"""
+        if not self.recent_levels:
+            return _DEFAULT_RANK
+        rank = round(sum(self.recent_levels) / len(self.recent_levels))
+        if self.recent_scores:
+            average = sum(self.recent_scores) / len(self.recent_scores)
+            if average >= 85:
+                rank += 1
+            elif average < 60:
+                rank -= 1
+        return min(max(rank, 0), len(LEVELS) - 1)
+
+
+class Recommender:
+    """학생별 추천 후보 목록을 미리 계산해 두는 추천기
+
+    후보 아이디는 ("teacher", 문제 키) 또는 ("sample", 문제 키)입니다.
+    """
+
+    def __init__(self, sample_problems):
+        self.candidates = {("sample", key): problem for key, problem in sample_problems.items()}
+        self.profiles = {}
+        self.rankings = {}
+
+    def rebuild(self, teacher_problems, student_records):
+        """전체 데이터로 후보와 학생 프로필을 다시 구성"""
+        self.candidates = {cid: p for cid, p in self.candidates.items() if cid[0] == "sample"}
+        for key, problem in teacher_problems.items():
+            self.add_candidate(key, problem)
+        self.profiles = {}
+        self.rankings = {}
+        for student, record in student_records.items():
+            self.rebuild_student(student, record)
+
+    def rebuild_student(self, student, record):
+        """한 학생의 프로필을 기록 전체로 다시 계산 (재채점 등)"""
+        profile = StudentProfile()
+        for submission in record.get("solved_problems", []):
+            profile.add_submission(submission)
+        self.profiles[student] = profile
+        self.rankings.pop(student, None)
+
+    # 후보 관리
+    def add_candidate(self, key, problem):
+        """풀 수 있는 교사 문제를 후보에 추가하고 계산된 순위 목록에도 반영"""
+        if not problem.get("question"):
+            # 문제 내용 전체가 하나의 텍스트인 AI 생성 문제 세트는 제외
+            return
+        candidate_id = ("teacher", key)
+        self.remove_candidate(key)
+        self.candidates[candidate_id] = problem
+        now = datetime.datetime.now()
+        for student, ranking in self.rankings.items():
+            profile = self.profiles.get(student) or StudentProfile()
+            if key in profile.solved or problem["question"] in profile.solved:
+                continue
+            total, reason = self.score(profile, problem, now)
+            ranking.append((total, candidate_id, reason))
+            ranking.sort(key=lambda item: item[0], reverse=True)
+
+    def remove_candidate(self, key):
+        if self.candidates.pop(("teacher", key), None) is not None:
+            for ranking in self.rankings.values():
+                ranking[:] = [item for item in ranking if item[1] != ("teacher", key)]
+
+    # 학생 이력 갱신
+    def record_submission(self, student, submission):
+        self.profiles.setdefault(student, StudentProfile()).add_submission(submission)
+        self.rankings.pop(student, None)
+
+    def record_grade(self, student, submission):
+        profile = self.profiles.get(student)
+        if profile is None:
+            return
+        profile.add_score(submission.get("problem", {}).get("category", "기타"), submission.get("teacher_score"))
+        self.rankings.pop(student, None)
+
+    def remove_student(self, student):
+        self.profiles.pop(student, None)
+        self.rankings.pop(student, None)
+
+    # 점수 계산
+    def score(self, profile, problem, now=None):
+        """후보 문제 점수와 추천 이유"""
+        now = now or datetime.datetime.now()
+        category = problem.get("category", "기타")
+        count = profile.category_counts.get(category, 0)
+        coverage = 1.0 / (1 + count)
+        level = 1.0 - abs(level_rank(problem.get("level")) - profile.target_rank()) / (len(LEVELS) - 1)
+        scores = profile.category_scores.get(category)
+        weakness = 1.0 - (sum(scores) / len(scores)) / 100 if scores else 0.5
+        last = profile.category_last.get(category)
+        staleness = min((now - last).days / 14, 1.0) if last else 1.0
+
+        parts = {"coverage": coverage, "level": level, "weakness": weakness, "staleness": staleness}
+        total = sum(_WEIGHTS[name] * value for name, value in parts.items())
+        if count == 0:
+            reason = "새로운 카테고리"
+        elif scores and weakness >= 0.3:
+            reason = "보완이 필요한 카테고리"
+        elif staleness >= 1.0:
+            reason = "오랜만에 복습"
+        else:
+            reason = "난이도 맞춤"
+        return total, reason
+
+    def recommend(self, student, limit=5):
+        """아직 풀지 않은 문제를 점수 순으로 반환: [(점수, 후보 아이디, 이유), ...]"""
+        ranking = self.rankings.get(student)
+        if ranking is None:
+            profile = self.profiles.get(student) or StudentProfile()
+            now = datetime.datetime.now()
+            ranking = []
+            for candidate_id, problem in self.candidates.items():
+                if candidate_id[1] in profile.solved or problem.get("question", "") in profile.solved:
+                    continue
+                total, reason = self.score(profile, problem, now)
+                ranking.append((total, candidate_id, reason))
+            ranking.sort(key=lambda item: item[0], reverse=True)
+            self.rankings[student] = ranking
+        return ranking[:limit]
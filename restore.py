@@ -0,0 +1,310 @@
+"""
+Streaming, validated bulk restore.
+
+A restore runs in two steps. First the upload is parsed record by record
+into a staged dataset, with each record checked against the schema.
+Then the staged dataset is committed: it is written to a temporary file,
+fsynced, and renamed over users_data.json. If anything fails before the
+rename, the current data file is left untouched.
+"""
+
+import csv
+import io
+import json
+import zipfile
+
+import backup
+import storage
+
+VALID_ROLES = ("student", "teacher", "admin")
+
+# 오류 메시지는 앞쪽 일부만 보관
+MAX_ERRORS = 50
+
+_READ_SIZE = 64 * 1024
+
+
+class RestoreError(Exception):
+    """복원할 수 없는 형식의 파일일 때 발생"""
+
+
+class StagedRestore:
+    """검증을 마치고 교체를 기다리는 복원 데이터"""
+
+    def __init__(self, source):
+        self.source = source
+        self.users = {}
+        self.teacher_problems = {}
+        self.student_records = {}
+        self.errors = []
+        self.invalid_count = 0
+
+    def reject(self, kind, identifier, message):
+        self.invalid_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"{kind} {identifier}: {message}")
+
+    # 레코드 단위 검증 및 추가
+    def add_user(self, username, data):
+        if not isinstance(username, str) or not username:
+            return self.reject("사용자", username, "아이디가 없습니다.")
+        if not isinstance(data, dict):
+            return self.reject("사용자", username, "형식이 올바르지 않습니다.")
+        if data.get("role") not in VALID_ROLES:
+            return self.reject("사용자", username, f"알 수 없는 역할입니다: {data.get('role')}")
+        if not isinstance(data.get("password"), str) or not data.get("password"):
+            return self.reject("사용자", username, "비밀번호 해시가 없습니다.")
+        self.users[username] = data
+
+    def add_problem(self, key, data):
+        if not isinstance(key, str) or not key:
+            return self.reject("문제", key, "키가 없습니다.")
+        if not isinstance(data, dict):
+            return self.reject("문제", key, "형식이 올바르지 않습니다.")
+        if not data.get("question") and not data.get("content"):
+            return self.reject("문제", key, "문제 내용이 없습니다.")
+        self.teacher_problems[key] = data
+
+    def add_student_record(self, student_id, data):
+        if not isinstance(student_id, str) or not student_id:
+            return self.reject("학생 기록", student_id, "학생 아이디가 없습니다.")
+        if not isinstance(data, dict):
+            return self.reject("학생 기록", student_id, "형식이 올바르지 않습니다.")
+        solved = data.get("solved_problems", [])
+        if not isinstance(solved, list):
+            return self.reject("학생 기록", student_id, "solved_problems가 목록이 아닙니다.")
+        record = {**data, "solved_problems": []}
+        self.student_records[student_id] = record
+        for submission in solved:
+            self.add_submission(student_id, submission)
+
+    def add_submission(self, student_id, submission):
+        if not isinstance(submission, dict):
+            return self.reject("답변", student_id, "형식이 올바르지 않습니다.")
+        if not isinstance(submission.get("problem"), dict) or not isinstance(submission.get("answer", ""), str):
+            return self.reject("답변", student_id, "문제 또는 답변 필드가 올바르지 않습니다.")
+        record = self.student_records.setdefault(student_id, {"solved_problems": [], "total_problems": 0})
+        record["solved_problems"].append(submission)
+
+    def finish(self):
+        """집계 값 재계산 후 자신을 반환"""
+        for record in self.student_records.values():
+            record["total_problems"] = len(record["solved_problems"])
+        return self
+
+    def data(self):
+        return {
+            "teacher_problems": self.teacher_problems,
+            "student_records": self.student_records,
+            "users": self.users,
+        }
+
+    def counts(self):
+        return {
+            "users": len(self.users),
+            "teacher_problems": len(self.teacher_problems),
+            "student_records": len(self.student_records),
+            "submissions": sum(len(r["solved_problems"]) for r in self.student_records.values()),
+        }
+
+
+class _JsonStream:
+    """텍스트 스트림에서 JSON 값을 하나씩 디코딩하는 보조 리더"""
+
+    def __init__(self, text_stream):
+        self.stream = text_stream
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.stream.read(_READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise RestoreError(f"JSON 형식 오류: '{char}'이(가) 필요합니다.")
+        self.position += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # 버퍼 끝에서 끝난 숫자 등은 뒤에 더 이어질 수 있음
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def object_items(self):
+        """현재 위치의 객체를 (키, 값) 단위로 읽음"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.position += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise RestoreError("JSON 형식 오류: ',' 또는 '}'이(가) 필요합니다.")
+
+
+def stage_json(file, progress=None):
+    """기존 단일 JSON 백업을 항목 단위로 스트리밍 파싱"""
+    staged = StagedRestore("json")
+    size = getattr(file, "size", 0) or 1
+    stream = _JsonStream(io.TextIOWrapper(file, encoding="utf-8"))
+    sections = {
+        "users": staged.add_user,
+        "teacher_problems": staged.add_problem,
+        "student_records": staged.add_student_record,
+    }
+    seen = set()
+    try:
+        for section in stream.object_items():
+            handler = sections.get(section)
+            if handler is None:
+                stream.value()
+                continue
+            seen.add(section)
+            for key in stream.object_items():
+                handler(key, stream.value())
+                if progress is not None:
+                    progress(min(file.tell() / size, 1.0))
+    except json.JSONDecodeError as e:
+        raise RestoreError(f"JSON 형식 오류: {e}")
+    finally:
+        # 업로드 파일 객체가 함께 닫히지 않도록 분리
+        stream.stream.detach()
+    missing = [section for section in sections if section not in seen]
+    if missing:
+        raise RestoreError(f"유효하지 않은 백업 파일입니다. 필수 데이터가 누락되었습니다: {', '.join(missing)}")
+    return staged.finish()
+
+
+def stage_jsonl_zip(zip_file, progress=None):
+    """JSON Lines ZIP 백업을 레코드 단위로 파싱 (청크 체크섬 검증)"""
+    staged = StagedRestore("jsonl-zip")
+    members = backup.read_manifest(zip_file).get("members", {})
+    total = sum(member.get("records", 0) for member in members.values()) or 1
+    done = 0
+
+    def tick():
+        nonlocal done
+        done += 1
+        if progress is not None and done % 500 == 0:
+            progress(min(done / total, 1.0))
+
+    for record in backup.iter_member(zip_file, backup.USERS_MEMBER, members.get(backup.USERS_MEMBER)):
+        staged.add_user(record.pop("username", None), record)
+        tick()
+    for record in backup.iter_member(zip_file, backup.PROBLEMS_MEMBER, members.get(backup.PROBLEMS_MEMBER)):
+        staged.add_problem(record.pop("key", None), record)
+        tick()
+    for record in backup.iter_member(zip_file, backup.RECORDS_MEMBER, members.get(backup.RECORDS_MEMBER)):
+        staged.add_student_record(record.pop("student_id", None), record)
+        tick()
+    for record in backup.iter_member(zip_file, backup.SUBMISSIONS_MEMBER, members.get(backup.SUBMISSIONS_MEMBER)):
+        student_id = record.pop("student_id", None)
+        record.pop("index", None)
+        staged.add_submission(student_id, record)
+        tick()
+    return staged.finish()
+
+
+def _csv_rows(zip_file, member):
+    with zip_file.open(member) as raw:
+        yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+
+
+def _score(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return value or ""
+
+
+def stage_csv_zip(zip_file, progress=None):
+    """기존 CSV(ZIP) 백업을 행 단위로 파싱"""
+    staged = StagedRestore("csv-zip")
+    for member in ("users.csv", "problems.csv", "student_records.csv"):
+        if member not in zip_file.namelist():
+            raise RestoreError(f"유효하지 않은 백업 파일입니다. {member}이(가) 없습니다.")
+
+    for row in _csv_rows(zip_file, "users.csv"):
+        username = row.pop("username", None)
+        staged.add_user(username, row)
+    if progress is not None:
+        progress(0.2)
+    for row in _csv_rows(zip_file, "problems.csv"):
+        key = row.pop("key", None)
+        staged.add_problem(key, row)
+    if progress is not None:
+        progress(0.4)
+    for row in _csv_rows(zip_file, "student_records.csv"):
+        staged.add_submission(row["student_id"], {
+            "timestamp": row.get("timestamp", ""),
+            "problem": {"question": row.get("question", "")},
+            "answer": row.get("answer", ""),
+            "feedback": row.get("feedback", ""),
+            "teacher_feedback": row.get("teacher_feedback", ""),
+            "teacher_score": _score(row.get("score")),
+        })
+    if progress is not None:
+        progress(1.0)
+    return staged.finish()
+
+
+def stage_upload(file, progress=None):
+    """업로드 파일 형식을 판별해 복원 데이터를 준비"""
+    if zipfile.is_zipfile(file):
+        file.seek(0)
+        with zipfile.ZipFile(file) as zip_file:
+            if backup.is_jsonl_backup(zip_file):
+                return stage_jsonl_zip(zip_file, progress)
+            return stage_csv_zip(zip_file, progress)
+    file.seek(0)
+    return stage_json(file, progress)
+
+
+def stage_data(users, teacher_problems, student_records, source):
+    """이미 메모리에 있는 데이터(예: 증분 백업 체인)를 검증해 준비"""
+    staged = StagedRestore(source)
+    for username, data in users.items():
+        staged.add_user(username, data)
+    for key, data in teacher_problems.items():
+        staged.add_problem(key, data)
+    for student_id, data in student_records.items():
+        staged.add_student_record(student_id, data)
+    return staged.finish()
+
+
+def commit(staged, path=storage.DATA_FILE):
+    """준비된 데이터를 원자적으로 데이터 파일에 기록하고 데이터 반환"""
+    data = staged.data()
+    storage.write_json_atomic(path, data)
+    return data
@@ -0,0 +1,161 @@
+"""
+Incremental full-text search over problems and submissions.
+
+English text is split into lowercase words and Korean (Hangul) runs into
+overlapping character bigrams, so queries such as "관사" or "articles" match
+without a morphological analyzer. Results are ranked with BM25.
+"""
+
+import math
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[가-힣]+")
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+# BM25 매개변수
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text):
+    """영어는 소문자 단어, 한국어는 음절 바이그램으로 토큰화"""
+    if not text:
+        return []
+    tokens = []
+    for match in _TOKEN_RE.finditer(str(text).lower()):
+        word = match.group()
+        if _HANGUL_RE.match(word):
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def problem_text(problem):
+    """문제 문서에 색인할 텍스트"""
+    fields = ("question", "context", "content")
+    return "\n".join(str(problem.get(field, "") or "") for field in fields)
+
+
+def submission_text(submission):
+    """답변 문서에 색인할 텍스트 (답변, AI 첨삭, 교사 첨삭)"""
+    fields = ("answer", "feedback", "teacher_feedback")
+    return "\n".join(str(submission.get(field, "") or "") for field in fields)
+
+
+class SearchIndex:
+    """문서 추가/삭제가 즉시 반영되는 역색인
+
+    문서 아이디는 튜플이며 첫 번째 원소가 문서 종류("problem",
+    "submission")입니다.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_lengths = {}
+        self._doc_terms = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, text):
+        """문서 추가 (이미 있으면 교체)"""
+        self.remove(doc_id)
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            self.postings.setdefault(token, {})[doc_id] = count
+        length = sum(counts.values())
+        self.doc_lengths[doc_id] = length
+        self._doc_terms[doc_id] = tuple(counts)
+        self._total_length += length
+
+    def remove(self, doc_id):
+        """문서 삭제"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+        self._total_length -= self.doc_lengths.pop(doc_id)
+
+    def remove_where(self, predicate):
+        """조건에 맞는 문서를 모두 삭제"""
+        for doc_id in [doc_id for doc_id in self.doc_lengths if predicate(doc_id)]:
+            self.remove(doc_id)
+
+    def add_problem(self, key, problem):
+        self.add(("problem", key), problem_text(problem))
+
+    def remove_problem(self, key):
+        self.remove(("problem", key))
+
+    def add_submission(self, student, index, submission):
+        self.add(("submission", student, index), submission_text(submission))
+
+    def remove_student(self, student):
+        self.remove_where(lambda doc_id: doc_id[0] == "submission" and doc_id[1] == student)
+
+    def search(self, query, kind=None, allow=None, limit=20):
+        """BM25 점수 순으로 (문서 아이디, 점수) 목록 반환
+
+        Args:
+            query (str): 검색어
+            kind (str): 문서 종류 제한 ("problem" 또는 "submission")
+            allow (callable): 문서 아이디를 받아 포함 여부를 반환하는 함수
+            limit (int): 최대 결과 수
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.doc_lengths:
+            return []
+        doc_count = len(self.doc_lengths)
+        avg_length = self._total_length / doc_count or 1
+        scores = {}
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                if kind is not None and doc_id[0] != kind:
+                    continue
+                if allow is not None and not allow(doc_id):
+                    continue
+                norm = _K1 * (1 - _B + _B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (_K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def rebuild(self, teacher_problems, student_records):
+        """전체 데이터로 색인을 다시 구성"""
+        self.__init__()
+        for key, problem in teacher_problems.items():
+            self.add_problem(key, problem)
+        for student, record in student_records.items():
+            for index, submission in enumerate(record.get("solved_problems", [])):
+                self.add_submission(student, index, submission)
+
+
+def snippet(text, query, width=80):
+    """검색어 주변의 짧은 발췌문"""
+    text = str(text or "").replace("\n", " ")
+    lowered = text.lower()
+    position = -1
+    for term in str(query).lower().split():
+        position = lowered.find(term)
+        if position >= 0:
+            break
+    if position < 0:
+        return text[:width] + ("..." if len(text) > width else "")
+    start = max(0, position - width // 2)
+    end = min(len(text), start + width)
+    return ("..." if start > 0 else "") + text[start:end] + ("..." if end < len(text) else "")
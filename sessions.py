@@ -0,0 +1,148 @@
+"""
+Signed, expiring session tokens with server-side revocation.
+
+A token is "<payload>.<signature>", where the payload is base64url JSON
+({"sid", "u", "exp"}) and the signature is an HMAC-SHA256 over it. The
+app keeps the token in the URL query string, so a browser refresh or a
+websocket reconnect can restore the login with one signature check and
+one dictionary lookup instead of re-running the login path.
+
+Issued sessions are tracked in sessions.json so they can be revoked
+(logout, password change, user deletion) and survive a server restart.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+import storage
+
+SESSIONS_FILE = "sessions.json"
+SECRET_FILE = ".session_secret"
+QUERY_PARAM = "session"
+
+DEFAULT_TTL_HOURS = 12
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _session_id(token):
+    """토큰 payload의 세션 아이디 (서명 확인 없이, 읽을 수 없으면 None)"""
+    try:
+        claims = json.loads(_b64decode((token or "").split(".")[0]))
+    except (TypeError, ValueError, UnicodeError):
+        return None
+    return claims.get("sid") if isinstance(claims, dict) else None
+
+
+def load_secret(secret=None, path=SECRET_FILE):
+    """서명 키 (설정의 SESSION_SECRET, 없으면 파일에 한 번 만들어 보관)"""
+    if secret:
+        return secret.encode() if isinstance(secret, str) else secret
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    secret = secrets.token_bytes(32)
+    handle = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(handle, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+class SessionStore:
+    """발급한 세션 목록 (프로세스 전체에서 공유)"""
+
+    def __init__(self, path=SESSIONS_FILE, secret=None, ttl_hours=DEFAULT_TTL_HOURS):
+        self.path = path
+        self.secret = load_secret(secret)
+        self.ttl = ttl_hours * 3600
+        self.lock = threading.Lock()
+        self.sessions = storage.read_json(path) if os.path.exists(path) else {}
+        self.prune()
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self.secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def _save(self):
+        storage.write_json_atomic(self.path, self.sessions)
+
+    def issue(self, username):
+        """새 세션을 등록하고 토큰 반환"""
+        sid = secrets.token_urlsafe(16)
+        expires = int(time.time() + self.ttl)
+        with self.lock:
+            # 만료된 세션도 함께 정리해 파일이 계속 커지지 않도록
+            self._prune_expired()
+            self.sessions[sid] = {"username": username, "expires": expires, "created_at": int(time.time())}
+            self._save()
+        payload = _b64encode(json.dumps({"sid": sid, "u": username, "exp": expires}).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def resolve(self, token):
+        """토큰이 유효하면 사용자 아이디, 아니면 None"""
+        if not token or token.count(".") != 1:
+            return None
+        payload, signature = token.split(".")
+        try:
+            # URL에서 온 값이므로 ASCII가 아닌 문자가 섞여 있으면 잘못된 토큰으로 처리
+            if not hmac.compare_digest(signature.encode("ascii"), self._sign(payload).encode("ascii")):
+                return None
+            claims = json.loads(_b64decode(payload))
+        except (TypeError, ValueError, UnicodeError):
+            return None
+        if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+            return None
+        session = self.sessions.get(claims.get("sid"))
+        if session is None or session["username"] != claims.get("u"):
+            return None
+        return session["username"]
+
+    def revoke(self, token):
+        """토큰의 세션 폐기 (로그아웃)"""
+        sid = _session_id(token)
+        if sid is None:
+            return
+        with self.lock:
+            if self.sessions.pop(sid, None) is not None:
+                self._save()
+
+    def revoke_user(self, username, keep=None):
+        """사용자의 모든 세션 폐기 (keep 토큰의 세션은 유지)"""
+        keep_sid = _session_id(keep) if keep else None
+        with self.lock:
+            revoked = [sid for sid, session in self.sessions.items()
+                       if session["username"] == username and sid != keep_sid]
+            for sid in revoked:
+                del self.sessions[sid]
+            if revoked:
+                self._save()
+        return len(revoked)
+
+    def prune(self):
+        """만료된 세션 정리"""
+        with self.lock:
+            if self._prune_expired():
+                self._save()
+
+    def _prune_expired(self):
+        """만료된 세션을 지우고 지운 수 반환 (self.lock 안에서 호출, 저장은 호출한 쪽에서)"""
+        now = time.time()
+        expired = [sid for sid, session in self.sessions.items() if session["expires"] < now]
+        for sid in expired:
+            del self.sessions[sid]
+        return len(expired)
+
+    def active_count(self):
+        now = time.time()
+        return sum(1 for session in self.sessions.values() if session["expires"] >= now)
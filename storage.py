@@ -0,0 +1,196 @@
+"""
+Atomic file persistence for users_data.json.
+
+write_json_atomic() replaces a file through a temp file, fsync and
+rename. WriteBehind sits in front of it: callers mark data dirty and
+return immediately, and a background thread writes once the changes
+have been quiet for `delay` seconds (or at most `max_delay` after the
+first one), so a burst of saves becomes a single file write. The file
+is one JSON document, so each write serializes the whole snapshot; the
+writer only counts save requests and does not track which entities
+changed. flush() writes synchronously (tests, restore, shutdown); every
+writer is also flushed at interpreter exit.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+DATA_FILE = "users_data.json"
+
+
+def write_json_atomic(path, data, indent=2):
+    """임시 파일에 기록하고 fsync 후 rename으로 교체 (중간에 실패해도 원본 유지)
+
+    Returns:
+        int: 기록한 바이트 수
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(prefix=".users_data_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return os.path.getsize(path)
+
+
+def read_json(path):
+    """JSON 파일 읽기"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_writers = weakref.WeakSet()
+
+
+class WriteBehind:
+    """변경 표시 후 백그라운드 스레드에서 모아서 저장 (기록할 때마다 파일 전체를 씀)
+
+    Args:
+        path (str): 저장할 파일
+        snapshot (callable): 저장할 데이터를 돌려주는 함수 (저장 스레드에서 호출)
+        delay (float): 마지막 변경 후 이 시간(초) 동안 변경이 없으면 저장 (0이면 바로 저장)
+        max_delay (float): 첫 변경 후 늦어도 이 시간(초) 안에 저장
+        on_flush (callable): 저장 후 on_flush(소요 초, 바이트 수, 병합된 요청 수) 호출
+        on_error (callable): 저장 실패 시 on_error(예외) 호출 (변경은 남아 다시 시도)
+    """
+
+    def __init__(self, path, snapshot, delay=0.5, max_delay=3.0, on_flush=None, on_error=None):
+        # 백그라운드 스레드와 종료 시 기록은 작업 디렉터리가 바뀐 뒤일 수 있으므로 절대 경로로
+        self.path = os.path.abspath(path)
+        self.snapshot = snapshot
+        self.delay = delay
+        self.max_delay = max(max_delay, delay)
+        self.on_flush = on_flush
+        self.on_error = on_error
+        self.condition = threading.Condition()
+        # 파일 기록 중에는 다른 쪽(다시 읽기, 복원)이 파일을 건드리지 않도록
+        self.io_lock = threading.RLock()
+        self.requests = 0
+        self.first_dirty_at = None
+        self.last_dirty_at = None
+        self.writes = 0
+        self.coalesced = 0
+        self.last_error = None
+        self.closed = False
+        self.thread = None
+        _writers.add(self)
+
+    @property
+    def pending(self):
+        """아직 저장되지 않은 변경이 있는지"""
+        with self.condition:
+            return self.requests > 0
+
+    def mark_dirty(self):
+        """저장 예약 (delay가 0이면 바로 저장하고 바이트 수 반환)"""
+        with self.condition:
+            self.requests += 1
+            now = time.monotonic()
+            self.first_dirty_at = self.first_dirty_at or now
+            self.last_dirty_at = now
+            if self.delay > 0 and not self.closed:
+                self._ensure_thread()
+                self.condition.notify()
+                return None
+        return self.flush()
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.requests and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                # 변경이 잠잠해지거나 max_delay가 지날 때까지 기다려 한 번에 저장
+                while self.requests and not self.closed:
+                    due = min(self.last_dirty_at + self.delay, self.first_dirty_at + self.max_delay)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            try:
+                self.flush()
+            except Exception:
+                # 변경은 남아 있으므로 잠시 후 다시 시도
+                time.sleep(max(self.delay, 1.0))
+
+    def flush(self):
+        """밀린 변경을 지금 저장 (없으면 None, 있으면 기록한 바이트 수)"""
+        with self.io_lock:
+            with self.condition:
+                if not self.requests:
+                    return None
+                requests, self.requests = self.requests, 0
+                self.first_dirty_at = self.last_dirty_at = None
+            started = time.perf_counter()
+            try:
+                size = write_json_atomic(self.path, self.snapshot())
+            except Exception as e:
+                with self.condition:
+                    self.requests += requests
+                    now = time.monotonic()
+                    self.first_dirty_at = self.first_dirty_at or now
+                    self.last_dirty_at = self.last_dirty_at or now
+                    self.last_error = e
+                if self.on_error:
+                    self.on_error(e)
+                raise
+            self.last_error = None
+            self.writes += 1
+            self.coalesced += requests - 1
+            if self.on_flush:
+                self.on_flush(time.perf_counter() - started, size, requests)
+            return size
+
+    def discard(self):
+        """저장하지 않은 변경 버림 (복원으로 파일을 통째로 바꿀 때)"""
+        with self.condition:
+            self.requests = 0
+            self.first_dirty_at = self.last_dirty_at = None
+
+    def close(self):
+        """저장 스레드를 멈추고 남은 변경을 저장"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        return self.flush()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "pending": self.requests,
+                "writes": self.writes,
+                "coalesced": self.coalesced,
+                "last_error": str(self.last_error) if self.last_error else None,
+            }
+
+
+def flush_all():
+    """모든 WriteBehind의 밀린 변경을 지금 저장 (테스트, 종료 시)"""
+    for writer in list(_writers):
+        writer.flush()
+
+
+@atexit.register
+def _flush_at_exit():
+    for writer in list(_writers):
+        try:
+            writer.close()
+        except Exception:
+            pass